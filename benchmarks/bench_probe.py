@@ -0,0 +1,86 @@
+"""
+Benchmark: header-only dimension probing vs. PIL.
+
+Creates a directory of synthetic JPEG/PNG/WebP outputs (or uses an
+existing directory) and measures the per-file cost of reading width and
+height with ImageProbe and with PIL.Image.open.
+
+Usage:
+    python benchmarks/bench_probe.py --count 3000
+    python benchmarks/bench_probe.py --dir data/output/enhanced
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# The package loads settings on import; probing never calls the API
+os.environ.setdefault("BFL_API_KEY", "benchmark")
+
+from src.flux_generator.utils.probe import ImageProbe
+
+
+def create_images(directory: Path, count: int) -> list:
+    """Write synthetic images in the formats the generators produce."""
+    from PIL import Image
+
+    formats = [("jpg", "JPEG"), ("png", "PNG"), ("webp", "WEBP")]
+    paths = []
+    for i in range(count):
+        extension, pil_format = formats[i % len(formats)]
+        width, height = 832 + (i % 7) * 16, 1248 - (i % 5) * 16
+        path = directory / f"bench_{i}.{extension}"
+        Image.new("RGB", (width, height), (i % 256, 80, 160)).save(path, pil_format)
+        paths.append(path)
+    return paths
+
+
+def time_per_file(paths: list, probe) -> float:
+    """Average microseconds per file for a probe function."""
+    start = time.perf_counter()
+    for path in paths:
+        probe(path)
+    return (time.perf_counter() - start) / len(paths) * 1e6
+
+
+def pil_size(path: Path):
+    from PIL import Image
+    with Image.open(path) as img:
+        return img.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=3000, help="number of synthetic images")
+    parser.add_argument("--dir", type=Path, help="probe existing images instead of synthetic ones")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dir:
+            paths = sorted(p for p in args.dir.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"})
+        else:
+            print(f"Creating {args.count} synthetic images...")
+            paths = create_images(Path(tmp), args.count)
+
+        if not paths:
+            print("No images found")
+            return
+
+        mismatches = [p for p in paths if ImageProbe.probe_file(p) != pil_size(p)]
+        probe_us = min(time_per_file(paths, ImageProbe.probe_file) for _ in range(args.repeat))
+        pil_us = min(time_per_file(paths, pil_size) for _ in range(args.repeat))
+
+        print(f"Files:           {len(paths)}")
+        print(f"Mismatches:      {len(mismatches)}")
+        print(f"ImageProbe:      {probe_us:8.1f} us/file  ({probe_us * len(paths) / 1e6:.3f}s total)")
+        print(f"PIL.Image.open:  {pil_us:8.1f} us/file  ({pil_us * len(paths) / 1e6:.3f}s total)")
+        print(f"Speedup:         {pil_us / probe_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
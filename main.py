@@ -5,6 +5,8 @@ This script provides a command-line interface to interact with the various
 image generation modules.
 """
 
+import argparse
+import json
 import sys
 from pathlib import Path
 
@@ -18,7 +20,16 @@ try:
         CharacterRotationGenerator,
         AdetailerGenerator
     )
+    from src.flux_generator.storage import ObjectStore, ShardWriter, Catalog, TensorExport, OutputLayout
+    from src.flux_generator.config.settings import settings
+    from src.flux_generator.processing import NearDuplicateFinder, DerivativeProcessor
+    from src.flux_generator.core.pipeline import GenerationPipeline
+    from src.flux_generator.core.characters import MultiCharacterGenerator
+    from src.flux_generator.core.workers import WorkerPool
+    from src.flux_generator.core.spec import GenerationSpec
+    from src.flux_generator.service import serve as serve_service
     from src.flux_generator.utils.logger import get_logger
+    from src.flux_generator.utils.manifest import ProcessingManifest
 except ImportError:
     print("❌ Error: Could not import generator modules.")
     print("   Please ensure you are running this script from the project root directory,")
@@ -74,6 +85,8 @@ class CLI:
                 self._handle_adetailer_generator_menu()
             elif choice == '5':
                 self._test_connection()
+            elif choice == '6':
+                self._handle_storage_menu()
             elif choice.lower() in ['q', 'quit', 'exit']:
                 print("👋 Goodbye!")
                 break
@@ -90,6 +103,7 @@ class CLI:
         print("3. Character Rotation Generator")
         print("4. Adetailer (Face Enhancement)")
         print("5. Test API Connection")
+        print("6. Storage Tools")
         print("q. Quit")
         print("-"*50)
 
@@ -176,6 +190,7 @@ class CLI:
             print("1. Generate a single rotation angle")
             print("2. Generate a 360-degree sequence (8 steps)")
             print("3. List available angles")
+            print("4. Generate all angles in parallel (dependency graph)")
             print("b. Back to main menu")
             choice = input("👉 Enter your choice: ").strip()
 
@@ -192,6 +207,9 @@ class CLI:
                 print("   Available Angles:")
                 for a in angles:
                     print(f"   - {a}")
+            elif choice == '4':
+                results = self.rotation_generator.generate_rotation_graph()
+                print(f"✅ {sum(1 for p in results.values() if p)}/{len(results)} angles generated.")
             elif choice.lower() == 'b':
                 break
             else:
@@ -207,6 +225,8 @@ class CLI:
         while True:
             print("1. Process all images in the default directory")
             print("2. Process images in a custom directory")
+            print("3. Process only new images in the default directory (incremental)")
+            print("4. Watch the default directory and process new images (Ctrl+C to stop)")
             print("b. Back to main menu")
             choice = input("👉 Enter your choice: ").strip()
 
@@ -224,6 +244,51 @@ class CLI:
                     print(f"✅ Processing complete. Check the 'data/adetailer_processed' directory.")
                 except Exception as e:
                     print(f"❌ An error occurred: {e}")
+            elif choice == '3':
+                processed = self.adetailer_generator.process_directory_images(input_dir=input_dir, incremental=True)
+                print(f"✅ Processed {len(processed)} new images. Check the 'data/adetailer_processed' directory.")
+            elif choice == '4':
+                print("👀 Watching for new images... Press Ctrl+C to stop.")
+                processed = self.adetailer_generator.watch_directory(input_dir=input_dir)
+                print(f"✅ Watch stopped. Processed {len(processed)} images.")
+            elif choice.lower() == 'b':
+                break
+            else:
+                print("❌ Invalid choice.")
+
+    def _handle_storage_menu(self):
+        """Handle the menu for output storage maintenance."""
+        output_dir = self.flux_generator.settings.paths.output_dir
+        while True:
+            print("\n--- Storage Tools Menu ---")
+            print("1. Deduplicate existing outputs into the object store")
+            print("2. Remove unreferenced objects")
+            print("3. Export outputs to dataset shards")
+            print("4. Index existing outputs in the catalog")
+            print("5. Find near-duplicate outputs")
+            print("b. Back to main menu")
+            choice = input("👉 Enter your choice: ").strip()
+
+            if choice == '1':
+                result = ObjectStore.from_settings().ingest_directory(output_dir)
+                print(f"✅ Ingested {result['files']} files: {result['deduplicated']} duplicates, "
+                      f"{result['bytes_saved'] / 1024 / 1024:.1f} MB saved.")
+            elif choice == '2':
+                removed = ObjectStore.from_settings().collect_garbage()
+                print(f"✅ Removed {removed} unreferenced objects.")
+            elif choice == '3':
+                shard_dir = output_dir / "shards"
+                shards = ShardWriter.export_directory(output_dir, shard_dir, prefix="export")
+                print(f"✅ Wrote {len(shards)} shards to {shard_dir}.")
+            elif choice == '4':
+                result = Catalog.default().backfill(output_dir)
+                print(f"✅ Indexed {result['indexed']} images ({result['skipped']} unchanged).")
+            elif choice == '5':
+                report = NearDuplicateFinder().find_in_directory(output_dir)
+                report_path = output_dir / "near_duplicates.json"
+                report.save(report_path)
+                print(f"✅ Found {len(report.groups)} groups ({len(report.duplicates)} redundant images). "
+                      f"Report: {report_path}")
             elif choice.lower() == 'b':
                 break
             else:
@@ -239,6 +304,238 @@ class CLI:
             print("❌ API Connection failed. Check your API key and network.")
 
 
+def run_catalog_command(args: argparse.Namespace) -> None:
+    """Run a non-interactive catalog command."""
+    catalog = Catalog(args.db) if args.db else Catalog.default()
+    if args.action == "backfill":
+        root = args.root or settings.paths.output_dir
+        result = catalog.backfill(root, workers=args.workers)
+        print(f"✅ Scanned {result['scanned']} files: {result['indexed']} indexed, {result['skipped']} unchanged.")
+    elif args.action == "query":
+        rows = catalog.query(
+            style=args.style,
+            aspect=args.aspect,
+            quality=args.quality,
+            generator=args.generator,
+            seed=args.seed,
+            max_latency=args.max_latency,
+            limit=args.limit
+        )
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False, default=str) if args.json else row["path"])
+    elif args.action == "stats":
+        print(json.dumps(catalog.get_stats(), indent=2, ensure_ascii=False))
+
+
+def run_tensors_command(args: argparse.Namespace) -> None:
+    """Run a non-interactive tensor export command."""
+    directory = args.out or settings.paths.output_dir / "tensors"
+    export = TensorExport(directory, height=args.height, width=args.width, resize_mode=args.resize_mode)
+    root = args.root or settings.paths.output_dir
+    appended = export.append_directory(root, processes=args.workers)
+    print(f"✅ Appended {appended} samples; {export.count} total ({export.height}x{export.width}) in {directory}.")
+
+
+def run_layout_command(args: argparse.Namespace) -> None:
+    """Re-shard existing output directories into the configured (or given) layout."""
+    storage = settings.storage
+    layout = OutputLayout(args.scheme or storage.layout, depth=storage.layout_depth,
+                          bucket_size=storage.layout_bucket_size)
+    root = args.root or settings.paths.output_dir
+    moved = layout.migrate_tree(root, dry_run=args.dry_run) if args.root is None else layout.migrate(root, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"✅ {len(moved)} files would be moved into the '{layout.scheme}' layout.")
+        return
+    catalog_path = settings.paths.output_dir / "catalog.sqlite"
+    if moved and catalog_path.exists():
+        Catalog.default().rename_paths(moved)
+    # Incremental Adetailer runs look inputs up by path; without this every moved input looks new
+    manifest_path = args.manifest or Path("data") / "adetailer_processed" / AdetailerGenerator.MANIFEST_FILENAME
+    if moved and manifest_path.exists():
+        ProcessingManifest(manifest_path).rename_paths(moved)
+    print(f"✅ Moved {len(moved)} files into the '{layout.scheme}' layout.")
+
+
+def run_derivatives_command(args: argparse.Namespace) -> None:
+    """Build derivatives for existing outputs."""
+    processor = DerivativeProcessor.default()
+    if args.workers:
+        processor.workers = args.workers
+    root = args.root or settings.paths.output_dir
+    processed = processor.process_directory(root, force=args.force)
+    processor.close()
+    stats = processor.get_stats()
+    print(f"✅ Built derivatives for {processed} images ({stats['files_written']} files, {stats['failed']} failed) "
+          f"in {processor.output_dir}.")
+
+
+def run_pipeline_command(args: argparse.Namespace) -> None:
+    """Generate images and stream each one through QA, Adetailer and post-processing."""
+    pipeline = GenerationPipeline(
+        quality_gate=args.qa,
+        adetailer_config={} if args.face_params else None,
+        generate_workers=args.generate_workers,
+        adetailer_workers=args.adetailer_workers
+    )
+    start_seed = args.seed or settings.generation.default_seed
+    jobs = ({"seed": start_seed + i, "custom_prompt": args.prompt} for i in range(args.count))
+    done = 0
+    for item in pipeline.run(jobs):
+        if item.status == "done":
+            done += 1
+            print(f"✅ {item.path}")
+        else:
+            print(f"⚠️  {item.source_path or item.params.get('seed')}: {item.status} ({', '.join(item.reasons)})")
+    print(f"✅ {done}/{args.count} images generated and enhanced.")
+
+
+def run_characters_command(args: argparse.Namespace) -> None:
+    """Generate the same styles and seeds for every character image in the input directory."""
+    generator = MultiCharacterGenerator(input_dir=args.input_dir, max_workers=args.workers)
+    styles = args.styles.split(",") if args.styles else None
+    results = generator.generate(styles=styles, count=args.count, start_seed=args.seed, custom_prompt=args.prompt)
+    for name, by_style in results.items():
+        generated = sum(len(paths) for paths in by_style.values())
+        print(f"   {name}: {generated} images in {generator.output_dir_for_name(name)}")
+    print(f"✅ Generated images for {len(results)} characters.")
+
+
+def run_workers_command(args: argparse.Namespace) -> None:
+    """Generate a batch on worker processes, or submit/serve/inspect a queue shared by several nodes."""
+    pool = WorkerPool(processes=args.processes, threads_per_process=args.threads,
+                      requests_per_second=args.rate, store_path=args.queue)
+    spec = GenerationSpec(style=args.style) if args.style else GenerationSpec()
+    start_seed = args.seed or settings.generation.default_seed
+
+    if args.action == "run":
+        paths = pool.generate_images(args.count, start_seed=start_seed, custom_prompt=args.prompt, spec=spec)
+        print(f"✅ Generated {len(paths)}/{args.count} images on {pool.processes} processes (batch {pool.last_batch}).")
+    elif args.action == "submit":
+        batch = pool.submit_images(args.count, start_seed=start_seed, custom_prompt=args.prompt, spec=spec)
+        print(f"✅ Submitted {args.count} jobs as batch {batch}.")
+    elif args.action == "serve":
+        counts = pool.serve(args.batch, wait=args.wait)
+        print(f"✅ Queue drained: {json.dumps(counts)}")
+    elif args.action == "status":
+        store = pool.open_store()
+        for entry in store.batches():
+            if args.batch and entry["batch"] != args.batch:
+                continue
+            counts = ", ".join(f"{status} {entry.get(status, 0)}" for status in ("pending", "running", "done", "failed"))
+            print(f"   {entry['batch']}: {counts}")
+        store.close()
+
+
+def run_serve_command(args: argparse.Namespace) -> None:
+    """Run the local HTTP job service until interrupted."""
+    serve_service(host=args.host, port=args.port)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments; no command starts the interactive menu."""
+    parser = argparse.ArgumentParser(description="SenteticData FLUX Image Generator")
+    commands = parser.add_subparsers(dest="command")
+
+    catalog_parser = commands.add_parser("catalog", help="Query or rebuild the image catalog")
+    catalog_parser.add_argument("action", choices=["backfill", "query", "stats"])
+    catalog_parser.add_argument("--db", type=Path, help="catalog database (default: output/catalog.sqlite)")
+    catalog_parser.add_argument("--root", type=Path, help="output tree to backfill (default: output directory)")
+    catalog_parser.add_argument("--workers", type=int, help="parallel workers for backfill")
+    catalog_parser.add_argument("--style")
+    catalog_parser.add_argument("--aspect")
+    catalog_parser.add_argument("--quality")
+    catalog_parser.add_argument("--generator")
+    catalog_parser.add_argument("--seed", type=int)
+    catalog_parser.add_argument("--max-latency", type=float, help="seconds")
+    catalog_parser.add_argument("--limit", type=int)
+    catalog_parser.add_argument("--json", action="store_true", help="print full rows as JSON lines")
+
+    tensors_parser = commands.add_parser("tensors", help="Export outputs to a memory-mapped pixel array")
+    tensors_parser.add_argument("action", choices=["export"])
+    tensors_parser.add_argument("--root", type=Path, help="output tree to export (default: output directory)")
+    tensors_parser.add_argument("--out", type=Path, help="export directory (default: output/tensors)")
+    tensors_parser.add_argument("--height", type=int, default=settings.storage.tensor_height)
+    tensors_parser.add_argument("--width", type=int, default=settings.storage.tensor_width)
+    tensors_parser.add_argument("--resize-mode", choices=["pad", "crop", "stretch"],
+                                default=settings.storage.tensor_resize_mode)
+    tensors_parser.add_argument("--workers", type=int, help="decoder processes")
+
+    layout_parser = commands.add_parser("layout", help="Re-shard existing output directories")
+    layout_parser.add_argument("action", choices=["migrate"])
+    layout_parser.add_argument("--scheme", choices=["flat", "hash", "seed", "date"],
+                               help="target layout (default: storage.layout)")
+    layout_parser.add_argument("--root", type=Path,
+                               help="single directory to migrate (default: every generator directory in output)")
+    layout_parser.add_argument("--dry-run", action="store_true", help="only count files that would move")
+    layout_parser.add_argument("--manifest", type=Path,
+                               help="Adetailer manifest to update (default: data/adetailer_processed/.adetailer_manifest.json)")
+
+    derivatives_parser = commands.add_parser("derivatives", help="Build thumbnails and resized copies of outputs")
+    derivatives_parser.add_argument("action", choices=["build"])
+    derivatives_parser.add_argument("--root", type=Path, help="output tree to process (default: output directory)")
+    derivatives_parser.add_argument("--force", action="store_true", help="rebuild up-to-date derivatives")
+    derivatives_parser.add_argument("--workers", type=int, help="worker processes")
+
+    pipeline_parser = commands.add_parser("pipeline", help="Generate and enhance images as a streaming pipeline")
+    pipeline_parser.add_argument("action", choices=["run"])
+    pipeline_parser.add_argument("--count", type=int, default=5)
+    pipeline_parser.add_argument("--seed", type=int, help="first seed (default: generation.default_seed)")
+    pipeline_parser.add_argument("--prompt", help="custom prompt for the enhanced generator")
+    pipeline_parser.add_argument("--qa", action=argparse.BooleanOptionalAction, default=None,
+                                 help="quality gate before Adetailer (default: qa.enabled)")
+    pipeline_parser.add_argument("--face-params", action="store_true",
+                                 help="submit with Adetailer face parameters")
+    pipeline_parser.add_argument("--generate-workers", type=int, help="concurrent generation requests")
+    pipeline_parser.add_argument("--adetailer-workers", type=int, help="concurrent Adetailer requests")
+
+    characters_parser = commands.add_parser("characters", help="Generate for every character image in the input directory")
+    characters_parser.add_argument("action", choices=["run"])
+    characters_parser.add_argument("--input-dir", type=Path, help="character images (default: data/input)")
+    characters_parser.add_argument("--styles", help="comma-separated styles (default: current style)")
+    characters_parser.add_argument("--count", type=int, default=1, help="seeds per style and character")
+    characters_parser.add_argument("--seed", type=int, help="first seed (default: generation.default_seed)")
+    characters_parser.add_argument("--prompt", help="custom prompt instead of the style prompt")
+    characters_parser.add_argument("--workers", type=int, help="concurrent requests across all characters")
+
+    workers_parser = commands.add_parser("workers", help="Generate a batch on worker processes or serve a shared queue")
+    workers_parser.add_argument("action", choices=["run", "submit", "serve", "status"])
+    workers_parser.add_argument("--queue", type=Path,
+                                help="job database shared by nodes (default: generation.job_queue or output/jobs.sqlite)")
+    workers_parser.add_argument("--batch", help="batch to serve or show (default: all)")
+    workers_parser.add_argument("--wait", action="store_true", help="serve: keep polling for new batches")
+    workers_parser.add_argument("--count", type=int, default=5)
+    workers_parser.add_argument("--seed", type=int, help="first seed (default: generation.default_seed)")
+    workers_parser.add_argument("--style", help="style (default: safe_realistic)")
+    workers_parser.add_argument("--prompt", help="custom prompt instead of the style prompt")
+    workers_parser.add_argument("--processes", type=int, help="worker processes (default: generation.worker_processes)")
+    workers_parser.add_argument("--threads", type=int, help="concurrent requests per process")
+    workers_parser.add_argument("--rate", type=float, help="shared requests per second (default: api.requests_per_second)")
+
+    serve_parser = commands.add_parser("serve", help="Run the local HTTP job service")
+    serve_parser.add_argument("--host", help="bind address (default: service.host)")
+    serve_parser.add_argument("--port", type=int, help="port (default: service.port)")
+
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    cli = CLI()
-    cli.run() 
\ No newline at end of file
+    args = parse_args()
+    if args.command == "catalog":
+        run_catalog_command(args)
+    elif args.command == "tensors":
+        run_tensors_command(args)
+    elif args.command == "layout":
+        run_layout_command(args)
+    elif args.command == "derivatives":
+        run_derivatives_command(args)
+    elif args.command == "pipeline":
+        run_pipeline_command(args)
+    elif args.command == "characters":
+        run_characters_command(args)
+    elif args.command == "workers":
+        run_workers_command(args)
+    elif args.command == "serve":
+        run_serve_command(args)
+    else:
+        cli = CLI()
+        cli.run() 
\ No newline at end of file
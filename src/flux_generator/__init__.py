@@ -6,6 +6,7 @@ A Python package for generating realistic images using BFL.ai FLUX API.
 
 # Core functionality
 from .core.base import BaseGenerator
+from .core.spec import GenerationSpec
 from .core.generator import FluxImageGenerator
 from .core.enhanced import EnhancedFluxGenerator
 from .core.rotation import CharacterRotationGenerator
@@ -33,6 +34,7 @@ __email__ = "elina.klymovska@gmail.com"
 __all__ = [
     # Core classes
     "BaseGenerator",
+    "GenerationSpec",
     "FluxImageGenerator",
     "EnhancedFluxGenerator",
     "CharacterRotationGenerator",
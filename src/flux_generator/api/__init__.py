@@ -7,5 +7,6 @@ This module handles communication with the BFL.ai FLUX API.
 from .base import BaseAPIClient, BaseRequest, BaseResponse, APIError
 from .client import FluxAPIClient
 from .models import GenerationRequest, GenerationResponse
+from .ratelimit import RateLimiter
 
-__all__ = ["BaseAPIClient", "BaseRequest", "BaseResponse", "APIError", "FluxAPIClient", "GenerationRequest", "GenerationResponse"] 
\ No newline at end of file
+__all__ = ["BaseAPIClient", "BaseRequest", "BaseResponse", "APIError", "FluxAPIClient", "GenerationRequest", "GenerationResponse", "RateLimiter"] 
\ No newline at end of file
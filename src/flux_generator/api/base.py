@@ -13,6 +13,9 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 
 from ..config.base import EnvironmentConfig
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class BaseAPIClient(ABC):
@@ -37,6 +40,13 @@ class BaseAPIClient(ABC):
             "x-key": self.api_key,
             "Content-Type": "application/json"
         }
+        
+        # One pooled session per client: concurrent requests reuse keep-alive connections
+        pool_size = max(10, 2 * self.settings.api.max_concurrent_requests)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def _make_request(
         self, 
@@ -50,7 +60,7 @@ class BaseAPIClient(ABC):
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.request(
+                response = self.session.request(
                     method=method,
                     url=url,
                     headers=self.headers,
@@ -65,7 +75,8 @@ class BaseAPIClient(ABC):
                 
                 # Server error (5xx), retry
                 if attempt < self.max_retries - 1:
-                    print(f"⚠️ Server error {response.status_code}, retrying in {self.retry_delay} seconds...")
+                    logger.warning(f"Server error {response.status_code}, retrying in {self.retry_delay} seconds...",
+                                   extra={"event": "request_retry"})
                     time.sleep(self.retry_delay)
                     continue
                 
@@ -73,21 +84,22 @@ class BaseAPIClient(ABC):
                 
             except requests.exceptions.Timeout:
                 if attempt < self.max_retries - 1:
-                    print(f"⚠️ Request timeout, retrying in {self.retry_delay} seconds...")
+                    logger.warning(f"Request timeout, retrying in {self.retry_delay} seconds...", extra={"event": "request_retry"})
                     time.sleep(self.retry_delay)
                     continue
                 raise
                 
             except requests.exceptions.ConnectionError as e:
                 if attempt < self.max_retries - 1:
-                    print(f"⚠️ Connection error: {e}, retrying in {self.retry_delay * 2} seconds...")
+                    logger.warning(f"Connection error: {e}, retrying in {self.retry_delay * 2} seconds...",
+                                   extra={"event": "request_retry"})
                     time.sleep(self.retry_delay * 2)
                     continue
                 raise
                 
             except requests.exceptions.RequestException as e:
                 if attempt < self.max_retries - 1:
-                    print(f"⚠️ Request failed: {e}, retrying in {self.retry_delay} seconds...")
+                    logger.warning(f"Request failed: {e}, retrying in {self.retry_delay} seconds...", extra={"event": "request_retry"})
                     time.sleep(self.retry_delay)
                     continue
                 raise
@@ -10,6 +10,10 @@ from typing import Optional
 from ..config.settings import settings
 from .base import BaseAPIClient, APIError
 from .models import GenerationRequest, GenerationResponse
+from .ratelimit import RateLimiter
+from ..utils.logger import get_logger, log_context
+
+logger = get_logger(__name__)
 
 
 class FluxAPIClient(BaseAPIClient):
@@ -36,12 +40,8 @@ class FluxAPIClient(BaseAPIClient):
         
         while attempt < max_attempts:
             try:
-                # Use session with retry strategy
-                session = requests.Session()
-                session.headers.update(self.headers)
-                
                 # Increase timeout for better stability
-                response = session.get(polling_url, timeout=60)
+                response = self.session.get(polling_url, headers=self.headers, timeout=60)
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -54,13 +54,13 @@ class FluxAPIClient(BaseAPIClient):
                         raise APIError(0, f"Generation failed: {result.get('error', 'Unknown error')}")
                     elif status == 'processing' or status == 'Pending':
                         consecutive_errors = 0  # Reset error counter on success
-                        print(f"🔄 Processing... (attempt {attempt + 1}/{max_attempts})")
+                        logger.info(f"Processing... (attempt {attempt + 1}/{max_attempts})", extra={"event": "poll_processing"})
                         time.sleep(polling_interval)
                     elif status == 'Content Moderated':
                         # Special handling for content moderation
                         if moderation_start_time is None:
                             moderation_start_time = time.time()
-                            print(f"🛡️ Content moderation in progress...")
+                            logger.info("Content moderation in progress...", extra={"event": "poll_moderation"})
                         
                         moderation_attempts += 1
                         consecutive_errors = 0
@@ -75,49 +75,50 @@ class FluxAPIClient(BaseAPIClient):
                         
                         # Use optimized interval for moderation status
                         if moderation_attempts % 10 == 0:  # Show progress every 10 attempts
-                            print(f"🛡️ Still moderating... ({moderation_attempts} checks, {moderation_duration:.1f}s)")
+                            logger.info(f"Still moderating... ({moderation_attempts} checks, {moderation_duration:.1f}s)",
+                                        extra={"event": "poll_moderation"})
                         
                         time.sleep(moderation_interval)
                     else:
                         consecutive_errors = 0  # Reset error counter on success
-                        print(f"ℹ️ Status: {status}")
+                        logger.info(f"Status: {status}", extra={"event": "poll_status"})
                         time.sleep(polling_interval)
                 else:
                     consecutive_errors += 1
-                    print(f"❌ HTTP {response.status_code} error while polling status")
+                    logger.error(f"HTTP {response.status_code} error while polling status", extra={"event": "poll_http_error"})
                     
                     if consecutive_errors >= max_consecutive_errors:
-                        print(f"⚠️ Too many consecutive errors ({consecutive_errors}), increasing delay...")
+                        logger.warning(f"Too many consecutive errors ({consecutive_errors}), increasing delay...")
                         time.sleep(polling_interval * 6)  # Longer delay after many errors
                     else:
                         time.sleep(polling_interval)
                     
             except requests.exceptions.Timeout:
                 consecutive_errors += 1
-                print(f"⚠️ Timeout while polling status (attempt {attempt + 1})")
+                logger.warning(f"Timeout while polling status (attempt {attempt + 1})", extra={"event": "poll_timeout"})
                 
                 if consecutive_errors >= max_consecutive_errors:
-                    print(f"⚠️ Too many consecutive timeouts, increasing delay...")
+                    logger.warning("Too many consecutive timeouts, increasing delay...")
                     time.sleep(polling_interval * 6)
                 else:
                     time.sleep(polling_interval)
                     
             except requests.exceptions.ConnectionError as e:
                 consecutive_errors += 1
-                print(f"❌ Connection error while polling: {e}")
+                logger.error(f"Connection error while polling: {e}", extra={"event": "poll_connection_error"})
                 
                 if consecutive_errors >= max_consecutive_errors:
-                    print(f"⚠️ Too many consecutive connection errors, waiting longer...")
+                    logger.warning("Too many consecutive connection errors, waiting longer...")
                     time.sleep(polling_interval * 12)  # Much longer delay for connection issues
                 else:
                     time.sleep(polling_interval * 2)
                     
             except requests.exceptions.RequestException as e:
                 consecutive_errors += 1
-                print(f"❌ Network error while polling: {e}")
+                logger.error(f"Network error while polling: {e}", extra={"event": "poll_network_error"})
                 
                 if consecutive_errors >= max_consecutive_errors:
-                    print(f"⚠️ Too many consecutive network errors, waiting longer...")
+                    logger.warning("Too many consecutive network errors, waiting longer...")
                     time.sleep(polling_interval * 6)
                 else:
                     time.sleep(polling_interval * 2)
@@ -126,7 +127,7 @@ class FluxAPIClient(BaseAPIClient):
             
             # If we've had too many consecutive errors, break early
             if consecutive_errors >= max_consecutive_errors * 2:
-                print(f"❌ Too many consecutive errors ({consecutive_errors}), giving up")
+                logger.error(f"Too many consecutive errors ({consecutive_errors}), giving up")
                 break
         
         raise APIError(0, f"Generation timeout exceeded after {attempt} attempts")
@@ -134,23 +135,32 @@ class FluxAPIClient(BaseAPIClient):
     def download_image(self, image_url: str) -> Optional[bytes]:
         """Download image from URL."""
         try:
-            response = requests.get(image_url, timeout=30)
+            response = self.session.get(image_url, timeout=30)
             
             if response.status_code == 200:
                 return response.content
             else:
-                print(f"❌ Failed to download image: HTTP {response.status_code}")
+                logger.error(f"Failed to download image: HTTP {response.status_code}")
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Download error: {e}")
+            logger.error(f"Download error: {e}")
             return None
     
     def generate_image(self, request: GenerationRequest) -> GenerationResponse:
-        """Generate image using FLUX API."""
+        """Generate image using FLUX API, within the process-wide (or pool-wide) rate limit."""
+        limiter = RateLimiter.default()
+        if limiter.unlimited:
+            return self._generate_image(request)
+        with limiter.slot():
+            limiter.acquire()
+            return self._generate_image(request)
+    
+    def _generate_image(self, request: GenerationRequest) -> GenerationResponse:
+        """Submit a generation request, poll until it finishes and download the image."""
         try:
             # Submit generation request
-            print(f"🚀 Submitting generation request...")
+            logger.debug("Submitting generation request...")
             response = self._make_request(
                 "POST",
                 "/flux-kontext-pro",
@@ -167,8 +177,9 @@ class FluxAPIClient(BaseAPIClient):
                         return GenerationResponse.error_response("No polling URL in response")
                     
                     # Poll for completion
-                    print("🔄 Waiting for generation to complete...")
-                    final_result = self.poll_generation_status(polling_url)
+                    logger.debug("Waiting for generation to complete...")
+                    with log_context(request_id=result.get('id')):
+                        final_result = self.poll_generation_status(polling_url)
                     
                     # Extract image URL from result
                     result_data = final_result.get('result', {})
@@ -178,11 +189,11 @@ class FluxAPIClient(BaseAPIClient):
                         return GenerationResponse.error_response("No image URL in result")
                     
                     # Download image
-                    print("📥 Downloading generated image...")
+                    logger.debug("Downloading generated image...")
                     image_data = self.download_image(image_url)
                     
                     if image_data:
-                        print("✅ Image generated successfully!")
+                        logger.debug("Image generated successfully")
                         return GenerationResponse.success_response(
                             image_data=image_data,
                             request_id=final_result.get('id')
@@ -195,18 +206,17 @@ class FluxAPIClient(BaseAPIClient):
                     
             else:
                 error_msg = f"API returned status {response.status_code}"
-                print(f"🔍 Response Status: {response.status_code}")
-                print(f"🔍 Response Headers: {dict(response.headers)}")
-                print(f"🔍 Response Text: {response.text[:500]}...")
+                logger.error(f"API returned status {response.status_code}: {response.text[:500]}",
+                             extra={"event": "api_error_response"})
+                logger.debug(f"Response headers: {dict(response.headers)}")
                 
                 try:
                     error_data = response.json()
                     error_msg = error_data.get("error", error_msg)
                     # Log detailed error information
-                    print(f"🔍 API Error Details: {json.dumps(error_data, indent=2)}")
+                    logger.debug(f"API error details: {json.dumps(error_data)}")
                 except Exception as e:
-                    print(f"🔍 Could not parse JSON response: {e}")
-                    print(f"🔍 Raw response: {response.text}")
+                    logger.debug(f"Could not parse JSON response ({e}): {response.text}")
                 
                 if response.status_code == 403:
                     raise APIError(403, "Access denied. Check API key.")
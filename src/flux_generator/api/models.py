@@ -20,6 +20,11 @@ class GenerationRequest(BaseRequest):
     output_format: str = "jpeg"
     prompt_upsampling: bool = False
     safety_tolerance: int = 2
+    adetailer: Optional[Dict[str, Any]] = None  # Adetailer face enhancement parameters
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for API request, omitting unset optional fields."""
+        return {k: v for k, v in super().to_dict().items() if v is not None}
     
     @classmethod
     def from_image_file(cls, prompt: str, image_path: Path, **kwargs) -> "GenerationRequest":
@@ -0,0 +1,106 @@
+"""
+Shared API rate limiting for FLUX Image Generator.
+
+A token bucket (requests per second with a burst allowance) plus an
+optional cap on generations in flight. State lives in multiprocessing
+shared memory guarded by a multiprocessing lock, so one limiter passed
+to worker processes at start-up gives them a single common budget;
+within one process it works the same across threads.
+"""
+
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Iterator
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RateLimiter:
+    """Token-bucket submission limit and in-flight cap, shareable across processes."""
+
+    _default: Optional["RateLimiter"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        requests_per_second: float = 0.0,
+        burst: int = 1,
+        max_in_flight: int = 0,
+        context=None
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            requests_per_second: Sustained submission rate (0: unlimited)
+            burst: Submissions allowed back to back
+            max_in_flight: Generations running at once (0: unlimited)
+            context: multiprocessing context the worker processes are started with
+        """
+        context = context or multiprocessing.get_context()
+        self.requests_per_second = max(0.0, requests_per_second)
+        self.burst = max(1, burst)
+        self.max_in_flight = max(0, max_in_flight)
+        self._lock = context.Lock()
+        self._tokens = context.RawValue("d", float(self.burst))
+        self._updated = context.RawValue("d", time.monotonic())
+        self._slots = context.BoundedSemaphore(self.max_in_flight) if self.max_in_flight else None
+
+    @classmethod
+    def default(cls) -> "RateLimiter":
+        """Process-wide limiter: the one installed by a worker pool, or one built from settings."""
+        with cls._default_lock:
+            if cls._default is None:
+                from ..config.settings import settings
+                cls._default = cls(
+                    settings.api.requests_per_second,
+                    settings.api.rate_limit_burst,
+                    settings.api.max_in_flight
+                )
+            return cls._default
+
+    @classmethod
+    def set_default(cls, limiter: "RateLimiter") -> None:
+        """Install a limiter shared with other processes as this process's default."""
+        with cls._default_lock:
+            cls._default = limiter
+
+    @property
+    def unlimited(self) -> bool:
+        return self.requests_per_second <= 0 and self._slots is None
+
+    def acquire(self) -> float:
+        """Take one submission token, sleeping until one is available; returns seconds waited."""
+        if self.requests_per_second <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens = min(self.burst, self._tokens.value + (now - self._updated.value) * self.requests_per_second)
+                self._updated.value = now
+                if tokens >= 1:
+                    self._tokens.value = tokens - 1
+                    if waited:
+                        logger.debug(f"Rate limit: waited {waited:.2f}s")
+                    return waited
+                self._tokens.value = tokens
+                delay = (1 - tokens) / self.requests_per_second
+            time.sleep(delay)
+            waited += delay
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the shared in-flight slots for the duration of a generation."""
+        if self._slots is None:
+            yield
+            return
+        self._slots.acquire()
+        try:
+            yield
+        finally:
+            self._slots.release()
@@ -89,6 +89,11 @@ class EnvironmentConfig:
     def get_max_retries() -> int:
         """Get max retries from environment."""
         return int(os.getenv("FLUX_MAX_RETRIES", "5"))
+    
+    @staticmethod
+    def get_hash_algorithm() -> str:
+        """Get content hash algorithm from environment (blake2b, md5, xxh3_128, ...)."""
+        return os.getenv("FLUX_HASH_ALGORITHM", "blake2b").lower()
 
 
 class PathConfig:
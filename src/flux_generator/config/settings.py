@@ -3,7 +3,7 @@ Settings and configuration management for FLUX Image Generator.
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List
 from dataclasses import dataclass, field
 
 from .base import BaseConfig, EnvironmentConfig, PathConfig
@@ -18,6 +18,10 @@ class APISettings:
     retry_delay: int = 10
     polling_interval: int = 5  # seconds
     polling_timeout_attempts: int = 180  # 180 * 5s = 15 minutes
+    max_concurrent_requests: int = 4  # in-flight generation requests per process
+    requests_per_second: float = 0.0  # submission budget shared by all worker processes (0: unlimited)
+    rate_limit_burst: int = 4  # submissions allowed back to back before the rate applies
+    max_in_flight: int = 0  # generations in flight across all worker processes (0: unlimited)
 
 
 @dataclass
@@ -29,6 +33,71 @@ class GenerationSettings:
     default_output_format: str = "jpeg"
     default_quality: str = "high"
     default_style: str = "realistic"
+    worker_processes: int = 0  # processes of the multi-process worker pool (0: CPU count)
+    job_queue: str = ""  # job database shared by worker nodes (empty: output/jobs.sqlite)
+    job_lease_seconds: float = 120.0  # a claimed job returns to the queue if not renewed in time
+    job_heartbeat_interval: float = 30.0  # seconds between lease renewals of running jobs
+    job_max_attempts: int = 3  # claims per job before it is marked failed
+
+
+@dataclass
+class StorageSettings:
+    """Output storage settings."""
+    async_writes: bool = False  # write outputs on a background writer pool
+    writer_workers: int = 2
+    writer_queue_size: int = 64  # submitters block when the queue is full
+    fsync: bool = True  # fsync temp file and directory before/after rename
+    fsync_batch_size: int = 1  # files written per fsync round (>1 trades latency for throughput)
+    content_addressed: bool = False  # store images once under output/.objects and link outputs
+    link_mode: str = "hardlink"  # hardlink or symlink
+    shard_export: bool = False  # also pack generated images into tar shards under output/shards
+    shard_max_bytes: int = 1024 * 1024 * 1024
+    shard_max_samples: int = 10000
+    catalog: bool = True  # record every output in output/catalog.sqlite
+    tensor_export: bool = False  # append outputs to the pixel tensor export under output/tensors
+    tensor_height: int = 256
+    tensor_width: int = 256
+    tensor_resize_mode: str = "pad"  # pad, crop or stretch
+    layout: str = "flat"  # flat, hash, seed or date subdirectories inside each output directory
+    layout_depth: int = 2  # hash-prefix directory levels
+    layout_bucket_size: int = 1000  # seeds per seed bucket
+    derivatives: bool = False  # build thumbnails/resized copies under output/derivatives on a process pool
+    derivative_workers: int = 2
+    derivative_queue_size: int = 16  # images in flight; later ones are deferred, never blocking generation
+    derivative_format: str = "WEBP"
+    derivative_thumbnail_size: int = 256
+    derivative_sizes: List[int] = field(default_factory=lambda: [1024])
+    derivative_recompress: bool = True  # also keep a losslessly optimized full-size copy
+    derivative_metadata: str = "strip"  # strip, keep or embed
+
+
+@dataclass
+class QASettings:
+    """Image quality gate settings (see processing.quality)."""
+    enabled: bool = False  # gate process_directory_images on quality metrics
+    min_sharpness: float = 30.0
+    min_contrast: float = 4.0
+    min_brightness: float = 20.0
+    max_brightness: float = 235.0
+    max_overexposed: float = 0.35
+    max_underexposed: float = 0.4
+    min_colorfulness: float = 0.0
+    face_filter: bool = False  # check for a visible face locally before Adetailer submission
+    face_routing: str = "skip"  # skip images without a face, or process them "standard"
+    consistency_check: bool = False  # score rotation sequences against the input image
+    min_consistency: float = 0.6  # angles scoring below are regenerated with new seeds
+    consistency_retries: int = 2  # regeneration attempts per angle
+    embedding_model: str = ""  # optional ONNX image-embedding model for consistency scoring
+
+
+@dataclass
+class ServiceSettings:
+    """Local HTTP service settings (see service.server)."""
+    host: str = "127.0.0.1"  # bind address; the API has no authentication
+    port: int = 8765
+    workers: int = 0  # images generated at once for all clients (0: api.max_concurrent_requests)
+    max_images_per_job: int = 500
+    max_finished_jobs: int = 1000  # finished jobs kept for status queries
 
 
 class Settings(BaseConfig):
@@ -46,6 +115,9 @@ class Settings(BaseConfig):
         self.paths = PathConfig()
         self.api = APISettings()
         self.generation = GenerationSettings()
+        self.storage = StorageSettings()
+        self.qa = QASettings()
+        self.service = ServiceSettings()
         self.api_key = EnvironmentConfig.get_api_key()
         
         # Load from config file
@@ -68,6 +140,10 @@ class Settings(BaseConfig):
             self.api.retry_delay = api_data.get('retry_delay', self.api.retry_delay)
             self.api.polling_interval = api_data.get('polling_interval', self.api.polling_interval)
             self.api.polling_timeout_attempts = api_data.get('polling_timeout_attempts', self.api.polling_timeout_attempts)
+            self.api.max_concurrent_requests = api_data.get('max_concurrent_requests', self.api.max_concurrent_requests)
+            self.api.requests_per_second = api_data.get('requests_per_second', self.api.requests_per_second)
+            self.api.rate_limit_burst = api_data.get('rate_limit_burst', self.api.rate_limit_burst)
+            self.api.max_in_flight = api_data.get('max_in_flight', self.api.max_in_flight)
         
         # Update generation settings
         if 'generation' in self._config_data:
@@ -78,6 +154,68 @@ class Settings(BaseConfig):
             self.generation.default_output_format = gen_data.get('default_output_format', self.generation.default_output_format)
             self.generation.default_quality = gen_data.get('default_quality', self.generation.default_quality)
             self.generation.default_style = gen_data.get('default_style', self.generation.default_style)
+            self.generation.worker_processes = gen_data.get('worker_processes', self.generation.worker_processes)
+            self.generation.job_queue = gen_data.get('job_queue', self.generation.job_queue)
+            self.generation.job_lease_seconds = gen_data.get('job_lease_seconds', self.generation.job_lease_seconds)
+            self.generation.job_heartbeat_interval = gen_data.get('job_heartbeat_interval', self.generation.job_heartbeat_interval)
+            self.generation.job_max_attempts = gen_data.get('job_max_attempts', self.generation.job_max_attempts)
+        
+        # Update storage settings
+        if 'storage' in self._config_data:
+            storage_data = self._config_data['storage']
+            self.storage.async_writes = storage_data.get('async_writes', self.storage.async_writes)
+            self.storage.writer_workers = storage_data.get('writer_workers', self.storage.writer_workers)
+            self.storage.writer_queue_size = storage_data.get('writer_queue_size', self.storage.writer_queue_size)
+            self.storage.fsync = storage_data.get('fsync', self.storage.fsync)
+            self.storage.fsync_batch_size = storage_data.get('fsync_batch_size', self.storage.fsync_batch_size)
+            self.storage.content_addressed = storage_data.get('content_addressed', self.storage.content_addressed)
+            self.storage.link_mode = storage_data.get('link_mode', self.storage.link_mode)
+            self.storage.shard_export = storage_data.get('shard_export', self.storage.shard_export)
+            self.storage.shard_max_bytes = storage_data.get('shard_max_bytes', self.storage.shard_max_bytes)
+            self.storage.shard_max_samples = storage_data.get('shard_max_samples', self.storage.shard_max_samples)
+            self.storage.catalog = storage_data.get('catalog', self.storage.catalog)
+            self.storage.tensor_export = storage_data.get('tensor_export', self.storage.tensor_export)
+            self.storage.tensor_height = storage_data.get('tensor_height', self.storage.tensor_height)
+            self.storage.tensor_width = storage_data.get('tensor_width', self.storage.tensor_width)
+            self.storage.tensor_resize_mode = storage_data.get('tensor_resize_mode', self.storage.tensor_resize_mode)
+            self.storage.layout = storage_data.get('layout', self.storage.layout)
+            self.storage.layout_depth = storage_data.get('layout_depth', self.storage.layout_depth)
+            self.storage.layout_bucket_size = storage_data.get('layout_bucket_size', self.storage.layout_bucket_size)
+            self.storage.derivatives = storage_data.get('derivatives', self.storage.derivatives)
+            self.storage.derivative_workers = storage_data.get('derivative_workers', self.storage.derivative_workers)
+            self.storage.derivative_queue_size = storage_data.get('derivative_queue_size', self.storage.derivative_queue_size)
+            self.storage.derivative_format = storage_data.get('derivative_format', self.storage.derivative_format)
+            self.storage.derivative_thumbnail_size = storage_data.get('derivative_thumbnail_size', self.storage.derivative_thumbnail_size)
+            self.storage.derivative_sizes = storage_data.get('derivative_sizes', self.storage.derivative_sizes)
+            self.storage.derivative_recompress = storage_data.get('derivative_recompress', self.storage.derivative_recompress)
+            self.storage.derivative_metadata = storage_data.get('derivative_metadata', self.storage.derivative_metadata)
+        
+        # Update quality gate settings
+        if 'qa' in self._config_data:
+            qa_data = self._config_data['qa']
+            self.qa.enabled = qa_data.get('enabled', self.qa.enabled)
+            self.qa.min_sharpness = qa_data.get('min_sharpness', self.qa.min_sharpness)
+            self.qa.min_contrast = qa_data.get('min_contrast', self.qa.min_contrast)
+            self.qa.min_brightness = qa_data.get('min_brightness', self.qa.min_brightness)
+            self.qa.max_brightness = qa_data.get('max_brightness', self.qa.max_brightness)
+            self.qa.max_overexposed = qa_data.get('max_overexposed', self.qa.max_overexposed)
+            self.qa.max_underexposed = qa_data.get('max_underexposed', self.qa.max_underexposed)
+            self.qa.min_colorfulness = qa_data.get('min_colorfulness', self.qa.min_colorfulness)
+            self.qa.face_filter = qa_data.get('face_filter', self.qa.face_filter)
+            self.qa.face_routing = qa_data.get('face_routing', self.qa.face_routing)
+            self.qa.consistency_check = qa_data.get('consistency_check', self.qa.consistency_check)
+            self.qa.min_consistency = qa_data.get('min_consistency', self.qa.min_consistency)
+            self.qa.consistency_retries = qa_data.get('consistency_retries', self.qa.consistency_retries)
+            self.qa.embedding_model = qa_data.get('embedding_model', self.qa.embedding_model)
+        
+        # Update service settings
+        if 'service' in self._config_data:
+            service_data = self._config_data['service']
+            self.service.host = service_data.get('host', self.service.host)
+            self.service.port = service_data.get('port', self.service.port)
+            self.service.workers = service_data.get('workers', self.service.workers)
+            self.service.max_images_per_job = service_data.get('max_images_per_job', self.service.max_images_per_job)
+            self.service.max_finished_jobs = service_data.get('max_finished_jobs', self.service.max_finished_jobs)
     
     def validate(self) -> bool:
         """Validate settings."""
@@ -99,6 +237,10 @@ class Settings(BaseConfig):
                 'retry_delay': self.api.retry_delay,
                 'polling_interval': self.api.polling_interval,
                 'polling_timeout_attempts': self.api.polling_timeout_attempts,
+                'max_concurrent_requests': self.api.max_concurrent_requests,
+                'requests_per_second': self.api.requests_per_second,
+                'rate_limit_burst': self.api.rate_limit_burst,
+                'max_in_flight': self.api.max_in_flight,
             },
             'generation': {
                 'default_count': self.generation.default_count,
@@ -107,6 +249,62 @@ class Settings(BaseConfig):
                 'default_output_format': self.generation.default_output_format,
                 'default_quality': self.generation.default_quality,
                 'default_style': self.generation.default_style,
+                'worker_processes': self.generation.worker_processes,
+                'job_queue': self.generation.job_queue,
+                'job_lease_seconds': self.generation.job_lease_seconds,
+                'job_heartbeat_interval': self.generation.job_heartbeat_interval,
+                'job_max_attempts': self.generation.job_max_attempts,
+            },
+            'storage': {
+                'async_writes': self.storage.async_writes,
+                'writer_workers': self.storage.writer_workers,
+                'writer_queue_size': self.storage.writer_queue_size,
+                'fsync': self.storage.fsync,
+                'fsync_batch_size': self.storage.fsync_batch_size,
+                'content_addressed': self.storage.content_addressed,
+                'link_mode': self.storage.link_mode,
+                'shard_export': self.storage.shard_export,
+                'shard_max_bytes': self.storage.shard_max_bytes,
+                'shard_max_samples': self.storage.shard_max_samples,
+                'catalog': self.storage.catalog,
+                'tensor_export': self.storage.tensor_export,
+                'tensor_height': self.storage.tensor_height,
+                'tensor_width': self.storage.tensor_width,
+                'tensor_resize_mode': self.storage.tensor_resize_mode,
+                'layout': self.storage.layout,
+                'layout_depth': self.storage.layout_depth,
+                'layout_bucket_size': self.storage.layout_bucket_size,
+                'derivatives': self.storage.derivatives,
+                'derivative_workers': self.storage.derivative_workers,
+                'derivative_queue_size': self.storage.derivative_queue_size,
+                'derivative_format': self.storage.derivative_format,
+                'derivative_thumbnail_size': self.storage.derivative_thumbnail_size,
+                'derivative_sizes': self.storage.derivative_sizes,
+                'derivative_recompress': self.storage.derivative_recompress,
+                'derivative_metadata': self.storage.derivative_metadata,
+            },
+            'qa': {
+                'enabled': self.qa.enabled,
+                'min_sharpness': self.qa.min_sharpness,
+                'min_contrast': self.qa.min_contrast,
+                'min_brightness': self.qa.min_brightness,
+                'max_brightness': self.qa.max_brightness,
+                'max_overexposed': self.qa.max_overexposed,
+                'max_underexposed': self.qa.max_underexposed,
+                'min_colorfulness': self.qa.min_colorfulness,
+                'face_filter': self.qa.face_filter,
+                'face_routing': self.qa.face_routing,
+                'consistency_check': self.qa.consistency_check,
+                'min_consistency': self.qa.min_consistency,
+                'consistency_retries': self.qa.consistency_retries,
+                'embedding_model': self.qa.embedding_model,
+            },
+            'service': {
+                'host': self.service.host,
+                'port': self.service.port,
+                'workers': self.service.workers,
+                'max_images_per_job': self.service.max_images_per_job,
+                'max_finished_jobs': self.service.max_finished_jobs,
             }
         }
     
@@ -5,15 +5,33 @@ This module contains the main generator classes and logic.
 """
 
 from .base import BaseGenerator
+from .spec import GenerationSpec
+from .record import GenerationRecord
 from .generator import FluxImageGenerator
 from .enhanced import EnhancedFluxGenerator
 from .rotation import CharacterRotationGenerator
 from .adetailer import AdetailerGenerator
+from .scheduler import DagScheduler, DagJob
+from .pipeline import GenerationPipeline, Pipeline, PipelineItem, Stage
+from .characters import MultiCharacterGenerator, Character, discover_characters
+from .workers import WorkerPool
 
 __all__ = [
     "BaseGenerator",
+    "GenerationSpec",
+    "GenerationRecord",
     "FluxImageGenerator", 
     "EnhancedFluxGenerator",
     "CharacterRotationGenerator",
-    "AdetailerGenerator"
+    "AdetailerGenerator",
+    "DagScheduler",
+    "DagJob",
+    "GenerationPipeline",
+    "Pipeline",
+    "PipelineItem",
+    "Stage",
+    "MultiCharacterGenerator",
+    "Character",
+    "discover_characters",
+    "WorkerPool"
 ] 
\ No newline at end of file
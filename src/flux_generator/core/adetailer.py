@@ -4,76 +4,172 @@ Adetailer Integration for FLUX Image Generator.
 This module provides enhanced face detail generation using Adetailer.
 """
 
+import os
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Deque
 import base64
-import glob
+from dataclasses import dataclass, fields, replace, asdict
 
 from .base import BaseGenerator
 from ..api.models import GenerationRequest
 from ..utils.logger import get_logger
 from ..utils.image import ImageUtils
+from ..utils.base import ImageProcessor
+from ..utils.progress import ProgressTracker
+from ..utils.manifest import ProcessingManifest
+from ..utils.watcher import DirectoryWatcher
+from ..utils.indexer import DirectoryIndexer, IMAGE_EXTENSIONS
+from ..processing.dedupe import NearDuplicateFinder
+from ..processing.quality import QualityAnalyzer, QualityThresholds
+from ..processing.faces import FacePresenceFilter, FaceCheckReport
+from ..storage.catalog import Catalog
+from ..storage.layout import DERIVED_OUTPUT_DIRS
 
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True)
 class AdetailerSettings:
     """Settings for Adetailer processing."""
+    enabled: bool = True
+    model: str = "face_yolov8n.pt"  # Face detection model
+    confidence: float = 0.3  # Detection confidence
+    dilation: int = 4  # Dilation factor
+    denoising_strength: float = 0.4  # Denoising strength
+    prompt: str = "beautiful face, detailed eyes, perfect skin, high quality"
+    negative_prompt: str = "blurry, low quality, distorted, deformed"
+    steps: int = 20  # Number of steps
+    cfg_scale: float = 7.0  # CFG scale
+    sampler: str = "DPM++ 2M Karras"  # Sampler
+    width: int = 512  # Width for face processing
+    height: int = 512  # Height for face processing
     
-    def __init__(self):
-        self.enabled = True
-        self.model = "face_yolov8n.pt"  # Face detection model
-        self.confidence = 0.3  # Detection confidence
-        self.dilation = 4  # Dilation factor
-        self.denoising_strength = 0.4  # Denoising strength
-        self.prompt = "beautiful face, detailed eyes, perfect skin, high quality"
-        self.negative_prompt = "blurry, low quality, distorted, deformed"
-        self.steps = 20  # Number of steps
-        self.cfg_scale = 7.0  # CFG scale
-        self.sampler = "DPM++ 2M Karras"  # Sampler
-        self.width = 512  # Width for face processing
-        self.height = 512  # Height for face processing
+    def with_overrides(self, overrides: Optional[Dict[str, Any]] = None) -> "AdetailerSettings":
+        """Return a copy with known fields replaced; unknown keys are ignored."""
+        if not overrides:
+            return self
+        field_names = {f.name for f in fields(self)}
+        known = {key: value for key, value in overrides.items() if key in field_names}
+        return replace(self, **known)
+    
+    def to_params(self) -> Dict[str, Any]:
+        """Convert settings to Adetailer API parameters."""
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """Image read, measured and encoded ahead of API submission."""
+    path: Path
+    image_data: str  # Base64 data URL
+    width: int
+    height: int
+    
+    @property
+    def aspect_ratio(self) -> str:
+        """Aspect ratio string derived from image dimensions."""
+        return f"{self.width}:{self.height}"
 
 
 class AdetailerGenerator(BaseGenerator):
     """Enhanced FLUX Image Generator with Adetailer integration."""
     
+    MANIFEST_FILENAME = ".adetailer_manifest.json"
+    
     def __init__(self, output_subdir: str = "adetailer", api_key: Optional[str] = None):
         """Initialize Adetailer generator."""
         super().__init__(output_subdir=output_subdir, api_key=api_key)
         self.adetailer_settings = AdetailerSettings()
+        self._indexers: Dict[tuple, DirectoryIndexer] = {}
+        self.last_face_report: Optional[FaceCheckReport] = None
         
         logger.info(f"Adetailer generator initialized with settings: {self.adetailer_settings.model}")
 
+    @staticmethod
+    def _prepare_image(image_path: Path) -> PreparedImage:
+        """Read an image once, measure it and encode it for submission."""
+        if not image_path.exists():
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+        
+        return AdetailerGenerator._prepare_image_data(image_path, image_path.read_bytes())
+    
+    @staticmethod
+    def _prepare_image_data(image_path: Path, image_bytes: bytes) -> PreparedImage:
+        """Measure and encode image bytes already in memory (image_path names the source)."""
+        width, height = ImageProcessor.get_image_dimensions_from_bytes(image_bytes)
+        mime_type = ImageProcessor._get_mime_type(image_path)
+        
+        return PreparedImage(
+            path=image_path,
+            image_data=ImageProcessor.encode_bytes_to_base64(image_bytes, mime_type),
+            width=width,
+            height=height
+        )
+    
     def _prepare_request_data_from_file(self, image_path: Path) -> Dict[str, Any]:
         """Prepares common request data from an image file."""
-        image_info = ImageUtils.get_image_info(image_path)
+        prepared = self._prepare_image(image_path)
         return {
-            "image_data": ImageUtils.encode_image_to_base64(image_path),
-            "aspect_ratio": f"{image_info['width']}:{image_info['height']}"
+            "image_data": prepared.image_data,
+            "aspect_ratio": prepared.aspect_ratio
         }
 
     def process_directory_images(
         self, 
         input_dir: Optional[Path] = None,
         output_dir: Optional[Path] = None,
-        file_pattern: str = "*.jpg",
+        file_pattern: Optional[str] = None,
         adetailer_config: Optional[Dict[str, Any]] = None,
-        output_suffix: str = "_adetailer"
+        output_suffix: str = "_adetailer",
+        max_workers: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        incremental: bool = False,
+        manifest_path: Optional[Path] = None,
+        skip_near_duplicates: bool = False,
+        duplicate_radius: int = 6,
+        recursive: bool = False,
+        modified_after: Optional[float] = None,
+        quality_gate: Optional[bool] = None,
+        quality_thresholds: Optional[QualityThresholds] = None,
+        face_filter: Optional[bool] = None,
+        face_routing: Optional[str] = None
     ) -> List[Path]:
         """
         Process all images in the specified directory with Adetailer enhancement.
         
+        Images are read, measured and base64-encoded on a prefetch pool while
+        earlier images are in flight, and up to ``max_workers`` API requests
+        run concurrently. Files that are themselves Adetailer outputs
+        (``output_suffix``) are never picked up as inputs.
+        
         Args:
             input_dir: Directory with images to process (default: data/output)
             output_dir: Directory to save processed images (default: data/adetailer_processed)
-            file_pattern: File pattern to match (default: "*.jpg")
+            file_pattern: File pattern to match (default: all .jpg/.jpeg/.png/.webp images)
             adetailer_config: Custom Adetailer settings
             output_suffix: Suffix for processed files
+            max_workers: Concurrent API requests (default: settings.api.max_concurrent_requests)
+            prefetch: Number of images prepared ahead of submission (default: 2 * max_workers)
+            progress_callback: Called with a progress snapshot after each image
+            incremental: Skip files already processed with the same settings
+            manifest_path: Manifest file for incremental mode (default: output_dir/.adetailer_manifest.json)
+            skip_near_duplicates: Process only one image of each perceptually near-identical group
+            duplicate_radius: Maximum dHash Hamming distance treated as a near-duplicate
+            recursive: Include subdirectories (always on for sharded output layouts)
+            modified_after: Only images modified at or after this time (epoch seconds)
+            quality_gate: Skip blurry, badly exposed or blank images (default: settings.qa.enabled)
+            quality_thresholds: Gate thresholds (default: from settings.qa)
+            face_filter: Check locally for a visible face before submitting (default: settings.qa.face_filter)
+            face_routing: "skip" images without a face, or process them "standard" (without
+                Adetailer face parameters) (default: settings.qa.face_routing)
             
         Returns:
-            List of paths to processed images
+            List of paths to processed images, in input order
         """
         # Use output directory if not specified
         if input_dir is None:
@@ -86,49 +182,329 @@ class AdetailerGenerator(BaseGenerator):
         # Create output directory if it doesn't exist
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Update Adetailer settings if provided
-        if adetailer_config:
-            for key, value in adetailer_config.items():
-                if hasattr(self.adetailer_settings, key):
-                    setattr(self.adetailer_settings, key, value)
+        # Per-call settings; the generator defaults are left untouched
+        adetailer_settings = self.adetailer_settings.with_overrides(adetailer_config)
+        use_adetailer = adetailer_config is not None
         
-        # Find all images in the directory
-        image_pattern = str(input_dir / file_pattern)
-        image_files = glob.glob(image_pattern)
+        # Find all images in the directory (including layout subdirectories when sharded)
+        indexer = self._get_indexer(input_dir, file_pattern, recursive or self.output_layout.scheme != "flat")
+        image_files = [
+            path for path in indexer.paths(min_mtime=modified_after)
+            if not path.stem.endswith(output_suffix)
+        ]
         
         if not image_files:
-            logger.warning(f"No images found in {input_dir} with pattern {file_pattern}")
+            logger.warning(f"No images found in {input_dir} with pattern {file_pattern or list(IMAGE_EXTENSIONS)}")
             return []
         
+        face_filter = face_filter if face_filter is not None else self.settings.qa.face_filter
+        routing = face_filter and use_adetailer and (face_routing or self.settings.qa.face_routing) == "standard"
+        manifest = None
+        settings_key = self._settings_key(use_adetailer, adetailer_settings, output_suffix)
+        # Images without a face are recorded under their own key, so they count as done on the next routed run
+        routed_key = self._settings_key(False, adetailer_settings, output_suffix, routed=True)
+        if incremental:
+            manifest = ProcessingManifest(manifest_path or output_dir / self.MANIFEST_FILENAME)
+            found = len(image_files)
+            image_files = [
+                path for path in image_files
+                if not manifest.is_output(path) and manifest.needs_processing(path, settings_key)
+                and not (routing and not manifest.needs_processing(path, routed_key))
+            ]
+            logger.info(f"Incremental mode: {found - len(image_files)} of {found} images already processed")
+            if not image_files:
+                manifest.save()
+                return []
+        
+        # Files already processed are dropped before any local analysis decodes them
+        if quality_gate if quality_gate is not None else self.settings.qa.enabled:
+            image_files = self._apply_quality_gate(image_files, quality_thresholds)
+            if not image_files:
+                logger.warning("No images passed the quality gate")
+                if manifest is not None:
+                    manifest.save()
+                return []
+        
+        if skip_near_duplicates:
+            image_files, duplicates = NearDuplicateFinder(radius=duplicate_radius).filter_unique(image_files)
+            logger.info(f"Skipping {len(duplicates)} near-duplicate images")
+        
+        routed: List[Path] = []
+        if face_filter:
+            submitted = image_files
+            report = FacePresenceFilter().check(image_files)
+            self.last_face_report = report
+            image_files = report.with_face
+            if routing:
+                routed = report.without_face
+                report.routed = len(routed)
+            logger.info(f"Face pre-filter: {report.summary()}")
+            if not image_files and not routed:
+                if manifest is not None:
+                    manifest.save()
+                return []
+        
         logger.info(f"Found {len(image_files)} images to process with Adetailer")
         logger.info(f"Output directory: {output_dir}")
-        logger.info(f"Using Adetailer parameters: {adetailer_config is not None}")
+        logger.info(f"Using Adetailer parameters: {use_adetailer}")
         
-        processed_images = []
+        # One tracker for both groups so progress totals do not restart for the routed images
+        progress = ProgressTracker(len(image_files) + len(routed), label="Adetailer", callback=progress_callback)
+        results = self._run_pipeline(
+            image_files,
+            output_dir,
+            output_suffix,
+            use_adetailer,
+            adetailer_settings,
+            max_workers=max_workers,
+            prefetch=prefetch,
+            progress=progress,
+            manifest=manifest,
+            settings_key=settings_key
+        )
+        if routed:
+            logger.info(f"Processing {len(routed)} images without a face using standard parameters")
+            routed_results = self._run_pipeline(
+                routed,
+                output_dir,
+                output_suffix,
+                False,
+                adetailer_settings,
+                max_workers=max_workers,
+                prefetch=prefetch,
+                progress=progress,
+                manifest=manifest,
+                settings_key=routed_key
+            )
+            by_source = dict(zip(image_files + routed, results + routed_results))
+            results = [by_source[path] for path in submitted]
+        if manifest is not None:
+            manifest.save()
         
-        for i, image_path in enumerate(image_files, 1):
-            image_path = Path(image_path)
-            logger.info(f"Processing image {i}/{len(image_files)}: {image_path.name}")
-            
+        return [path for path in results if path]
+    
+    def watch_directory(
+        self,
+        input_dir: Optional[Path] = None,
+        output_dir: Optional[Path] = None,
+        file_pattern: Optional[str] = None,
+        adetailer_config: Optional[Dict[str, Any]] = None,
+        output_suffix: str = "_adetailer",
+        max_workers: Optional[int] = None,
+        manifest_path: Optional[Path] = None,
+        poll_interval: float = 2.0,
+        stop_event: Optional[threading.Event] = None,
+        process_existing: bool = True,
+        recursive: bool = False
+    ) -> List[Path]:
+        """
+        Watch a directory and process images as generators write them.
+        
+        Existing unprocessed images are handled first (incrementally), then
+        new files are picked up through inotify (polling on other platforms)
+        until ``stop_event`` is set or the watch is interrupted. Subdirectories
+        are watched too when recursive is set or the output layout is sharded.
+        
+        Returns:
+            List of paths to all processed images
+        """
+        if input_dir is None:
+            input_dir = self.settings.paths.output_dir
+        if output_dir is None:
+            output_dir = Path("data") / "adetailer_processed"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = manifest_path or output_dir / self.MANIFEST_FILENAME
+        
+        adetailer_settings = self.adetailer_settings.with_overrides(adetailer_config)
+        use_adetailer = adetailer_config is not None
+        settings_key = self._settings_key(use_adetailer, adetailer_settings, output_suffix)
+        patterns = [file_pattern] if file_pattern else [f"*{extension}" for extension in IMAGE_EXTENSIONS]
+        recursive = recursive or self.output_layout.scheme != "flat"
+        watcher = DirectoryWatcher(input_dir, patterns=patterns, poll_interval=poll_interval,
+                                   recursive=recursive, exclude_dirs=DERIVED_OUTPUT_DIRS)
+        processed_images: List[Path] = []
+        
+        # Watch from before the existing-file pass so files written during it are reported afterwards
+        watcher.start()
+        if process_existing:
             try:
-                # Process single image
-                processed_path = self._process_single_image(
-                    image_path, 
-                    output_dir, 
+                processed_images.extend(self.process_directory_images(
+                    input_dir=input_dir,
+                    output_dir=output_dir,
+                    file_pattern=file_pattern,
+                    adetailer_config=adetailer_config,
+                    output_suffix=output_suffix,
+                    max_workers=max_workers,
+                    incremental=True,
+                    manifest_path=manifest_path,
+                    recursive=recursive
+                ))
+            except BaseException:
+                watcher.close()
+                raise
+        
+        manifest = ProcessingManifest(manifest_path)
+        try:
+            for batch in watcher.watch(stop_event):
+                new_files = [
+                    path for path in batch
+                    if path.exists()
+                    and not path.stem.endswith(output_suffix)
+                    and not manifest.is_output(path)
+                    and manifest.needs_processing(path, settings_key)
+                ]
+                if not new_files:
+                    continue
+                
+                logger.info(f"Detected {len(new_files)} new images in {input_dir}")
+                results = self._run_pipeline(
+                    new_files,
+                    output_dir,
                     output_suffix,
-                    adetailer_config is not None
+                    use_adetailer,
+                    adetailer_settings,
+                    max_workers=max_workers,
+                    manifest=manifest,
+                    settings_key=settings_key
                 )
+                processed_images.extend(path for path in results if path)
+                manifest.save()
+        except KeyboardInterrupt:
+            logger.info("Watch interrupted")
+        finally:
+            manifest.save()
+        
+        logger.info(f"Watch finished: {len(processed_images)} images processed")
+        return processed_images
+    
+    def _apply_quality_gate(self, image_files: List[Path], thresholds: Optional[QualityThresholds]) -> List[Path]:
+        """Drop images failing the quality thresholds; scores go to the catalog metadata."""
+        passed, rejected, scores = QualityAnalyzer(thresholds).filter(image_files)
+        for path, reasons in rejected.items():
+            logger.info(f"Skipping {path.name}: {', '.join(reasons)}")
+        if self.settings.storage.catalog and scores:
+            Catalog.default().merge_metadata({
+                path: {"qa": {**score.to_dict(), "passed": path not in rejected, "reasons": rejected.get(path, [])}}
+                for path, score in scores.items()
+            })
+        return passed
+
+    def _get_indexer(self, input_dir: Path, file_pattern: Optional[str], recursive: bool) -> DirectoryIndexer:
+        """Indexer per input directory, so repeated scans reuse the cached snapshot."""
+        key = (str(input_dir), file_pattern, recursive)
+        if key not in self._indexers:
+            patterns = [file_pattern] if file_pattern else None
+            # Thumbnails, contact sheets and shards under the output root are not generations
+            self._indexers[key] = DirectoryIndexer(input_dir, patterns=patterns, recursive=recursive,
+                                                   exclude_dirs=DERIVED_OUTPUT_DIRS)
+        return self._indexers[key]
+
+    @staticmethod
+    def _settings_key(
+        use_adetailer: bool,
+        adetailer_settings: AdetailerSettings,
+        output_suffix: str,
+        routed: bool = False
+    ) -> str:
+        """Manifest key for the parameters that affect the processed output (routed: sent standard for lack of a face)."""
+        params = {
+            "adetailer": adetailer_settings.to_params() if use_adetailer else None,
+            "output_suffix": output_suffix,
+        }
+        if routed:
+            params["face_routing"] = "standard"
+        return ProcessingManifest.settings_key(params)
+    
+    def _run_pipeline(
+        self,
+        image_files: List[Path],
+        output_dir: Path,
+        output_suffix: str,
+        use_adetailer: bool,
+        adetailer_settings: AdetailerSettings,
+        max_workers: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        manifest: Optional[ProcessingManifest] = None,
+        settings_key: Optional[str] = None,
+        progress: Optional[ProgressTracker] = None
+    ) -> List[Optional[Path]]:
+        """Prefetch and submit images concurrently; results are in input order (progress: shared tracker)."""
+        max_workers = max(1, max_workers or self.settings.api.max_concurrent_requests)
+        prefetch = max(1, prefetch or 2 * max_workers)
+        logger.info(f"Concurrency: {max_workers} requests, prefetch {prefetch} images")
+        
+        progress = progress or ProgressTracker(len(image_files), label="Adetailer", callback=progress_callback)
+        results: Dict[int, Optional[Path]] = {}
+        pending_files = iter(enumerate(image_files))
+        prepared_queue: Deque[tuple] = deque()
+        in_flight: Dict[Future, tuple] = {}
+        prefetch_workers = max(1, min(prefetch, os.cpu_count() or 1))
+        
+        with ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="adetailer-prefetch") as prefetch_pool, \
+                ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="adetailer-submit") as submit_pool:
+            
+            def fill_prefetch() -> None:
+                # Keep up to `prefetch` images read and encoded ahead of submission
+                while len(prepared_queue) < prefetch:
+                    next_file = next(pending_files, None)
+                    if next_file is None:
+                        return
+                    index, image_path = next_file
+                    prepared_queue.append((index, image_path, prefetch_pool.submit(self._prepare_image, image_path)))
+            
+            fill_prefetch()
+            while prepared_queue or in_flight:
+                # Move prepared images into submission while request slots are free
+                while prepared_queue and len(in_flight) < max_workers:
+                    index, image_path, prepare_future = prepared_queue.popleft()
+                    fill_prefetch()
+                    
+                    try:
+                        prepared = prepare_future.result()
+                    except Exception as e:
+                        logger.error(f"Error reading {image_path.name}: {e}")
+                        results[index] = None
+                        progress.update(False, image_path)
+                        continue
+                    
+                    logger.info(f"Processing image {index + 1}/{len(image_files)}: {image_path.name}")
+                    future = submit_pool.submit(
+                        self._process_prepared_image,
+                        prepared,
+                        output_dir,
+                        output_suffix,
+                        use_adetailer,
+                        adetailer_settings
+                    )
+                    in_flight[future] = (index, image_path)
                 
-                if processed_path:
-                    processed_images.append(processed_path)
-                    logger.info(f"Successfully processed: {processed_path.name}")
-                else:
-                    logger.warning(f"Failed to process: {image_path.name}")
+                if not in_flight:
+                    continue
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, image_path = in_flight.pop(future)
+                    try:
+                        processed_path = future.result()
+                    except Exception as e:
+                        logger.error(f"Error processing {image_path.name}: {e}")
+                        processed_path = None
                     
-            except Exception as e:
-                logger.error(f"Error processing {image_path.name}: {e}")
+                    results[index] = processed_path
+                    if processed_path:
+                        logger.info(f"Successfully processed: {processed_path.name}")
+                        if manifest is not None:
+                            manifest.record(image_path, settings_key, processed_path)
+                    else:
+                        logger.warning(f"Failed to process: {image_path.name}")
+                    progress.update(processed_path is not None, image_path)
         
-        return processed_images
+        self.wait_for_writes()
+        succeeded = sum(1 for path in results.values() if path)
+        logger.info(f"Adetailer processing completed: {succeeded}/{len(image_files)} images "
+                    f"in {progress.snapshot()['elapsed_seconds']:.1f}s")
+        return [results[i] for i in sorted(results)]
     
     def process_single_image(
         self,
@@ -156,11 +532,8 @@ class AdetailerGenerator(BaseGenerator):
         # Create output directory if it doesn't exist
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Update Adetailer settings if provided
-        if adetailer_config:
-            for key, value in adetailer_config.items():
-                if hasattr(self.adetailer_settings, key):
-                    setattr(self.adetailer_settings, key, value)
+        # Per-call settings; the generator defaults are left untouched
+        adetailer_settings = self.adetailer_settings.with_overrides(adetailer_config)
         
         # Check if input image exists
         if not image_path.exists():
@@ -174,7 +547,8 @@ class AdetailerGenerator(BaseGenerator):
                 image_path, 
                 output_dir, 
                 output_suffix,
-                adetailer_config is not None
+                adetailer_config is not None,
+                adetailer_settings
             )
         except Exception as e:
             logger.error(f"Error processing {image_path.name}: {e}")
@@ -185,24 +559,48 @@ class AdetailerGenerator(BaseGenerator):
         image_path: Path, 
         output_dir: Path,
         output_suffix: str,
-        use_adetailer: bool = True
+        use_adetailer: bool = True,
+        adetailer_settings: Optional[AdetailerSettings] = None
     ) -> Optional[Path]:
         """Internal method to process a single image."""
+        try:
+            prepared = self._prepare_image(image_path)
+            return self._process_prepared_image(
+                prepared,
+                output_dir,
+                output_suffix,
+                use_adetailer,
+                adetailer_settings
+            )
+        except Exception as e:
+            logger.error(f"Error processing image: {e}")
+            return None
+    
+    def _process_prepared_image(
+        self,
+        prepared: PreparedImage,
+        output_dir: Path,
+        output_suffix: str,
+        use_adetailer: bool = True,
+        adetailer_settings: Optional[AdetailerSettings] = None
+    ) -> Optional[Path]:
+        """Submit an already prepared image and save the result."""
         try:
             # Create generation request
             if use_adetailer:
-                request = self._create_adetailer_request_from_file(image_path)
+                request = self._create_adetailer_request(prepared, adetailer_settings)
             else:
-                request = self._create_standard_request_from_file(image_path)
+                request = self._create_standard_request(prepared)
             
             # Generate output filename
-            stem = image_path.stem
-            extension = image_path.suffix
+            stem = prepared.path.stem
+            extension = prepared.path.suffix
             output_filename = f"{stem}{output_suffix}{extension}"
-            output_path = output_dir / output_filename
+            output_path = self.output_layout.resolve(output_dir, output_filename)
 
             # Execute generation
-            return self._execute_generation(request, output_path)
+            metadata = {"source_path": str(prepared.path), "adetailer_enabled": use_adetailer}
+            return self._execute_generation(request, output_path, metadata)
 
         except Exception as e:
             logger.error(f"Error processing image: {e}")
@@ -210,33 +608,26 @@ class AdetailerGenerator(BaseGenerator):
     
     def _create_adetailer_request_from_file(
         self, 
-        image_path: Path
+        image_path: Path,
+        adetailer_settings: Optional[AdetailerSettings] = None
     ) -> GenerationRequest:
         """Create Adetailer request from image file."""
-        request_data = self._prepare_request_data_from_file(image_path)
-
-        # Create Adetailer parameters
-        adetailer_params = {
-            "enabled": self.adetailer_settings.enabled,
-            "model": self.adetailer_settings.model,
-            "confidence": self.adetailer_settings.confidence,
-            "dilation": self.adetailer_settings.dilation,
-            "denoising_strength": self.adetailer_settings.denoising_strength,
-            "prompt": self.adetailer_settings.prompt,
-            "negative_prompt": self.adetailer_settings.negative_prompt,
-            "steps": self.adetailer_settings.steps,
-            "cfg_scale": self.adetailer_settings.cfg_scale,
-            "sampler": self.adetailer_settings.sampler,
-            "width": self.adetailer_settings.width,
-            "height": self.adetailer_settings.height
-        }
+        return self._create_adetailer_request(self._prepare_image(image_path), adetailer_settings)
+    
+    def _create_adetailer_request(
+        self,
+        prepared: PreparedImage,
+        adetailer_settings: Optional[AdetailerSettings] = None
+    ) -> GenerationRequest:
+        """Create Adetailer request from a prepared image."""
+        adetailer_settings = adetailer_settings or self.adetailer_settings
         
         return GenerationRequest(
             prompt="Portrait enhancement with detailed face features",
-            input_image=request_data["image_data"],
-            aspect_ratio=request_data["aspect_ratio"],
+            input_image=prepared.image_data,
+            aspect_ratio=prepared.aspect_ratio,
             output_format=self.settings.generation.default_output_format,
-            adetailer=adetailer_params
+            adetailer=adetailer_settings.to_params()
         )
     
     def _create_standard_request_from_file(
@@ -244,20 +635,20 @@ class AdetailerGenerator(BaseGenerator):
         image_path: Path
     ) -> GenerationRequest:
         """Create standard request from image file."""
-        request_data = self._prepare_request_data_from_file(image_path)
-        
+        return self._create_standard_request(self._prepare_image(image_path))
+    
+    def _create_standard_request(self, prepared: PreparedImage) -> GenerationRequest:
+        """Create standard request from a prepared image."""
         return GenerationRequest(
             prompt="Portrait enhancement with improved details",
-            input_image=request_data["image_data"],
-            aspect_ratio=request_data["aspect_ratio"],
+            input_image=prepared.image_data,
+            aspect_ratio=prepared.aspect_ratio,
             output_format=self.settings.generation.default_output_format
         )
     
     def update_adetailer_settings(self, **kwargs) -> None:
-        """Update Adetailer settings."""
-        for key, value in kwargs.items():
-            if hasattr(self.adetailer_settings, key):
-                setattr(self.adetailer_settings, key, value)
+        """Update default Adetailer settings."""
+        self.adetailer_settings = self.adetailer_settings.with_overrides(kwargs)
     
     def get_generator_info(self) -> Dict[str, Any]:
         """Get information about the generator."""
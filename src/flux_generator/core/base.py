@@ -5,29 +5,61 @@ This module provides the base class with common functionality
 shared across all generator classes.
 """
 
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple
 from abc import ABC, abstractmethod
 
 from ..config.settings import settings
 from ..config.prompts import PromptConfig
 from ..api.client import FluxAPIClient
 from ..api.models import GenerationRequest
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, log_context
 from ..utils.image import ImageUtils
+from ..utils.base import ImageProcessor
+from ..utils.hashing import HashService
+from .record import GenerationRecord
+from ..storage.objects import ObjectStore
+from ..storage.writer import OutputWriter, WriteResult
+from ..storage.shards import ShardWriter
+from ..storage.catalog import Catalog
+from ..storage.tensors import TensorExport
+from ..storage.layout import OutputLayout
+from ..processing.derivatives import DerivativeProcessor
 
 logger = get_logger(__name__)
 
+OutputHook = Callable[[GenerationRecord, bytes], None]
+
 
 class BaseGenerator(ABC):
     """Base class for all FLUX generators with common functionality."""
     
+    # Encoded source images kept for reuse (least recently used are dropped)
+    ENCODED_INPUT_CACHE_SIZE = 8
+    
     def __init__(self, output_subdir: Optional[str] = None, api_key: Optional[str] = None):
         """Initialize base generator."""
         self.api_client = FluxAPIClient(api_key)
         self.settings = settings
         self.prompt_config = PromptConfig()
+        self.output_writer = OutputWriter.default() if settings.storage.async_writes else None
+        self.object_store = ObjectStore.from_settings() if settings.storage.content_addressed else None
+        self.output_layout = OutputLayout.from_settings()
+        self.output_hooks: List[OutputHook] = []
+        self.encoded_input_cache_size = self.ENCODED_INPUT_CACHE_SIZE
+        self._encoded_inputs: "OrderedDict[Path, Tuple[int, str]]" = OrderedDict()
+        self._encoded_lock = threading.Lock()
+        if settings.storage.catalog:
+            self.add_output_hook(Catalog.default())
+        if settings.storage.shard_export:
+            self.add_output_hook(ShardWriter.default())
+        if settings.storage.tensor_export:
+            self.add_output_hook(TensorExport.default())
+        if settings.storage.derivatives:
+            self.add_output_hook(DerivativeProcessor.default())
         
         # Validate settings
         self.settings.validate()
@@ -51,15 +83,38 @@ class BaseGenerator(ABC):
         if output_subdir:
             logger.info(f"Output directory: {self.output_dir}")
     
-    def _execute_generation(self, request: GenerationRequest, output_path: Path) -> Optional[Path]:
+    def _execute_generation(
+        self,
+        request: GenerationRequest,
+        output_path: Path,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Optional[Path]:
         """Executes the image generation request and saves the result."""
         try:
             logger.info(f"Executing generation request for {output_path.name}")
+            started = time.perf_counter()
             response = self.api_client.generate_image(request)
+            latency = time.perf_counter() - started
             
             if response.success and response.image_data:
-                ImageUtils.save_image_data(response.image_data, output_path)
+                try:
+                    write = self._save_output(response.image_data, output_path)
+                except Exception as e:
+                    logger.error(f"Failed to write {output_path}: {e}")
+                    return None
                 logger.info(f"Generated image saved: {output_path}")
+                if self.output_hooks:
+                    record = GenerationRecord.from_request(
+                        request,
+                        output_path,
+                        generator=self.__class__.__name__,
+                        metadata=metadata,
+                        digest=self._record_digest(write, response.image_data),
+                        size=len(response.image_data),
+                        request_id=response.request_id,
+                        latency=latency
+                    )
+                    self._run_output_hooks(record, response.image_data)
                 return output_path
             else:
                 logger.error(f"Generation failed for {output_path.name}: {response.error_message}")
@@ -69,6 +124,56 @@ class BaseGenerator(ABC):
             logger.error(f"Error generating image for {output_path.name}: {e}")
             return None
 
+    def _save_output(self, image_data: bytes, output_path: Path) -> Optional[WriteResult]:
+        """
+        Save image data atomically; raises if the write fails.
+
+        With async writes the bytes go through the shared writer pool (which
+        batches fsyncs across generation threads) and this waits for that
+        write, so callers only ever see paths that are on disk.
+        """
+        if self.output_writer:
+            return self.output_writer.submit(image_data, output_path).result()
+        elif self.object_store:
+            self.object_store.store(image_data, output_path)
+        else:
+            ImageUtils.save_image_data(image_data, output_path, fsync=self.settings.storage.fsync)
+        return None
+
+    def _record_digest(self, write: Optional[WriteResult], image_data: bytes) -> str:
+        """Content hash for the record, reusing the one computed while writing when it matches."""
+        hash_service = HashService.default()
+        if write and write.digest and self.output_writer.algorithm == hash_service.algorithm:
+            return write.digest
+        return hash_service.hash_bytes(image_data)
+
+    def add_output_hook(self, hook: OutputHook) -> None:
+        """Register a callable receiving (record, image_data) for every saved output."""
+        self.output_hooks.append(hook)
+
+    def remove_output_hook(self, hook: OutputHook) -> None:
+        """Unregister a previously added output hook."""
+        if hook in self.output_hooks:
+            self.output_hooks.remove(hook)
+
+    def _run_output_hooks(self, record: GenerationRecord, image_data: bytes) -> None:
+        """Call output hooks; a failing hook never fails the generation."""
+        for hook in self.output_hooks:
+            try:
+                hook(record, image_data)
+            except Exception as e:
+                logger.error(f"Output hook {hook!r} failed for {record.path.name}: {e}")
+
+    def _contact_sheet_path(self, name: str) -> Path:
+        """Timestamped path for a contact sheet under output/contact_sheets."""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        return self.settings.paths.output_dir / "contact_sheets" / f"{name}_{timestamp}.jpg"
+
+    def wait_for_writes(self) -> None:
+        """Block until all queued output writes are on disk."""
+        if self.output_writer:
+            self.output_writer.flush()
+
     def test_connection(self) -> bool:
         """Test API connection."""
         try:
@@ -81,6 +186,27 @@ class BaseGenerator(ABC):
         """Get information about input image."""
         return ImageUtils.get_image_info(self.input_image)
     
+    def _encode_input(self, image_path: Path) -> str:
+        """Base64 data URL of an input image, encoded once and reused until the file changes."""
+        mtime_ns = image_path.stat().st_mtime_ns
+        with self._encoded_lock:
+            cached = self._encoded_inputs.get(image_path)
+            if cached and cached[0] == mtime_ns:
+                self._encoded_inputs.move_to_end(image_path)
+                return cached[1]
+        encoded = ImageProcessor.encode_to_base64(image_path)
+        with self._encoded_lock:
+            self._encoded_inputs[image_path] = (mtime_ns, encoded)
+            self._encoded_inputs.move_to_end(image_path)
+            while len(self._encoded_inputs) > max(1, self.encoded_input_cache_size):
+                self._encoded_inputs.popitem(last=False)
+        return encoded
+    
+    def clear_encoded_inputs(self) -> None:
+        """Drop all cached input encodings."""
+        with self._encoded_lock:
+            self._encoded_inputs.clear()
+    
     def generate_single_image(
         self,
         prompt: str,
@@ -88,9 +214,17 @@ class BaseGenerator(ABC):
         aspect_ratio: Optional[str] = None,
         output_format: Optional[str] = None,
         base_name: str = "image",
+        metadata: Optional[Dict[str, Any]] = None,
+        source_image: Optional[Path] = None,
+        output_dir: Optional[Path] = None,
         **kwargs
     ) -> Optional[Path]:
-        """Generate a single image with common logic."""
+        """
+        Generate a single image with common logic.
+        
+        source_image replaces the input image and output_dir the generator's
+        output directory for this call.
+        """
         seed = seed or self.settings.generation.default_seed
         aspect_ratio = aspect_ratio or self.settings.generation.default_aspect_ratio
         output_format = output_format or self.settings.generation.default_output_format
@@ -99,9 +233,9 @@ class BaseGenerator(ABC):
         
         try:
             # Create generation request
-            request = GenerationRequest.from_image_file(
+            request = GenerationRequest(
                 prompt=prompt,
-                image_path=self.input_image,
+                input_image=self._encode_input(source_image or self.input_image),
                 seed=seed,
                 aspect_ratio=aspect_ratio,
                 output_format=output_format,
@@ -115,8 +249,9 @@ class BaseGenerator(ABC):
                 seed=seed,
                 extension=output_format
             )
-            output_path = self.output_dir / filename
-            return self._execute_generation(request, output_path)
+            output_path = self.output_layout.resolve(output_dir or self.output_dir, filename, seed=seed)
+            with log_context(seed=seed):
+                return self._execute_generation(request, output_path, metadata)
             
         except Exception as e:
             logger.error(f"Error preparing generation request: {e}")
@@ -169,6 +304,7 @@ class BaseGenerator(ABC):
             except Exception as e:
                 logger.error(f"Error in generation {i + 1}/{count}: {e}")
         
+        self.wait_for_writes()
         logger.info(f"Generation completed: {successful_count}/{count} images generated")
         return generated_images
     
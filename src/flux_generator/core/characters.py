@@ -0,0 +1,218 @@
+"""
+Multi-character batch generation for FLUX Image Generator.
+
+Discovers every image in the input directory as a character, encodes
+each once, and runs styles x seeds x characters through one shared
+thread pool. Jobs are interleaved across characters so all of them
+progress together; outputs go to one subdirectory per character and
+progress is reported per character as well as overall.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+
+from .spec import GenerationSpec
+from ..utils.indexer import DirectoryIndexer
+from ..utils.logger import get_logger
+from ..utils.progress import ProgressTracker
+
+logger = get_logger(__name__)
+
+_NAME_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+@dataclass(frozen=True)
+class Character:
+    """An input image and the name its outputs are filed under."""
+    name: str
+    path: Path
+
+
+def discover_characters(input_dir: Path) -> List[Character]:
+    """Characters for all images directly in input_dir, named after the file stem."""
+    characters: List[Character] = []
+    names = set()
+    for path in DirectoryIndexer(input_dir, recursive=False).paths():
+        name = _NAME_UNSAFE.sub("_", path.stem).strip("._") or "character"
+        if name in names:
+            name = f"{name}_{path.suffix.lstrip('.').lower()}"
+        names.add(name)
+        characters.append(Character(name, path))
+    return characters
+
+
+# Job: character, style, seed
+_Job = Tuple[Character, str, int]
+
+
+class MultiCharacterGenerator:
+    """Runs an EnhancedFluxGenerator batch for every character in the input directory."""
+
+    def __init__(
+        self,
+        generator=None,
+        input_dir: Optional[Path] = None,
+        characters: Optional[List[Character]] = None,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Initialize multi-character generator.
+
+        Args:
+            generator: EnhancedFluxGenerator used for every job (default: a new one)
+            input_dir: Directory with character images (default: settings.paths.input_dir)
+            characters: Explicit characters instead of discovering input_dir
+            max_workers: Concurrent requests across all characters
+                (default: settings.api.max_concurrent_requests)
+        """
+        from .enhanced import EnhancedFluxGenerator
+
+        self.generator = generator or EnhancedFluxGenerator()
+        self.settings = self.generator.settings
+        self.input_dir = input_dir or self.settings.paths.input_dir
+        self.characters = characters if characters is not None else discover_characters(self.input_dir)
+        self.max_workers = max(1, max_workers or self.settings.api.max_concurrent_requests)
+        logger.info(f"Multi-character mode: {len(self.characters)} characters in {self.input_dir}")
+
+    def preload(self) -> None:
+        """Encode every character image once, in parallel."""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="character-encode") as pool:
+            list(pool.map(lambda character: self.generator._encode_input(character.path), self.characters))
+
+    def output_dir_for(self, character: Character) -> Path:
+        """Output directory of one character."""
+        return self.output_dir_for_name(character.name)
+
+    def output_dir_for_name(self, name: str) -> Path:
+        """Output directory of the character with the given name."""
+        return self.generator.output_dir / name
+
+    def generate(
+        self,
+        styles: Optional[List[str]] = None,
+        count: int = 1,
+        start_seed: Optional[int] = None,
+        custom_prompt: Optional[str] = None,
+        spec: Optional[GenerationSpec] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Dict[str, List[Path]]]:
+        """
+        Generate count images per style for every character.
+
+        Every character uses the same seeds (start_seed .. start_seed + count - 1)
+        so outputs are comparable across characters.
+
+        Args:
+            styles: Styles to generate (default: the generator's current style)
+            count: Seeds per style and character
+            start_seed: First seed
+            custom_prompt: Custom prompt instead of the style prompt
+            spec: Base spec for aspect and quality (default: the generator's default spec)
+            progress_callback: Called with the overall progress snapshot after each image,
+                with the character's snapshot under "character"
+
+        Returns:
+            {character: {style: [image paths in seed order]}}
+        """
+        spec = spec or self.generator.default_spec
+        styles = styles or [spec.style]
+        specs = {style: spec.with_changes(style=style, custom_prompt=custom_prompt or spec.custom_prompt)
+                 for style in styles}
+        start_seed = start_seed or self.settings.generation.default_seed
+        if not self.characters:
+            logger.warning(f"No character images found in {self.input_dir}")
+            return {}
+
+        # Jobs rotate through every character, so all of their encodings are kept for this run only
+        cache_size = self.generator.encoded_input_cache_size
+        self.generator.encoded_input_cache_size = max(cache_size, len(self.characters) + 1)
+        try:
+            return self._generate(styles, specs, count, start_seed, progress_callback)
+        finally:
+            self.generator.encoded_input_cache_size = cache_size
+            self.generator.clear_encoded_inputs()
+
+    def _generate(
+        self,
+        styles: List[str],
+        specs: Dict[str, GenerationSpec],
+        count: int,
+        start_seed: int,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+    ) -> Dict[str, Dict[str, List[Path]]]:
+        self.preload()
+        per_character = len(styles) * count
+        total = per_character * len(self.characters)
+        logger.info(f"Generating {total} images: {len(self.characters)} characters x "
+                    f"{len(styles)} styles x {count} seeds, {self.max_workers} concurrent requests")
+
+        overall = ProgressTracker(total, label="Characters")
+        trackers = {
+            character.name: ProgressTracker(per_character, label=f"Character {character.name}", log_every=per_character)
+            for character in self.characters
+        }
+        results: Dict[str, Dict[str, Dict[int, Path]]] = {
+            character.name: {style: {} for style in styles} for character in self.characters
+        }
+
+        def run(job: _Job) -> Optional[Path]:
+            character, style, seed = job
+            return self.generator.generate_single_image(
+                seed=seed,
+                spec=specs[style],
+                source_image=character.path,
+                output_dir=self.output_dir_for(character),
+                metadata={"character": character.name}
+            )
+
+        jobs = self._jobs(styles, count, start_seed)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="characters") as pool:
+            in_flight: Dict[Future, _Job] = {}
+            for job in jobs:
+                # Bounded submission keeps a 200-character batch from queueing every job up front
+                in_flight[pool.submit(run, job)] = job
+                if len(in_flight) >= 2 * self.max_workers:
+                    self._collect(in_flight, results, trackers, overall, progress_callback)
+            while in_flight:
+                self._collect(in_flight, results, trackers, overall, progress_callback)
+
+        self.generator.wait_for_writes()
+        logger.info(f"Multi-character generation completed: {overall.succeeded}/{total} images")
+        return {
+            name: {style: [paths[seed] for seed in sorted(paths)] for style, paths in styles_done.items()}
+            for name, styles_done in results.items()
+        }
+
+    def _jobs(self, styles: List[str], count: int, start_seed: int) -> Iterator[_Job]:
+        """Jobs interleaved across characters: every character gets its next image before any gets two."""
+        for i in range(count):
+            for style in styles:
+                for character in self.characters:
+                    yield character, style, start_seed + i
+
+    @staticmethod
+    def _collect(
+        in_flight: Dict[Future, _Job],
+        results: Dict[str, Dict[str, Dict[int, Path]]],
+        trackers: Dict[str, ProgressTracker],
+        overall: ProgressTracker,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+    ) -> None:
+        """Wait for at least one job and record the finished ones."""
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            character, style, seed = in_flight.pop(future)
+            try:
+                path = future.result()
+            except Exception as e:
+                logger.error(f"Error generating {style} seed {seed} for {character.name}: {e}")
+                path = None
+            if path:
+                results[character.name][style][seed] = path
+            snapshot = overall.update(path is not None, path)
+            snapshot["character"] = trackers[character.name].update(path is not None, path)
+            if progress_callback:
+                progress_callback(snapshot)
@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Optional, List, Dict, Any
 
 from .base import BaseGenerator
+from .spec import GenerationSpec
+from ..processing.grid import GridRenderer
 from ..api.models import GenerationRequest, APIError
 from ..utils.logger import get_logger
 from ..utils.image import ImageUtils
@@ -23,18 +25,40 @@ class EnhancedFluxGenerator(BaseGenerator):
         """Initialize enhanced generator."""
         super().__init__(output_subdir=output_subdir, api_key=api_key)
         
-        # Current settings - using safer defaults
-        self.current_style = "safe_realistic"
-        self.current_aspect = "portrait"
-        self.current_quality = "safe"
+        # Default spec used when no spec is passed per call - using safer defaults
+        self.default_spec = GenerationSpec(style="safe_realistic", aspect="portrait", quality="safe")
         
         logger.info(f"Enhanced generator initialized with style: {self.current_style}")
     
+    @property
+    def current_style(self) -> str:
+        """Style of the default spec."""
+        return self.default_spec.style
+    
+    @current_style.setter
+    def current_style(self, style: str) -> None:
+        self.default_spec = self.default_spec.with_changes(style=style)
+    
+    @property
+    def current_aspect(self) -> str:
+        """Aspect of the default spec."""
+        return self.default_spec.aspect
+    
+    @current_aspect.setter
+    def current_aspect(self, aspect: str) -> None:
+        self.default_spec = self.default_spec.with_changes(aspect=aspect)
+    
+    @property
+    def current_quality(self) -> str:
+        """Quality of the default spec."""
+        return self.default_spec.quality
+    
+    @current_quality.setter
+    def current_quality(self, quality: str) -> None:
+        self.default_spec = self.default_spec.with_changes(quality=quality)
+    
     def set_style(self, style: str) -> None:
-        """Set generation style."""
-        if style not in self.prompt_config.PROMPTS:
-            available = list(self.prompt_config.PROMPTS.keys())
-            raise ValueError(f"Unknown style: {style}. Available: {available}")
+        """Set default generation style."""
         self.current_style = style
         logger.info(f"Style set to: {style}")
     
@@ -51,61 +75,57 @@ class EnhancedFluxGenerator(BaseGenerator):
         return self.prompt_config.get_prompt_by_technical_spec(spec_type, spec_value)
     
     def set_aspect_ratio(self, aspect: str) -> None:
-        """Set aspect ratio."""
-        if aspect not in self.prompt_config.ASPECT_RATIOS:
-            available = list(self.prompt_config.ASPECT_RATIOS.keys())
-            raise ValueError(f"Unknown aspect: {aspect}. Available: {available}")
+        """Set default aspect ratio."""
         self.current_aspect = aspect
         logger.info(f"Aspect ratio set to: {aspect}")
     
     def set_quality(self, quality: str) -> None:
-        """Set generation quality."""
-        if quality not in self.prompt_config.QUALITY_SETTINGS:
-            available = list(self.prompt_config.QUALITY_SETTINGS.keys())
-            raise ValueError(f"Unknown quality: {quality}. Available: {available}")
+        """Set default generation quality."""
         self.current_quality = quality
         logger.info(f"Quality set to: {quality}")
     
-    def get_current_config(self) -> Dict[str, Any]:
-        """Get current configuration."""
-        return self.prompt_config.get_prompt_config(
-            self.current_style,
-            self.current_aspect,
-            self.current_quality
-        )
+    def get_current_config(self, spec: Optional[GenerationSpec] = None) -> Dict[str, Any]:
+        """Get configuration for the given spec (default spec if omitted)."""
+        return (spec or self.default_spec).get_prompt_config()
     
     def generate_single_image(
         self, 
         seed: Optional[int] = None,
-        custom_prompt: Optional[str] = None
+        custom_prompt: Optional[str] = None,
+        spec: Optional[GenerationSpec] = None,
+        source_image: Optional[Path] = None,
+        output_dir: Optional[Path] = None,
+        metadata: Optional[Dict[str, Any]] = None
     ) -> Optional[Path]:
-        """Generate a single image."""
-        config = self.get_current_config()
-        prompt = custom_prompt if custom_prompt else config["prompt"]
-        
-        # Prepare quality settings
-        quality_settings = config["quality_settings"].copy()
-        quality_settings.pop("description", None)
+        """Generate a single image, optionally from another input image into another directory."""
+        spec = spec or self.default_spec
+        if custom_prompt:
+            spec = spec.with_changes(custom_prompt=custom_prompt)
         
         return super().generate_single_image(
-            prompt=prompt,
+            prompt=spec.prompt,
             seed=seed,
-            aspect_ratio=config["aspect_ratio"],
+            aspect_ratio=spec.aspect_ratio,
             output_format="jpeg",
-            base_name=f"{self.current_style}_woman",
-            **quality_settings
+            base_name=spec.base_name,
+            metadata={**spec.to_dict(), **(metadata or {})},
+            source_image=source_image,
+            output_dir=output_dir,
+            **spec.get_quality_params()
         )
     
     def generate_images(
         self, 
         count: Optional[int] = None,
         start_seed: Optional[int] = None,
-        custom_prompt: Optional[str] = None
+        custom_prompt: Optional[str] = None,
+        spec: Optional[GenerationSpec] = None
     ) -> List[Path]:
         """Generate multiple images."""
         count = count or 5
+        spec = spec or self.default_spec
         
-        logger.info(f"Starting generation of {count} images with style: {self.current_style}")
+        logger.info(f"Starting generation of {count} images with style: {spec.style}")
         
         # This can be simplified by calling the base class method directly
         # if the logic for generating multiple images is just iterating single image generation.
@@ -120,7 +140,7 @@ class EnhancedFluxGenerator(BaseGenerator):
             logger.info(f"Generating image {i + 1}/{count} with seed {seed}")
             
             try:
-                output_path = self.generate_single_image(seed=seed, custom_prompt=custom_prompt)
+                output_path = self.generate_single_image(seed=seed, custom_prompt=custom_prompt, spec=spec)
                 
                 if output_path:
                     generated_images.append(output_path)
@@ -136,16 +156,20 @@ class EnhancedFluxGenerator(BaseGenerator):
             except Exception as e:
                 logger.error(f"Error in generation {i + 1}/{count}: {e}")
         
+        self.wait_for_writes()
         logger.info(f"Generation completed: {successful_count}/{count} images generated")
         return generated_images
     
     def generate_style_comparison(
         self, 
         styles: Optional[List[str]] = None, 
-        count_per_style: int = 2
+        count_per_style: int = 2,
+        spec: Optional[GenerationSpec] = None,
+        contact_sheet: bool = False
     ) -> Dict[str, List[Path]]:
-        """Generate comparison across multiple styles."""
+        """Generate comparison across multiple styles, optionally rendering a contact sheet."""
         styles = styles or ["ultra_realistic", "cinematic", "artistic"]
+        spec = spec or self.default_spec
         
         logger.info(f"Generating style comparison: {styles}")
         
@@ -154,27 +178,29 @@ class EnhancedFluxGenerator(BaseGenerator):
         for style in styles:
             logger.info(f"Generating {count_per_style} images in {style} style")
             
-            # Set style
-            self.set_style(style)
-            
-            # Generate images
-            images = self.generate_images(count=count_per_style)
+            # Generate images with a per-style spec
+            images = self.generate_images(count=count_per_style, spec=spec.with_changes(style=style))
             results[style] = images
             
             logger.info(f"Generated {len(images)} images for {style} style")
         
+        if contact_sheet:
+            GridRenderer().render_style_comparison(results, self._contact_sheet_path("style_comparison"))
+        
         return results
     
     def generate_from_preset(
         self, 
         preset: str, 
         count: int = 1,
-        start_seed: Optional[int] = None
+        start_seed: Optional[int] = None,
+        spec: Optional[GenerationSpec] = None
     ) -> List[Path]:
         """Generate images using a preset configuration."""
         logger.info(f"Generating {count} images using preset: {preset}")
+        spec = spec or self.default_spec
         
-        config = self.prompt_config.get_preset_config(preset, self.current_aspect, self.current_quality)
+        config = self.prompt_config.get_preset_config(preset, spec.aspect, spec.quality)
         
         # Prepare quality settings
         quality_settings = config["quality_settings"].copy()
@@ -209,7 +235,8 @@ class EnhancedFluxGenerator(BaseGenerator):
         include_styles: Optional[List[str]] = None,
         include_aspects: Optional[List[str]] = None,
         include_qualities: Optional[List[str]] = None,
-        custom_prompt: Optional[str] = None
+        custom_prompt: Optional[str] = None,
+        contact_sheet: bool = False
     ) -> Dict[str, Dict[str, Dict[str, List[Path]]]]:
         """
         Generate all possible variations of images.
@@ -221,6 +248,7 @@ class EnhancedFluxGenerator(BaseGenerator):
             include_aspects: List of aspects to include (None = all)
             include_qualities: List of qualities to include (None = all)
             custom_prompt: Custom prompt to use instead of style defaults
+            contact_sheet: Render one style x aspect contact sheet per quality
             
         Returns:
             Nested dictionary: {style: {aspect: {quality: [image_paths]}}}
@@ -275,10 +303,8 @@ class EnhancedFluxGenerator(BaseGenerator):
                 for quality_idx, quality in enumerate(qualities_to_generate):
                     logger.info(f"    Processing quality {quality_idx + 1}/{len(qualities_to_generate)}: {quality}")
                     
-                    # Set current configuration
-                    self.current_style = style
-                    self.current_aspect = aspect
-                    self.current_quality = quality
+                    # Per-variation spec; the generator's defaults stay untouched
+                    spec = GenerationSpec(style=style, aspect=aspect, quality=quality)
                     
                     # Generate images for this variation
                     variation_images = []
@@ -287,7 +313,7 @@ class EnhancedFluxGenerator(BaseGenerator):
                         logger.info(f"      Generating image {i + 1}/{count_per_variation} with seed {seed}")
                         
                         try:
-                            output_path = self.generate_single_image(seed, custom_prompt)
+                            output_path = self.generate_single_image(seed, custom_prompt, spec=spec)
                             
                             if output_path:
                                 variation_images.append(output_path)
@@ -318,9 +344,14 @@ class EnhancedFluxGenerator(BaseGenerator):
             if style_idx < len(styles_to_generate) - 1:
                 time.sleep(2)
         
+        self.wait_for_writes()
         logger.info(f"ALL variations generation completed!")
         logger.info(f"Successfully generated: {successful_total}/{total_images} images")
         
+        if contact_sheet:
+            sheet_path = self._contact_sheet_path("variations")
+            GridRenderer().render_variations(results, sheet_path.parent, prefix=sheet_path.stem)
+        
         return results
     
     def generate_all_variations_summary(
@@ -0,0 +1,373 @@
+"""
+Streaming generation pipeline for FLUX Image Generator.
+
+Connects processing stages with bounded queues so each image flows
+through generate -> QA -> Adetailer -> post-process on its own, instead
+of every stage waiting for the whole batch. Each stage has its own
+worker threads (its concurrency limit) and a bounded input queue; a
+full queue blocks the stage feeding it, so backpressure propagates
+upstream to the job source.
+
+Images move between stages as in-memory bytes: the Adetailer stage
+submits the generated bytes directly, without reading the file back
+or re-encoding it.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+from .base import BaseGenerator
+from .record import GenerationRecord
+from .spec import GenerationSpec
+from ..processing.quality import QualityAnalyzer, QualityScores, QualityThresholds
+from ..processing.derivatives import DerivativeProcessor
+from ..storage.catalog import Catalog
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()  # end-of-stream marker
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class PipelineItem:
+    """One image travelling through the pipeline."""
+    index: int
+    params: Dict[str, Any] = field(default_factory=dict)  # job parameters for the first stage
+    path: Optional[Path] = None  # latest output
+    image_data: Optional[bytes] = None  # bytes of the latest output
+    record: Optional[GenerationRecord] = None
+    source_path: Optional[Path] = None  # generated image, before enhancement
+    quality: Optional[QualityScores] = None
+    status: str = "pending"  # pending, done, rejected or failed
+    reasons: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> seconds
+
+
+@dataclass
+class Stage:
+    """A pipeline stage; func returns False to take the item out of the pipeline."""
+    name: str
+    func: Callable[[PipelineItem], bool]
+    workers: int = 1
+    queue_size: Optional[int] = None  # input queue bound (default: 2 * workers)
+
+
+class Pipeline:
+    """Runs items through stages connected by bounded queues."""
+
+    def __init__(self, stages: List[Stage], output_queue_size: int = 8):
+        """Initialize pipeline with its stages, in order."""
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.output_queue_size = output_queue_size
+        self.stats: Dict[str, Any] = {}
+
+    def run(self, items: Iterable[PipelineItem]) -> Iterator[PipelineItem]:
+        """
+        Stream items through the stages.
+
+        Yields every item as soon as it leaves the pipeline: finished ("done"),
+        dropped by a stage ("rejected") or failed. Abandoning the iterator
+        stops the pipeline.
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size or 2 * max(1, stage.workers)) for stage in self.stages]
+        output: queue.Queue = queue.Queue(maxsize=self.output_queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+        remaining = [max(1, stage.workers) for stage in self.stages]
+        started = time.perf_counter()
+        self.stats = {
+            "stages": {stage.name: {"processed": 0, "dropped": 0, "failed": 0, "busy_seconds": 0.0}
+                       for stage in self.stages},
+            "items": 0,
+            "first_output_seconds": None,
+            "elapsed_seconds": 0.0,
+        }
+
+        def put(target: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(source: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def feed() -> None:
+            try:
+                for item in items:
+                    if not put(queues[0], item):
+                        return
+            except Exception as e:
+                logger.error(f"Pipeline source failed: {e}")
+            for _ in range(max(1, self.stages[0].workers)):
+                put(queues[0], _DONE)
+
+        def work(position: int) -> None:
+            stage = self.stages[position]
+            stats = self.stats["stages"][stage.name]
+            last = position == len(self.stages) - 1
+            while True:
+                item = get(queues[position])
+                if item is _DONE:
+                    break
+                begun = time.perf_counter()
+                try:
+                    keep = stage.func(item)
+                except Exception as e:
+                    logger.error(f"Stage {stage.name} failed for item {item.index}: {e}")
+                    item.status, keep = "failed", False
+                    item.reasons.append(f"{stage.name}: {e}")
+                elapsed = time.perf_counter() - begun
+                item.timings[stage.name] = elapsed
+                with lock:
+                    stats["busy_seconds"] += elapsed
+                    stats["processed"] += 1
+                    if not keep:
+                        stats["failed" if item.status == "failed" else "dropped"] += 1
+
+                if keep and not last:
+                    put(queues[position + 1], item)
+                    continue
+                if keep:
+                    item.status = "done"
+                elif item.status == "pending":
+                    item.status = "rejected"
+                put(output, item)
+
+            # The last worker of a stage closes the next one
+            with lock:
+                remaining[position] -= 1
+                closing = remaining[position] == 0
+            if closing:
+                if last:
+                    put(output, _DONE)
+                else:
+                    for _ in range(max(1, self.stages[position + 1].workers)):
+                        put(queues[position + 1], _DONE)
+
+        threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+        for position, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=work, args=(position,), name=f"pipeline-{stage.name}-{i}", daemon=True)
+                for i in range(max(1, stage.workers))
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = get(output)
+                if item is _DONE:
+                    break
+                self.stats["items"] += 1
+                if self.stats["first_output_seconds"] is None and item.status == "done":
+                    self.stats["first_output_seconds"] = time.perf_counter() - started
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.stats["elapsed_seconds"] = time.perf_counter() - started
+
+
+class _OutputCapture:
+    """Output hook keeping the bytes and record of outputs until the pipeline collects them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outputs: Dict[Path, Tuple[GenerationRecord, bytes]] = {}
+
+    def __call__(self, record: GenerationRecord, image_data: bytes) -> None:
+        with self._lock:
+            self._outputs[record.path] = (record, image_data)
+
+    def pop(self, path: Path) -> Tuple[Optional[GenerationRecord], Optional[bytes]]:
+        with self._lock:
+            return self._outputs.pop(path, (None, None))
+
+
+class GenerationPipeline:
+    """Streams images from a generator through QA, Adetailer and post-processing."""
+
+    def __init__(
+        self,
+        generator: Optional[BaseGenerator] = None,
+        adetailer=None,
+        generate: Optional[Callable[..., Optional[Path]]] = None,
+        quality_gate: Optional[bool] = None,
+        quality_thresholds: Optional[QualityThresholds] = None,
+        adetailer_config: Optional[Dict[str, Any]] = None,
+        output_dir: Optional[Path] = None,
+        output_suffix: str = "_adetailer",
+        post_processors: Optional[List[Callable[[PipelineItem], None]]] = None,
+        generate_workers: Optional[int] = None,
+        qa_workers: int = 1,
+        adetailer_workers: Optional[int] = None,
+        post_workers: int = 1,
+        queue_size: Optional[int] = None
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            generator: Generator producing images (default: EnhancedFluxGenerator)
+            adetailer: AdetailerGenerator for the enhancement stage (default: a new one)
+            generate: Callable run with each job's parameters (default: generator.generate_single_image)
+            quality_gate: Drop images failing the quality thresholds (default: settings.qa.enabled)
+            quality_thresholds: Gate thresholds (default: from settings.qa)
+            adetailer_config: Adetailer settings; as in process_directory_images, images are
+                submitted with Adetailer face parameters only when this is given
+            output_dir: Enhanced output directory (default: data/adetailer_processed)
+            output_suffix: Suffix for enhanced files
+            post_processors: Callables run on each finished item (default: derivatives
+                when storage.derivatives is enabled)
+            generate_workers: Concurrent generation requests (default: settings.api.max_concurrent_requests)
+            qa_workers: QA threads
+            adetailer_workers: Concurrent Adetailer requests (default: settings.api.max_concurrent_requests)
+            post_workers: Post-processing threads
+            queue_size: Bound of every stage input queue (default: 2 * the stage's workers)
+        """
+        from .enhanced import EnhancedFluxGenerator
+        from .adetailer import AdetailerGenerator
+
+        self.generator = generator or EnhancedFluxGenerator()
+        self.adetailer = adetailer or AdetailerGenerator()
+        self.settings = self.generator.settings
+        self.generate = generate or self.generator.generate_single_image
+        self.quality_gate = quality_gate if quality_gate is not None else self.settings.qa.enabled
+        self.analyzer = QualityAnalyzer(quality_thresholds) if self.quality_gate else None
+        self.use_adetailer = adetailer_config is not None
+        self.adetailer_settings = self.adetailer.adetailer_settings.with_overrides(adetailer_config)
+        self.output_dir = output_dir or Path("data") / "adetailer_processed"
+        self.output_suffix = output_suffix
+        self._derivatives: Optional[DerivativeProcessor] = None
+        if post_processors is None:
+            post_processors = []
+            if self.settings.storage.derivatives:
+                self._derivatives = DerivativeProcessor.default()
+                post_processors.append(self._derive)
+        self.post_processors = post_processors
+
+        concurrency = self.settings.api.max_concurrent_requests
+        stages = [Stage("generate", self._generate, generate_workers or concurrency, queue_size)]
+        if self.analyzer:
+            stages.append(Stage("qa", self._check_quality, qa_workers, queue_size))
+        stages.append(Stage("adetailer", self._enhance, adetailer_workers or concurrency, queue_size))
+        if self.post_processors:
+            stages.append(Stage("postprocess", self._post_process, post_workers, queue_size))
+        self.pipeline = Pipeline(stages)
+
+    def run(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[PipelineItem]:
+        """Stream jobs (keyword arguments for the generate callable) through the pipeline."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        capture = _OutputCapture()
+        self.generator.add_output_hook(capture)
+        self.adetailer.add_output_hook(capture)
+        # Derivatives of enhanced images come from the post-process stage instead
+        detached = self._derivatives if self._derivatives in self.adetailer.output_hooks else None
+        if detached:
+            self.adetailer.remove_output_hook(detached)
+        self._capture = capture
+        try:
+            yield from self.pipeline.run(PipelineItem(index, dict(job)) for index, job in enumerate(jobs))
+        finally:
+            self.generator.remove_output_hook(capture)
+            self.adetailer.remove_output_hook(capture)
+            if detached:
+                self.adetailer.add_output_hook(detached)
+            self.generator.wait_for_writes()
+            self.adetailer.wait_for_writes()
+            stats = self.pipeline.stats
+            first = stats.get("first_output_seconds")
+            logger.info(f"Pipeline finished: {stats.get('items', 0)} images in {stats.get('elapsed_seconds', 0):.1f}s"
+                        + (f", first enhanced image after {first:.1f}s" if first is not None else ""))
+
+    def run_batch(
+        self,
+        count: int,
+        start_seed: Optional[int] = None,
+        custom_prompt: Optional[str] = None,
+        spec: Optional[GenerationSpec] = None
+    ) -> List[PipelineItem]:
+        """Generate and enhance count images with consecutive seeds (EnhancedFluxGenerator jobs)."""
+        start_seed = start_seed or self.settings.generation.default_seed
+        jobs = ({"seed": start_seed + i, "custom_prompt": custom_prompt, "spec": spec} for i in range(count))
+        items = sorted(self.run(jobs), key=lambda item: item.index)
+        done = sum(1 for item in items if item.status == "done")
+        logger.info(f"Pipeline batch completed: {done}/{count} images enhanced")
+        return items
+
+    def _generate(self, item: PipelineItem) -> bool:
+        path = self.generate(**item.params)
+        if not path:
+            item.status = "failed"
+            item.reasons.append("generation failed")
+            return False
+        record, data = self._capture.pop(path)
+        item.path = item.source_path = path
+        item.record = record
+        # Without output hooks firing (no bytes captured) fall back to the written file
+        item.image_data = data if data is not None else self._read(path)
+        return True
+
+    def _read(self, path: Path) -> bytes:
+        self.generator.wait_for_writes()
+        return path.read_bytes()
+
+    def _check_quality(self, item: PipelineItem) -> bool:
+        item.quality = self.analyzer.score_bytes(item.image_data)
+        reasons = self.analyzer.thresholds.failures(item.quality) if item.quality else ["unreadable"]
+        if self.settings.storage.catalog and item.quality:
+            Catalog.default().merge_metadata({
+                item.path: {"qa": {**item.quality.to_dict(), "passed": not reasons, "reasons": reasons}}
+            })
+        if reasons:
+            logger.info(f"Skipping {item.path.name}: {', '.join(reasons)}")
+            item.reasons.extend(reasons)
+            return False
+        return True
+
+    def _enhance(self, item: PipelineItem) -> bool:
+        prepared = self.adetailer._prepare_image_data(item.path, item.image_data)
+        path = self.adetailer._process_prepared_image(
+            prepared,
+            self.output_dir,
+            self.output_suffix,
+            self.use_adetailer,
+            self.adetailer_settings
+        )
+        if not path:
+            item.status = "failed"
+            item.reasons.append("adetailer failed")
+            return False
+        record, data = self._capture.pop(path)
+        item.path = path
+        item.record = record or item.record
+        item.image_data = data
+        return True
+
+    def _post_process(self, item: PipelineItem) -> bool:
+        for processor in self.post_processors:
+            processor(item)
+        return True
+
+    def _derive(self, item: PipelineItem) -> None:
+        """Queue derivatives of the enhanced image, waiting for a free worker slot (backpressure)."""
+        metadata = item.record.to_dict() if item.record else None
+        self._derivatives.submit(item.path, item.image_data, metadata, block=True)
@@ -0,0 +1,78 @@
+"""
+Generation records for FLUX Image Generator.
+
+A GenerationRecord describes one saved output: where it was written,
+the request that produced it and any generator-specific metadata
+(style, aspect, quality, rotation angle, adetailer source image). It
+is passed to output hooks such as dataset shard writers and catalogs.
+"""
+
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from ..api.models import GenerationRequest
+
+
+@dataclass
+class GenerationRecord:
+    """Metadata for one generated image."""
+    path: Path
+    generator: str
+    prompt: str
+    seed: int
+    aspect_ratio: str
+    output_format: str
+    digest: Optional[str] = None
+    size: int = 0
+    request_id: Optional[str] = None
+    latency: float = 0.0  # seconds spent in the API call
+    created_at: float = field(default_factory=time.time)
+    source_path: Optional[Path] = None  # input image for derived outputs (e.g. adetailer)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_request(
+        cls,
+        request: GenerationRequest,
+        output_path: Path,
+        generator: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> "GenerationRecord":
+        """Build a record from the request that produced an output."""
+        metadata = dict(metadata or {})
+        source_path = metadata.pop("source_path", None)
+        if request.adetailer:
+            metadata.setdefault("adetailer", request.adetailer)
+        return cls(
+            path=output_path,
+            generator=generator,
+            prompt=request.prompt,
+            seed=request.seed,
+            aspect_ratio=request.aspect_ratio,
+            output_format=request.output_format,
+            source_path=Path(source_path) if source_path else None,
+            metadata=metadata,
+            **kwargs
+        )
+
+    @property
+    def style(self) -> Optional[str]:
+        return self.metadata.get("style")
+
+    @property
+    def aspect(self) -> Optional[str]:
+        return self.metadata.get("aspect")
+
+    @property
+    def quality(self) -> Optional[str]:
+        return self.metadata.get("quality")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert record to a JSON-serializable dictionary."""
+        data = asdict(self)
+        data["path"] = str(self.path)
+        data["source_path"] = str(self.source_path) if self.source_path else None
+        return data
@@ -7,10 +7,14 @@ and perspectives, creating a 360-degree view of the character.
 
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable
 from enum import Enum
 
 from .base import BaseGenerator
+from .scheduler import DagScheduler, DagJob
+from ..processing.consistency import ConsistencyScorer
+from ..processing.grid import GridRenderer
+from ..storage.catalog import Catalog
 from ..utils.logger import get_logger
 from ..utils.image import ImageUtils
 
@@ -33,6 +37,18 @@ class RotationAngle(Enum):
     PROFILE_RIGHT = "profile_right"
 
 
+# Angles conditioned on an earlier angle's output (when that angle is part of the run);
+# all others start from the input image
+ROTATION_DEPENDENCIES: Dict[str, str] = {
+    RotationAngle.LEFT.value: RotationAngle.THREE_QUARTER_LEFT.value,
+    RotationAngle.RIGHT.value: RotationAngle.THREE_QUARTER_RIGHT.value,
+    RotationAngle.PROFILE_LEFT.value: RotationAngle.THREE_QUARTER_LEFT.value,
+    RotationAngle.PROFILE_RIGHT.value: RotationAngle.THREE_QUARTER_RIGHT.value,
+    RotationAngle.BACK_LEFT.value: RotationAngle.LEFT.value,
+    RotationAngle.BACK_RIGHT.value: RotationAngle.RIGHT.value,
+}
+
+
 class CharacterRotationGenerator(BaseGenerator):
     """Generator for character rotation images."""
     
@@ -42,6 +58,7 @@ class CharacterRotationGenerator(BaseGenerator):
         
         # Rotation angle configurations
         self.rotation_prompts = self._create_rotation_prompts()
+        self.last_consistency: Dict[str, Optional[float]] = {}
         
         logger.info(f"Rotation generator initialized with {len(self.rotation_prompts)} rotation angles")
     
@@ -138,9 +155,10 @@ class CharacterRotationGenerator(BaseGenerator):
         angle: str,
         seed: Optional[int] = None,
         custom_prompt: Optional[str] = None,
-        use_preset: bool = True
+        use_preset: bool = True,
+        source_image: Optional[Path] = None
     ) -> Optional[Path]:
-        """Generate a single rotation image."""
+        """Generate a single rotation image, from source_image (e.g. another angle) instead of the input image."""
         if angle not in self.rotation_prompts:
             available = list(self.rotation_prompts.keys())
             raise ValueError(f"Unknown rotation angle: {angle}. Available: {available}")
@@ -148,7 +166,8 @@ class CharacterRotationGenerator(BaseGenerator):
         seed = seed or self.settings.generation.default_seed
         rotation_info = self.rotation_prompts[angle]
         
-        logger.info(f"Generating rotation image: {angle} with seed {seed}")
+        logger.info(f"Generating rotation image: {angle} with seed {seed}"
+                    + (f" from {source_image.name}" if source_image else ""))
         
         try:
             if use_preset and "preset" in rotation_info:
@@ -177,6 +196,10 @@ class CharacterRotationGenerator(BaseGenerator):
                     "scheduler": "euler_a"
                 }
             
+            metadata = {"angle": angle, "preset": rotation_info.get("preset") if use_preset else None}
+            if source_image:
+                metadata["source_path"] = str(source_image)
+            
             # Use base class method for generation
             return super().generate_single_image(
                 prompt=prompt,
@@ -184,6 +207,8 @@ class CharacterRotationGenerator(BaseGenerator):
                 aspect_ratio="2:3",  # Portrait for rotation
                 output_format="jpeg",
                 base_name=f"rotation_{angle}",
+                metadata=metadata,
+                source_image=source_image,
                 **quality_settings
             )
                 
@@ -197,9 +222,20 @@ class CharacterRotationGenerator(BaseGenerator):
         base_prompt: str = "portrait of a woman",
         start_seed: Optional[int] = None,
         use_presets: bool = True,
-        delay_between_requests: int = 3
+        delay_between_requests: int = 3,
+        consistency_check: Optional[bool] = None,
+        min_consistency: Optional[float] = None,
+        max_retries: Optional[int] = None
     ) -> Dict[str, Optional[Path]]:
-        """Generate rotation sequence with character consistency."""
+        """
+        Generate rotation sequence with character consistency.
+
+        With the consistency check on, every angle is scored against the input
+        image and angles scoring below min_consistency (or failed ones) are
+        regenerated with new seeds, up to max_retries times; the best-scoring
+        image of each angle is kept. Check, threshold and retries default to
+        the qa settings; scores are left in last_consistency.
+        """
         angles = angles or list(self.rotation_prompts.keys())
         start_seed = start_seed or self.settings.generation.default_seed
         
@@ -237,17 +273,177 @@ class CharacterRotationGenerator(BaseGenerator):
                 logger.error(f"Error in rotation generation {i + 1}/{len(angles)}: {e}")
                 results[angle] = None
         
+        self.wait_for_writes()
+        qa = self.settings.qa
+        if qa.consistency_check if consistency_check is None else consistency_check:
+            results = self._regenerate_inconsistent(
+                results,
+                base_prompt=base_prompt,
+                next_seed=start_seed + len(angles),
+                use_presets=use_presets,
+                delay_between_requests=delay_between_requests,
+                threshold=qa.min_consistency if min_consistency is None else min_consistency,
+                retries=qa.consistency_retries if max_retries is None else max_retries
+            )
+            successful_count = sum(1 for path in results.values() if path)
+        
         logger.info(f"Rotation sequence completed: {successful_count}/{len(angles)} images generated")
         return results
     
+    def _regenerate_inconsistent(
+        self,
+        results: Dict[str, Optional[Path]],
+        base_prompt: str,
+        next_seed: int,
+        use_presets: bool,
+        delay_between_requests: int,
+        threshold: float,
+        retries: int,
+        sources: Optional[Dict[str, Optional[str]]] = None
+    ) -> Dict[str, Optional[Path]]:
+        """
+        Score angles against the input image and regenerate those below the threshold.
+
+        sources maps an angle to the angle whose (kept) output it is regenerated from.
+        """
+        try:
+            scorer = ConsistencyScorer.from_settings(self.input_image)
+        except ValueError as e:
+            logger.warning(f"Consistency check skipped: {e}")
+            return results
+        
+        best: Dict[str, Tuple[Optional[float], Optional[Path]]] = {angle: (None, path) for angle, path in results.items()}
+        candidates = {angle: path for angle, path in results.items() if path}
+        all_scores: Dict[Path, float] = {}
+        for attempt in range(retries + 1):
+            scores = scorer.score_files(list(candidates.values()))
+            all_scores.update(scores)
+            for angle, path in candidates.items():
+                score = scores.get(path)
+                if score is not None and (best[angle][0] is None or score > best[angle][0]):
+                    best[angle] = (score, path)
+            
+            low = [angle for angle, (score, _) in best.items() if score is None or score < threshold]
+            if not low:
+                break
+            if attempt == retries:
+                logger.warning(f"Angles still below consistency {threshold} after {retries} retries: {', '.join(low)}")
+                break
+            
+            logger.info(f"Regenerating {len(low)} angles below consistency {threshold} "
+                        f"(attempt {attempt + 1}/{retries}): {', '.join(low)}")
+            candidates = {}
+            for angle in low:
+                time.sleep(delay_between_requests)
+                parent = (sources or {}).get(angle)
+                path = self.generate_single_rotation(
+                    angle=angle,
+                    seed=next_seed,
+                    custom_prompt=base_prompt,
+                    use_preset=use_presets,
+                    source_image=best[parent][1] if parent else None
+                )
+                next_seed += 1
+                if path:
+                    candidates[angle] = path
+            self.wait_for_writes()
+        
+        self.last_consistency = {angle: score for angle, (score, _) in best.items()}
+        logger.info("Consistency: " + ", ".join(
+            f"{angle} {score:.2f}" if score is not None else f"{angle} n/a"
+            for angle, score in self.last_consistency.items()
+        ))
+        if self.settings.storage.catalog and all_scores:
+            kept = {path for _, path in best.values()}
+            Catalog.default().merge_metadata({
+                path: {"consistency": {"score": round(score, 4), "kept": path in kept}}
+                for path, score in all_scores.items()
+            })
+        return {angle: path for angle, (_, path) in best.items()}
+    
+    def generate_rotation_graph(
+        self,
+        angles: Optional[List[str]] = None,
+        dependencies: Optional[Dict[str, Optional[str]]] = None,
+        base_prompt: str = "portrait of a woman",
+        start_seed: Optional[int] = None,
+        use_presets: bool = True,
+        max_workers: Optional[int] = None,
+        consistency_check: Optional[bool] = None,
+        on_result: Optional[Callable[[str, Optional[Path]], None]] = None
+    ) -> Dict[str, Optional[Path]]:
+        """
+        Generate a rotation set as a dependency graph, running independent angles in parallel.
+        
+        Args:
+            angles: Angles to generate (default: all)
+            dependencies: Angle -> angle whose output it is generated from, or None for the
+                input image (default: ROTATION_DEPENDENCIES); parents outside `angles` are ignored
+            base_prompt: Prompt prepended to each angle prompt
+            start_seed: Seed of the first angle; angle i uses start_seed + i
+            use_presets: Use rotation presets
+            max_workers: Concurrent requests (default: settings.api.max_concurrent_requests)
+            consistency_check: Score and regenerate drifting angles (default: qa settings)
+            on_result: Called with (angle, path) as each angle finishes
+            
+        Returns:
+            Angle -> output path (None if failed), in angle order
+        """
+        angles = angles or list(self.rotation_prompts.keys())
+        for angle in angles:
+            self.get_rotation_info(angle)
+        start_seed = start_seed or self.settings.generation.default_seed
+        dependencies = ROTATION_DEPENDENCIES if dependencies is None else dependencies
+        parents = {angle: dependencies.get(angle) if dependencies.get(angle) in angles else None for angle in angles}
+        jobs = [DagJob(angle, depends_on=parents[angle], params={"seed": start_seed + i}) for i, angle in enumerate(angles)]
+        max_workers = max(1, max_workers or self.settings.api.max_concurrent_requests)
+        
+        levels = sum(1 for parent in parents.values() if parent)
+        logger.info(f"Generating rotation graph: {len(angles)} angles, {levels} conditioned on other angles, "
+                    f"{max_workers} concurrent requests")
+        
+        def run(job: DagJob, parent_output: Optional[Path]) -> Optional[Path]:
+            # Conditioned angles need their parent's file on disk before it is read
+            if parent_output:
+                self.wait_for_writes()
+            return self.generate_single_rotation(
+                angle=job.name,
+                seed=job.params["seed"],
+                custom_prompt=base_prompt,
+                use_preset=use_presets,
+                source_image=parent_output
+            )
+        
+        callback = (lambda job, output: on_result(job.name, output)) if on_result else None
+        results = DagScheduler(max_workers).run(jobs, run, on_result=callback)
+        self.wait_for_writes()
+        
+        qa = self.settings.qa
+        if qa.consistency_check if consistency_check is None else consistency_check:
+            results = self._regenerate_inconsistent(
+                results,
+                base_prompt=base_prompt,
+                next_seed=start_seed + len(angles),
+                use_presets=use_presets,
+                delay_between_requests=0,
+                threshold=qa.min_consistency,
+                retries=qa.consistency_retries,
+                sources=parents
+            )
+        
+        successful_count = sum(1 for path in results.values() if path)
+        logger.info(f"Rotation graph completed: {successful_count}/{len(angles)} images generated")
+        return results
+    
     def generate_360_degree_sequence(
         self,
         steps: int = 8,
         base_prompt: str = "portrait of a woman",
         start_seed: Optional[int] = None,
-        use_presets: bool = True
+        use_presets: bool = True,
+        contact_sheet: bool = False
     ) -> List[Optional[Path]]:
-        """Generate 360-degree rotation sequence with custom steps."""
+        """Generate 360-degree rotation sequence with custom steps, optionally rendering a contact sheet."""
         if steps < 4 or steps > 12:
             raise ValueError("Steps must be between 4 and 12")
         
@@ -280,7 +476,16 @@ class CharacterRotationGenerator(BaseGenerator):
         results = [results_dict.get(angle) for angle in sequence]
         
         successful_count = sum(1 for r in results if r is not None)
+        self.wait_for_writes()
         logger.info(f"360-degree sequence completed: {successful_count}/{steps} images generated")
+        
+        if contact_sheet:
+            GridRenderer().render_sequence(
+                results,
+                self._contact_sheet_path(f"rotation_{steps}_steps"),
+                labels=sequence,
+                title=f"360-degree sequence ({steps} steps)"
+            )
         return results
     
     def get_generator_info(self) -> Dict[str, Any]:
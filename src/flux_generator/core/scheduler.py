@@ -0,0 +1,158 @@
+"""
+Dependency-aware job scheduler for FLUX Image Generator.
+
+Runs a DAG of generation jobs on a thread pool. Each job either starts
+from the original input image or from the output of one parent job;
+jobs whose parent is done become ready immediately, so independent
+branches run in parallel and downstream jobs start as soon as their
+input exists rather than after the whole previous level. Ready jobs
+start in critical-path order: those with the longest chain of
+dependants first.
+"""
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class DagJob:
+    """A job whose input is the original input image or the output of another job."""
+    name: str
+    depends_on: Optional[str] = None  # parent job name; None: the original input image
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+# runner(job, parent output or None for the input image) -> output, or None on failure
+JobRunner = Callable[[DagJob, Optional[Any]], Optional[Any]]
+
+
+class DagScheduler:
+    """Runs DAG jobs with maximum parallelism, streaming children as parents finish."""
+
+    def __init__(self, max_workers: int = 4, fallback_to_input: bool = True):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_workers: Jobs running at the same time
+            fallback_to_input: When a parent fails, run its children from the input
+                image instead of failing them
+        """
+        self.max_workers = max(1, max_workers)
+        self.fallback_to_input = fallback_to_input
+
+    @staticmethod
+    def validate(jobs: List[DagJob]) -> List[str]:
+        """Check names and dependencies; returns job names in a topological order."""
+        by_name: Dict[str, DagJob] = {}
+        for job in jobs:
+            if job.name in by_name:
+                raise ValueError(f"Duplicate job: {job.name}")
+            by_name[job.name] = job
+        for job in jobs:
+            if job.depends_on is not None and job.depends_on not in by_name:
+                raise ValueError(f"Job {job.name} depends on unknown job {job.depends_on}")
+
+        order: List[str] = []
+        ready = [job.name for job in jobs if job.depends_on is None]
+        children = DagScheduler._children(jobs)
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            ready.extend(children.get(name, []))
+        if len(order) != len(jobs):
+            cyclic = sorted(set(by_name) - set(order))
+            raise ValueError(f"Dependency cycle between jobs: {', '.join(cyclic)}")
+        return order
+
+    @staticmethod
+    def _heights(jobs: List[DagJob], children: Dict[str, List[str]]) -> Dict[str, int]:
+        """Length of the longest chain of dependants below each job."""
+        heights: Dict[str, int] = {}
+        for name in reversed(DagScheduler.validate(jobs)):
+            heights[name] = 1 + max((heights[child] for child in children.get(name, [])), default=0)
+        return heights
+
+    @staticmethod
+    def _children(jobs: List[DagJob]) -> Dict[str, List[str]]:
+        children: Dict[str, List[str]] = {}
+        for job in jobs:
+            if job.depends_on is not None:
+                children.setdefault(job.depends_on, []).append(job.name)
+        return children
+
+    def run(
+        self,
+        jobs: List[DagJob],
+        runner: JobRunner,
+        on_result: Optional[Callable[[DagJob, Optional[Any]], None]] = None
+    ) -> Dict[str, Optional[Any]]:
+        """
+        Run all jobs, each as soon as its parent has finished.
+
+        Args:
+            jobs: Jobs to run; ties in critical-path order keep list order
+            runner: Callable producing a job's output from its parent's output
+            on_result: Called (from the scheduling thread) as each job finishes
+
+        Returns:
+            Job name -> output (None for failed or skipped jobs), in job list order
+        """
+        by_name = {job.name: job for job in jobs}
+        children = self._children(jobs)
+        heights = self._heights(jobs, children)
+        position = {job.name: i for i, job in enumerate(jobs)}
+        results: Dict[str, Optional[Any]] = {}
+        ready: List[Tuple[int, int, str, Optional[Any]]] = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag") as pool:
+            in_flight: Dict[Future, DagJob] = {}
+
+            def submit(job: DagJob, parent_output: Optional[Any]) -> None:
+                heapq.heappush(ready, (-heights[job.name], position[job.name], job.name, parent_output))
+
+            def skip(job: DagJob) -> None:
+                results[job.name] = None
+                logger.warning(f"Skipping job {job.name}: parent {job.depends_on} failed")
+                for child in children.get(job.name, []):
+                    skip(by_name[child])
+
+            for job in jobs:
+                if job.depends_on is None:
+                    submit(job, None)
+
+            while ready or in_flight:
+                while ready and len(in_flight) < self.max_workers:
+                    _, _, name, parent_output = heapq.heappop(ready)
+                    job = by_name[name]
+                    logger.debug(f"Starting job {name}" + (f" from {job.depends_on}" if parent_output else ""))
+                    in_flight[pool.submit(runner, job, parent_output)] = job
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        logger.error(f"Job {job.name} failed: {e}")
+                        output = None
+                    results[job.name] = output
+                    if on_result:
+                        on_result(job, output)
+
+                    for child in children.get(job.name, []):
+                        if output is not None:
+                            submit(by_name[child], output)
+                        elif self.fallback_to_input:
+                            logger.warning(f"Job {child} falls back to the input image: parent {job.name} failed")
+                            submit(by_name[child], None)
+                        else:
+                            skip(by_name[child])
+
+        return {job.name: results.get(job.name) for job in jobs}
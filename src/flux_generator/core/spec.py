@@ -0,0 +1,77 @@
+"""
+Generation Specifications for FLUX Image Generator.
+
+This module provides an immutable, hashable description of a single
+generation configuration (style, aspect, quality, prompt). Specs are
+passed per call, so one generator instance can serve concurrent jobs and
+specs can be used directly as cache keys.
+"""
+
+from dataclasses import dataclass, replace, asdict
+from functools import lru_cache
+from typing import Optional, Dict, Any
+
+from ..config.prompts import PromptConfig
+
+
+@dataclass(frozen=True)
+class GenerationSpec:
+    """Immutable per-call generation configuration."""
+    style: str = "safe_realistic"
+    aspect: str = "portrait"
+    quality: str = "safe"
+    custom_prompt: Optional[str] = None
+
+    def __post_init__(self):
+        """Validate spec values against the prompt configuration."""
+        if self.style not in PromptConfig.PROMPTS:
+            available = list(PromptConfig.PROMPTS.keys())
+            raise ValueError(f"Unknown style: {self.style}. Available: {available}")
+
+        if self.aspect not in PromptConfig.ASPECT_RATIOS:
+            available = list(PromptConfig.ASPECT_RATIOS.keys())
+            raise ValueError(f"Unknown aspect: {self.aspect}. Available: {available}")
+
+        if self.quality not in PromptConfig.QUALITY_SETTINGS:
+            available = list(PromptConfig.QUALITY_SETTINGS.keys())
+            raise ValueError(f"Unknown quality: {self.quality}. Available: {available}")
+
+    def with_changes(self, **changes) -> "GenerationSpec":
+        """Return a copy of the spec with the given fields replaced."""
+        return replace(self, **changes)
+
+    def get_prompt_config(self) -> Dict[str, Any]:
+        """Get the resolved prompt configuration for this spec."""
+        config = _resolve_prompt_config(self.style, self.aspect, self.quality)
+        return {**config, "quality_settings": dict(config["quality_settings"])}
+
+    @property
+    def prompt(self) -> str:
+        """Prompt used for generation (custom prompt takes precedence)."""
+        return self.custom_prompt or _resolve_prompt_config(self.style, self.aspect, self.quality)["prompt"]
+
+    @property
+    def aspect_ratio(self) -> str:
+        """API aspect ratio string for this spec."""
+        return PromptConfig.ASPECT_RATIOS[self.aspect]
+
+    @property
+    def base_name(self) -> str:
+        """Base filename used for images generated from this spec."""
+        return f"{self.style}_woman"
+
+    def get_quality_params(self) -> Dict[str, Any]:
+        """Get API quality parameters without descriptive fields."""
+        quality_settings = dict(PromptConfig.QUALITY_SETTINGS[self.quality])
+        quality_settings.pop("description", None)
+        return quality_settings
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert spec to dictionary."""
+        return asdict(self)
+
+
+@lru_cache(maxsize=None)
+def _resolve_prompt_config(style: str, aspect: str, quality: str) -> Dict[str, Any]:
+    """Resolve and cache prompt configuration for a style/aspect/quality triple."""
+    return PromptConfig.get_prompt_config(style, aspect, quality)
@@ -0,0 +1,518 @@
+"""
+Multi-process worker pool for FLUX Image Generator.
+
+One process runs out of CPU on JSON, base64 and image work long before
+the API is saturated. WorkerPool stores a batch in the SQLite job store
+and starts N processes that each run several threads claiming jobs from
+it, so work (seed ranges, variation cells, input characters) is shared
+out dynamically rather than in fixed slices. All processes draw from one
+RateLimiter created by the parent, so the API budget is the same as for
+a single process. Results are read back from the job store into the
+return structures of the single-process methods.
+
+The same store can be served by several machines: one node submits a
+batch to a database on a shared filesystem and every node runs
+serve() on it. Claims are leased and renewed by heartbeats, so jobs of
+a node that dies are taken over by the others once the lease expires.
+Output names derive from style and seed and files are written by
+atomic rename, so a job run twice leaves one equivalent file. The rate
+limit is per node.
+
+Jobs are JSON payloads:
+
+* ``{"kind": "enhanced", "seed", "style", "aspect", "quality",
+  "custom_prompt", "source_image", "output_dir", "metadata"}``
+* ``{"kind": "rotation", "angle", "seed", "custom_prompt", "use_preset"}``
+"""
+
+import atexit
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable
+
+from .spec import GenerationSpec
+from .characters import discover_characters
+from ..api.ratelimit import RateLimiter
+from ..config.prompts import PromptConfig
+from ..config.settings import settings
+from ..storage.jobs import JobStore, PENDING, RUNNING, DONE, FAILED
+from ..storage.shards import ShardWriter
+from ..storage.tensors import TensorExport
+from ..utils.logger import get_logger, log_context
+
+logger = get_logger(__name__)
+
+_PROGRESS_INTERVAL = 5.0  # seconds between progress reports of the parent
+
+
+def enhanced_payload(spec: GenerationSpec, seed: int, custom_prompt: Optional[str] = None) -> Dict[str, Any]:
+    """Job payload for one EnhancedFluxGenerator image."""
+    return {
+        "kind": "enhanced",
+        "seed": seed,
+        "style": spec.style,
+        "aspect": spec.aspect,
+        "quality": spec.quality,
+        "custom_prompt": custom_prompt or spec.custom_prompt,
+    }
+
+
+def rotation_payload(angle: str, seed: int, custom_prompt: Optional[str] = None, use_preset: bool = True) -> Dict[str, Any]:
+    """Job payload for one CharacterRotationGenerator angle."""
+    return {"kind": "rotation", "angle": angle, "seed": seed, "custom_prompt": custom_prompt, "use_preset": use_preset}
+
+
+class JobExecutor:
+    """Runs job payloads with one generator per kind, created on first use."""
+
+    def __init__(self, api_client=None):
+        """Initialize executor; generators share api_client if given."""
+        self.api_client = api_client
+        self._generators: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def generator(self, kind: str):
+        """Generator for a job kind."""
+        with self._lock:
+            if kind not in self._generators:
+                if kind == "enhanced":
+                    from .enhanced import EnhancedFluxGenerator
+                    generator = EnhancedFluxGenerator()
+                elif kind == "rotation":
+                    from .rotation import CharacterRotationGenerator
+                    generator = CharacterRotationGenerator()
+                else:
+                    raise ValueError(f"Unknown job kind: {kind}")
+                if self.api_client is not None:
+                    generator.api_client = self.api_client
+                self._generators[kind] = generator
+            return self._generators[kind]
+
+    def run(self, payload: Dict[str, Any]) -> Optional[Path]:
+        """Execute one job; returns the output path or None on failure."""
+        kind = payload.get("kind", "enhanced")
+        generator = self.generator(kind)
+        if kind == "rotation":
+            return generator.generate_single_rotation(
+                angle=payload["angle"],
+                seed=payload.get("seed"),
+                custom_prompt=payload.get("custom_prompt"),
+                use_preset=payload.get("use_preset", True)
+            )
+        spec = GenerationSpec(
+            style=payload.get("style", generator.default_spec.style),
+            aspect=payload.get("aspect", generator.default_spec.aspect),
+            quality=payload.get("quality", generator.default_spec.quality),
+            custom_prompt=payload.get("custom_prompt")
+        )
+        source_image = payload.get("source_image")
+        output_dir = payload.get("output_dir")
+        return generator.generate_single_image(
+            seed=payload.get("seed"),
+            spec=spec,
+            source_image=Path(source_image) if source_image else None,
+            output_dir=Path(output_dir) if output_dir else None,
+            metadata=payload.get("metadata")
+        )
+
+    def wait_for_writes(self) -> None:
+        """Wait for the generators' queued writes."""
+        with self._lock:
+            generators = list(self._generators.values())
+        for generator in generators:
+            generator.wait_for_writes()
+
+    def close(self) -> None:
+        """Wait for the generators' queued writes."""
+        self.wait_for_writes()
+
+
+class QueueWorker:
+    """Claims jobs from a JobStore on several threads, renewing their leases while they run."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        batch: Optional[str] = None,
+        threads: int = 1,
+        name: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        executor: Optional[JobExecutor] = None
+    ):
+        """
+        Initialize worker.
+
+        Args:
+            store: Job store shared with the other workers
+            batch: Batch to work on (None: every batch in the store)
+            threads: Jobs run at once
+            name: Worker name recorded on claims (default: host:pid)
+            lease_seconds: Claim lease (default: generation.job_lease_seconds)
+            heartbeat_interval: Lease renewal interval (default: generation.job_heartbeat_interval)
+            max_attempts: Claims per job (default: generation.job_max_attempts)
+            executor: Runs the payloads (default: a new JobExecutor)
+        """
+        generation = settings.generation
+        self.store = store
+        self.batch = batch
+        self.threads = max(1, threads)
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds or generation.job_lease_seconds
+        self.heartbeat_interval = min(heartbeat_interval or generation.job_heartbeat_interval, self.lease_seconds / 3)
+        self.max_attempts = max_attempts or generation.job_max_attempts
+        self.executor = executor or JobExecutor()
+        self.processed = 0
+        self._claims: Dict[int, str] = {}  # job id -> claiming thread's worker name
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, wait: bool = False, idle_interval: float = 1.0) -> int:
+        """
+        Work until nothing is left to claim; returns the number of jobs finished here.
+
+        Jobs still running elsewhere keep the worker polling, so it can take
+        them over if their lease expires. With wait set it keeps polling for
+        new batches until stop() is called.
+        """
+        heartbeat = threading.Thread(target=self._heartbeat, name=f"{self.name}-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{self.name}/{i}", wait, idle_interval), name=f"worker-{i}")
+            for i in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop.set()
+            heartbeat.join()
+            self.executor.close()
+        return self.processed
+
+    def stop(self) -> None:
+        """Finish the running jobs and return from run()."""
+        self._stop.set()
+
+    def _loop(self, worker: str, wait: bool, idle_interval: float) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim(self.batch, worker, self.lease_seconds, self.max_attempts)
+            if job is None:
+                if not wait and not self.store.counts(self.batch).get(RUNNING):
+                    return
+                self._stop.wait(min(idle_interval, self.lease_seconds))
+                continue
+            with self._lock:
+                self._claims[job.id] = worker
+            try:
+                with log_context(job=job.id, batch=job.batch, attempt=job.attempts):
+                    path = self.executor.run(job.payload)
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                path = None
+                error = str(e)
+            else:
+                error = "generation failed"
+            finally:
+                with self._lock:
+                    self._claims.pop(job.id, None)
+            if path:
+                finished = self.store.complete(job.id, str(path), worker=worker)
+            else:
+                finished = self.store.fail(job.id, error, worker=worker)
+            if finished:
+                with self._lock:
+                    self.processed += 1
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                claims = dict(self._claims)
+            if not claims:
+                continue
+            for job_id in self.store.renew(claims, self.lease_seconds):
+                logger.warning(f"Lost the lease of job {job_id}; its result will be discarded")
+
+
+def _configure_worker(index: int) -> None:
+    """Give each worker process its own shard files; tensor export is left to the parent."""
+    storage = settings.storage
+    if storage.shard_export:
+        with ShardWriter._default_lock:
+            # Host and index in the prefix keep shard names unique across processes and nodes
+            ShardWriter._default = ShardWriter(
+                output_dir=settings.paths.output_dir / "shards",
+                prefix=f"shard-{socket.gethostname()}-w{index:02d}",
+                max_shard_bytes=storage.shard_max_bytes,
+                max_shard_samples=storage.shard_max_samples
+            )
+            atexit.register(ShardWriter._default.close)
+    # A single memory-mapped export cannot take appends from several processes
+    storage.tensor_export = False
+
+
+def _worker_main(
+    index: int,
+    db_path: str,
+    batch: Optional[str],
+    limiter: RateLimiter,
+    threads: int,
+    wait: bool,
+    initializer: Optional[Callable[[], None]]
+) -> None:
+    """Worker process: run a QueueWorker until the batch (or queue) is drained."""
+    if initializer:
+        initializer()
+    RateLimiter.set_default(limiter)
+    _configure_worker(index)
+    store = JobStore.open(Path(db_path)) if db_path else JobStore.open()
+    worker = QueueWorker(store, batch=batch, threads=threads)
+    try:
+        worker.run(wait=wait)
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        store.close()
+
+
+class WorkerPool:
+    """Runs generation batches on several processes sharing one rate limit and job store."""
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        threads_per_process: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        store_path: Optional[Path] = None,
+        start_method: str = "spawn",
+        initializer: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialize pool.
+
+        Args:
+            processes: Worker processes (default: generation.worker_processes, or the CPU count)
+            threads_per_process: Concurrent jobs per process (default: api.max_concurrent_requests)
+            requests_per_second: Shared submission rate (default: api.requests_per_second)
+            burst: Shared burst allowance (default: api.rate_limit_burst)
+            max_in_flight: Shared cap on running generations (default: api.max_in_flight)
+            store_path: Job database, possibly shared with other nodes
+                (default: generation.job_queue, or output/jobs.sqlite)
+            start_method: multiprocessing start method; "spawn" gives workers fresh
+                database connections and writer threads
+            initializer: Picklable callable run first in every worker process
+        """
+        api = settings.api
+        self.processes = max(1, processes or settings.generation.worker_processes or os.cpu_count() or 1)
+        self.threads_per_process = max(1, threads_per_process or api.max_concurrent_requests)
+        self.context = multiprocessing.get_context(start_method)
+        self.limiter = RateLimiter(
+            api.requests_per_second if requests_per_second is None else requests_per_second,
+            api.rate_limit_burst if burst is None else burst,
+            api.max_in_flight if max_in_flight is None else max_in_flight,
+            context=self.context
+        )
+        self.store_path = store_path
+        self.initializer = initializer
+        self.last_batch: Optional[str] = None
+
+    def open_store(self) -> JobStore:
+        """Open the pool's job store."""
+        return JobStore.open(self.store_path)
+
+    def submit(self, payloads: List[Dict[str, Any]]) -> str:
+        """Store job payloads as a new batch for this or any other node's workers; returns the batch id."""
+        store = self.open_store()
+        try:
+            self.last_batch = store.create_batch(payloads)
+        finally:
+            store.close()
+        return self.last_batch
+
+    def serve(self, batch: Optional[str] = None, wait: bool = False) -> Dict[str, int]:
+        """
+        Work on a batch (or on every batch in the store) with this node's processes.
+
+        Returns when nothing is left pending or running anywhere, or - with
+        wait set - on interrupt. Other nodes may serve the same store at
+        the same time. Returns the final job counts per status.
+        """
+        store = self.open_store()
+        counts = store.counts(batch)
+        processes = self.processes if wait else max(1, min(self.processes, counts.get(PENDING, 0)))
+        logger.info(f"Worker pool: {counts.get(PENDING, 0)} pending jobs on {processes} processes x "
+                    f"{self.threads_per_process} threads")
+
+        started = time.monotonic()
+        workers = [
+            self.context.Process(
+                target=_worker_main,
+                args=(index, str(self.store_path or ""), batch, self.limiter, self.threads_per_process, wait,
+                      self.initializer),
+                name=f"flux-worker-{index}"
+            )
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=_PROGRESS_INTERVAL / len(workers))
+                counts = store.counts(batch)
+                total = sum(counts.values())
+                finished = counts.get(DONE, 0) + counts.get(FAILED, 0)
+                logger.info(f"Worker pool: {finished}/{total} jobs finished "
+                            f"({counts.get(FAILED, 0)} failed) in {time.monotonic() - started:.0f}s")
+        except KeyboardInterrupt:
+            logger.info("Worker pool interrupted; running jobs will be reclaimed once their leases expire")
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+        crashed = [worker.name for worker in workers if worker.exitcode]
+        if crashed:
+            logger.error(f"Worker processes exited abnormally: {', '.join(crashed)}")
+        counts = store.counts(batch)
+        store.close()
+        leftover = counts.get(PENDING, 0) + counts.get(RUNNING, 0)
+        if leftover:
+            logger.warning(f"{leftover} jobs were not finished by the workers")
+        return counts
+
+    def results(self, batch: str) -> List[Optional[Path]]:
+        """Output paths of a batch in payload order (None for failed jobs)."""
+        store = self.open_store()
+        try:
+            rows = store.results(batch)
+        finally:
+            store.close()
+        return [Path(row["result"]) if row["status"] == DONE and row["result"] else None for row in rows]
+
+    def run(self, payloads: List[Dict[str, Any]]) -> List[Optional[Path]]:
+        """Run job payloads on the worker processes; returns output paths in payload order."""
+        if not payloads:
+            return []
+        started = time.monotonic()
+        batch = self.submit(payloads)
+        self.serve(batch)
+        paths = self.results(batch)
+        if settings.storage.tensor_export:
+            TensorExport.default().append_files(path for path in paths if path)
+        succeeded = sum(1 for path in paths if path)
+        logger.info(f"Worker pool completed: {succeeded}/{len(payloads)} images in {time.monotonic() - started:.1f}s")
+        return paths
+
+    def generate_images(
+        self,
+        count: int,
+        start_seed: Optional[int] = None,
+        custom_prompt: Optional[str] = None,
+        spec: Optional[GenerationSpec] = None
+    ) -> List[Path]:
+        """Multi-process EnhancedFluxGenerator.generate_images: consecutive seeds of one spec."""
+        return [path for path in self.run(self._image_payloads(count, start_seed, custom_prompt, spec)) if path]
+
+    def submit_images(
+        self,
+        count: int,
+        start_seed: Optional[int] = None,
+        custom_prompt: Optional[str] = None,
+        spec: Optional[GenerationSpec] = None
+    ) -> str:
+        """Submit the jobs of generate_images as a batch for serve() on any node; returns the batch id."""
+        return self.submit(self._image_payloads(count, start_seed, custom_prompt, spec))
+
+    def _image_payloads(
+        self,
+        count: int,
+        start_seed: Optional[int],
+        custom_prompt: Optional[str],
+        spec: Optional[GenerationSpec]
+    ) -> List[Dict[str, Any]]:
+        spec = spec or GenerationSpec()
+        start_seed = start_seed or settings.generation.default_seed
+        return [enhanced_payload(spec, start_seed + i, custom_prompt) for i in range(count)]
+
+    def generate_all_variations(
+        self,
+        count_per_variation: int = 1,
+        start_seed: Optional[int] = None,
+        include_styles: Optional[List[str]] = None,
+        include_aspects: Optional[List[str]] = None,
+        include_qualities: Optional[List[str]] = None,
+        custom_prompt: Optional[str] = None
+    ) -> Dict[str, Dict[str, Dict[str, List[Path]]]]:
+        """Multi-process EnhancedFluxGenerator.generate_all_variations, with the same seeds per cell."""
+        start_seed = start_seed or settings.generation.default_seed
+        styles = include_styles or list(PromptConfig.PROMPTS.keys())
+        aspects = include_aspects or list(PromptConfig.ASPECT_RATIOS.keys())
+        qualities = include_qualities or list(PromptConfig.QUALITY_SETTINGS.keys())
+
+        cells = []
+        seed = start_seed
+        for style in styles:
+            for aspect in aspects:
+                for quality in qualities:
+                    cells.append((style, aspect, quality, seed))
+                    seed += count_per_variation
+        payloads = [
+            enhanced_payload(GenerationSpec(style=style, aspect=aspect, quality=quality), cell_seed + i,
+                                   custom_prompt)
+            for style, aspect, quality, cell_seed in cells
+            for i in range(count_per_variation)
+        ]
+        paths = iter(self.run(payloads))
+
+        results: Dict[str, Dict[str, Dict[str, List[Path]]]] = {}
+        for style, aspect, quality, _ in cells:
+            cell = [next(paths) for _ in range(count_per_variation)]
+            results.setdefault(style, {}).setdefault(aspect, {})[quality] = [path for path in cell if path]
+        return results
+
+    def generate_characters(
+        self,
+        styles: Optional[List[str]] = None,
+        count: int = 1,
+        start_seed: Optional[int] = None,
+        custom_prompt: Optional[str] = None,
+        input_dir: Optional[Path] = None
+    ) -> Dict[str, Dict[str, List[Path]]]:
+        """Multi-process MultiCharacterGenerator.generate: {character: {style: [paths]}}."""
+        characters = discover_characters(input_dir or settings.paths.input_dir)
+        styles = styles or [GenerationSpec().style]
+        start_seed = start_seed or settings.generation.default_seed
+        output_root = settings.paths.output_dir / "enhanced"
+
+        keys = []
+        payloads = []
+        for i in range(count):
+            for style in styles:
+                for character in characters:
+                    keys.append((character.name, style))
+                    payload = enhanced_payload(GenerationSpec(style=style), start_seed + i, custom_prompt)
+                    payload.update(
+                        source_image=str(character.path),
+                        output_dir=str(output_root / character.name),
+                        metadata={"character": character.name}
+                    )
+                    payloads.append(payload)
+
+        results: Dict[str, Dict[str, List[Path]]] = {
+            character.name: {style: [] for style in styles} for character in characters
+        }
+        for (name, style), path in zip(keys, self.run(payloads)):
+            if path:
+                results[name][style].append(path)
+        return results
@@ -0,0 +1,14 @@
+"""
+Image post-processing for FLUX Image Generator.
+
+This module contains analysis and post-processing tools for generated images.
+"""
+
+from .dedupe import NearDuplicateFinder, HammingIndex, DuplicateReport
+from .grid import GridRenderer
+from .derivatives import DerivativeProcessor, DerivativeSpec
+from .quality import QualityAnalyzer, QualityScores, QualityThresholds
+from .faces import FacePresenceFilter, FaceCheckReport
+from .consistency import ConsistencyScorer, OnnxEmbedder
+
+__all__ = ["NearDuplicateFinder", "HammingIndex", "DuplicateReport", "GridRenderer", "DerivativeProcessor", "DerivativeSpec", "QualityAnalyzer", "QualityScores", "QualityThresholds", "FacePresenceFilter", "FaceCheckReport", "ConsistencyScorer", "OnnxEmbedder"]
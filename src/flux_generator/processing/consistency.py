@@ -0,0 +1,236 @@
+"""
+Identity-consistency scoring for FLUX Image Generator.
+
+Scores how well each image of a rotation sequence preserves the
+character of the input image. All images are decoded at a small fixed
+size and compared in one NumPy batch:
+
+* colour       joint HSV histogram of the whole image
+* skin         mean tone (Y, Cb, Cr) of skin-coloured pixels, with
+               luminance down-weighted as lighting differs between angles
+* hair         hue/value histogram of non-skin, non-background pixels in
+               the upper part of the image (hair and head wear)
+* embedding    cosine similarity from an optional CPU embedding model
+               (ONNX, through the optional ``onnxruntime`` package)
+
+Regions missing from either image (no skin in a back view, say) are
+left out and the remaining similarities are re-weighted. Scores are in
+0..1, with 1 meaning indistinguishable by these statistics.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Callable, Tuple
+
+import numpy as np
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+ANALYSIS_SIZE = (128, 192)  # width, height (2:3 portrait)
+_HSV_BINS = (8, 4, 4)
+_HAIR_BINS = (12, 3)
+_HAIR_ROWS = 0.45  # hair statistics come from the top part of the image
+_BACKGROUND_DISTANCE = 40.0
+_MIN_REGION = 0.01  # regions smaller than this fraction of the image are ignored
+_MIN_SKIN_LUMA = 60  # darker pixels with skin chroma are mostly brown hair
+_SKIN_LUMA_WEIGHT = 0.25
+_SKIN_TOLERANCE = 12.0  # tone distance at which skin similarity falls to 1/e
+_WEIGHTS = {"color": 0.2, "skin": 0.35, "hair": 0.45, "embedding": 0.6}
+
+Embedder = Callable[[np.ndarray], np.ndarray]  # (N, H, W, 3) uint8 -> (N, D) embeddings
+
+
+def _load_rgb(path: str) -> Optional[np.ndarray]:
+    """Decode an image to a fixed-size uint8 RGB array, using JPEG draft mode."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", ANALYSIS_SIZE)
+            return np.asarray(img.convert("RGB").resize(ANALYSIS_SIZE, Image.Resampling.BILINEAR), dtype=np.uint8)
+    except Exception:
+        return None
+
+
+def _load_job(paths: List[str]) -> List[Optional[np.ndarray]]:
+    """Worker: decode a chunk of files."""
+    return [_load_rgb(path) for path in paths]
+
+
+def _batched_histogram(indices: np.ndarray, weights: np.ndarray, bins: int) -> np.ndarray:
+    """Per-image weighted histograms of (N, P) bin indices in one bincount, normalized to sum 1."""
+    count = len(indices)
+    offsets = (np.arange(count) * bins)[:, None]
+    histogram = np.bincount((indices + offsets).ravel(), weights.ravel(), minlength=count * bins).reshape(count, bins)
+    totals = histogram.sum(axis=1, keepdims=True)
+    return np.divide(histogram, totals, out=np.zeros_like(histogram), where=totals > 0)
+
+
+def extract_features(pixels: np.ndarray) -> Dict[str, np.ndarray]:
+    """Colour, skin and hair statistics for a batch of (N, H, W, 3) uint8 images."""
+    rgb = pixels.astype(np.float32)
+    count, height, width, _ = rgb.shape
+    red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+    # HSV
+    maxc = rgb.max(axis=-1)
+    delta = maxc - rgb.min(axis=-1)
+    safe = np.where(delta > 0, delta, 1)
+    hue = np.select(
+        [maxc == red, maxc == green],
+        [((green - blue) / safe) % 6, (blue - red) / safe + 2],
+        (red - green) / safe + 4
+    ) / 6
+    hue = np.where(delta > 0, hue, 0)
+    saturation = np.where(maxc > 0, delta / np.where(maxc > 0, maxc, 1), 0)
+    value = maxc / 255
+
+    def quantize(values, bins):
+        return np.minimum((values * bins).astype(np.int64), bins - 1)
+
+    h_bins, s_bins, v_bins = _HSV_BINS
+    color_index = (quantize(hue, h_bins) * s_bins + quantize(saturation, s_bins)) * v_bins + quantize(value, v_bins)
+    ones = np.ones((count, height * width), dtype=np.float64)
+    color = _batched_histogram(color_index.reshape(count, -1), ones, h_bins * s_bins * v_bins)
+
+    # Skin: classic YCbCr chroma box
+    luma = 0.299 * red + 0.587 * green + 0.114 * blue
+    cb = 128 - 0.168736 * red - 0.331264 * green + 0.5 * blue
+    cr = 128 + 0.5 * red - 0.418688 * green - 0.081312 * blue
+    skin = (cb >= 77) & (cb <= 127) & (cr >= 133) & (cr <= 173) & (luma >= _MIN_SKIN_LUMA)
+    skin_fraction = skin.mean(axis=(1, 2))
+    skin_pixels = np.maximum(skin.sum(axis=(1, 2)), 1)
+    skin_tone = np.stack([
+        (luma * skin).sum(axis=(1, 2)) * _SKIN_LUMA_WEIGHT,
+        (cb * skin).sum(axis=(1, 2)),
+        (cr * skin).sum(axis=(1, 2)),
+    ], axis=1) / skin_pixels[:, None]
+
+    # Background: pixels close to the median colour of the image border
+    border = np.concatenate([rgb[:, 0], rgb[:, :, 0], rgb[:, :, -1]], axis=1)
+    background_color = np.median(border, axis=1)
+    background = np.linalg.norm(rgb - background_color[:, None, None, :], axis=-1) < _BACKGROUND_DISTANCE
+
+    top = int(height * _HAIR_ROWS)
+    hair = (~skin[:, :top]) & (~background[:, :top])
+    hair_fraction = hair.mean(axis=(1, 2))
+    hue_bins, value_bins = _HAIR_BINS
+    hair_index = quantize(hue[:, :top], hue_bins) * value_bins + quantize(value[:, :top], value_bins)
+    hair_histogram = _batched_histogram(hair_index.reshape(count, -1), hair.reshape(count, -1).astype(np.float64),
+                                        hue_bins * value_bins)
+
+    return {
+        "color": color,
+        "skin_fraction": skin_fraction,
+        "skin_tone": skin_tone,
+        "hair_fraction": hair_fraction,
+        "hair": hair_histogram,
+    }
+
+
+def _bhattacharyya(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Similarity of normalized histograms (1: identical, 0: disjoint)."""
+    return np.sqrt(a * b).sum(axis=-1)
+
+
+class OnnxEmbedder:
+    """Image embeddings from an ONNX model on the CPU (e.g. a face or CLIP image encoder)."""
+
+    def __init__(self, model_path: Path, input_size: Tuple[int, int] = (224, 224)):
+        """Load the model; it must take a float32 NCHW batch with ImageNet normalization."""
+        if onnxruntime is None:
+            raise ImportError("OnnxEmbedder requires the 'onnxruntime' package")
+        self.session = onnxruntime.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_size = input_size
+
+    def __call__(self, pixels: np.ndarray) -> np.ndarray:
+        from PIL import Image
+
+        batch = np.stack([
+            np.asarray(Image.fromarray(image).resize(self.input_size, Image.Resampling.BILINEAR), dtype=np.float32)
+            for image in pixels
+        ]) / 255
+        batch = (batch - np.array([0.485, 0.456, 0.406], dtype=np.float32)) / np.array([0.229, 0.224, 0.225], dtype=np.float32)
+        output = self.session.run(None, {self.input_name: batch.transpose(0, 3, 1, 2)})[0]
+        return output.reshape(len(pixels), -1)
+
+
+class ConsistencyScorer:
+    """Scores images against a reference image of the character."""
+
+    def __init__(
+        self,
+        reference: Path,
+        embedder: Optional[Embedder] = None,
+        processes: Optional[int] = None,
+        chunk_size: int = 16
+    ):
+        """Initialize scorer with the reference (input) image and an optional embedding model."""
+        pixels = _load_rgb(str(reference))
+        if pixels is None:
+            raise ValueError(f"Cannot decode reference image: {reference}")
+        self.reference = reference
+        self.embedder = embedder
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self._reference_pixels = pixels[None]
+        self._reference = extract_features(self._reference_pixels)
+        self._reference_embedding = self._embed(self._reference_pixels) if embedder else None
+
+    @classmethod
+    def from_settings(cls, reference: Path) -> "ConsistencyScorer":
+        """Scorer using the embedding model configured in settings, if any."""
+        from ..config.settings import settings
+        model = settings.qa.embedding_model
+        embedder = None
+        if model:
+            try:
+                embedder = OnnxEmbedder(Path(model))
+            except Exception as e:
+                logger.warning(f"Embedding model unavailable ({e}); scoring with image statistics only")
+        return cls(reference, embedder=embedder)
+
+    def _embed(self, pixels: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(self.embedder(pixels), dtype=np.float32)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-8)
+
+    def _decode(self, paths: List[Path]) -> List[Optional[np.ndarray]]:
+        keys = [str(path) for path in paths]
+        jobs = [keys[i:i + self.chunk_size] for i in range(0, len(keys), self.chunk_size)]
+        if len(jobs) <= 1 or self.processes == 1:
+            return [image for job in jobs for image in _load_job(job)]
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            return [image for chunk in pool.map(_load_job, jobs) for image in chunk]
+
+    def score_files(self, paths: List[Path]) -> Dict[Path, float]:
+        """Consistency score per image; undecodable images are left out."""
+        decoded = self._decode(paths)
+        valid = [(path, image) for path, image in zip(paths, decoded) if image is not None]
+        if not valid:
+            return {}
+        pixels = np.stack([image for _, image in valid])
+        features = extract_features(pixels)
+        reference = self._reference
+
+        similarities = {"color": _bhattacharyya(features["color"], reference["color"])}
+        has_skin = (features["skin_fraction"] >= _MIN_REGION) & (reference["skin_fraction"] >= _MIN_REGION)
+        tone_distance = np.linalg.norm(features["skin_tone"] - reference["skin_tone"], axis=1)
+        similarities["skin"] = np.where(has_skin, np.exp(-tone_distance / _SKIN_TOLERANCE), np.nan)
+        has_hair = (features["hair_fraction"] >= _MIN_REGION) & (reference["hair_fraction"] >= _MIN_REGION)
+        similarities["hair"] = np.where(has_hair, _bhattacharyya(features["hair"], reference["hair"]), np.nan)
+        if self.embedder:
+            similarities["embedding"] = (self._embed(pixels) @ self._reference_embedding[0] + 1) / 2
+
+        names = list(similarities)
+        values = np.stack([similarities[name] for name in names], axis=1)
+        weights = np.where(np.isnan(values), 0, np.array([_WEIGHTS[name] for name in names]))
+        scores = (np.nan_to_num(values) * weights).sum(axis=1) / weights.sum(axis=1)
+        return {path: float(score) for (path, _), score in zip(valid, scores)}
@@ -0,0 +1,308 @@
+"""
+Perceptual-hash near-duplicate detection for FLUX Image Generator.
+
+Images are decoded at reduced size (JPEG draft mode), hashed in NumPy
+batches on a process pool (dHash from horizontal gradients, pHash from
+a 32x32 DCT) and packed into 64-bit integers. Near-duplicates are found
+with a multi-index hashing table: each hash is split into four 16-bit
+blocks, and by the pigeonhole principle any pair within Hamming radius
+r agrees on at least one block to within r // 4 bits, so only a small
+candidate set is compared with vectorized popcounts.
+
+Perceptual hashes are cached in the content-hash SQLite cache, keyed by
+file stat like regular digests.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import combinations
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.hashing import HashService
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HASH_METHODS = ("dhash", "phash")
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+_BLOCKS = 4
+_BLOCK_BITS = 64 // _BLOCKS
+_PHASH_SIZE = 32
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix."""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_PHASH_SIZE)
+
+
+def _load_gray(path: str, size: Tuple[int, int]) -> Optional[np.ndarray]:
+    """Decode an image to a small grayscale array, using JPEG draft mode."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.draft("L", (size[0] * 4, size[1] * 4))
+            return np.asarray(img.convert("L").resize(size, Image.Resampling.BILINEAR), dtype=np.float32)
+    except Exception:
+        return None
+
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    """Pack an (N, 64) boolean array into N uint64 values."""
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def dhash_batch(pixels: np.ndarray) -> np.ndarray:
+    """dHash for a batch of (N, 8, 9) grayscale arrays."""
+    return _pack_bits((pixels[:, :, 1:] > pixels[:, :, :-1]).reshape(len(pixels), 64))
+
+
+def phash_batch(pixels: np.ndarray) -> np.ndarray:
+    """pHash for a batch of (N, 32, 32) grayscale arrays."""
+    coefficients = np.einsum("ij,njk,lk->nil", _DCT, pixels, _DCT)[:, :8, :8].reshape(len(pixels), 64)
+    medians = np.median(coefficients[:, 1:], axis=1, keepdims=True)
+    return _pack_bits(coefficients > medians)
+
+
+def _hash_job(job: Tuple[List[str], str]) -> List[Tuple[str, Optional[int]]]:
+    """Worker: hash a chunk of files; unreadable files map to None."""
+    paths, method = job
+    size = (9, 8) if method == "dhash" else (_PHASH_SIZE, _PHASH_SIZE)
+    loaded = [(path, _load_gray(path, size)) for path in paths]
+    valid = [(path, pixels) for path, pixels in loaded if pixels is not None]
+    results: List[Tuple[str, Optional[int]]] = [(path, None) for path, pixels in loaded if pixels is None]
+    if valid:
+        batch = np.stack([pixels for _, pixels in valid])
+        hashes = dhash_batch(batch) if method == "dhash" else phash_batch(batch)
+        results.extend((path, int(value)) for (path, _), value in zip(valid, hashes))
+    return results
+
+
+def hamming_distance(a: np.ndarray, b) -> np.ndarray:
+    """Vectorized Hamming distance between uint64 hashes."""
+    return np.bitwise_count(np.bitwise_xor(a, np.uint64(b) if np.isscalar(b) else b)).astype(np.int32)
+
+
+class HammingIndex:
+    """Multi-index hashing table over 64-bit hashes."""
+
+    def __init__(self, hashes: Sequence[int]):
+        """Build per-block lookup tables."""
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        mask = np.uint64((1 << _BLOCK_BITS) - 1)
+        self.blocks = np.stack([
+            (self.hashes >> np.uint64(i * _BLOCK_BITS)) & mask for i in range(_BLOCKS)
+        ]).astype(np.int64)
+        # Per block: ids sorted by block value, for bucket lookups with searchsorted
+        self._order = np.argsort(self.blocks, axis=1, kind="stable")
+        self._sorted = np.take_along_axis(self.blocks, self._order, axis=1)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def _bucket(self, block: int, value: int) -> np.ndarray:
+        sorted_values = self._sorted[block]
+        start = np.searchsorted(sorted_values, value, side="left")
+        end = np.searchsorted(sorted_values, value, side="right")
+        return self._order[block, start:end]
+
+    def query(self, value: int, radius: int) -> np.ndarray:
+        """Indices of hashes within the given Hamming radius of value."""
+        block_radius = radius // _BLOCKS
+        candidates = []
+        for block in range(_BLOCKS):
+            key = (value >> (block * _BLOCK_BITS)) & ((1 << _BLOCK_BITS) - 1)
+            for flips in range(block_radius + 1):
+                for bits in combinations(range(_BLOCK_BITS), flips):
+                    probe = key
+                    for bit in bits:
+                        probe ^= 1 << bit
+                    candidates.append(self._bucket(block, probe))
+        if not candidates:
+            return np.empty(0, dtype=np.int64)
+        ids = np.unique(np.concatenate(candidates))
+        return ids[hamming_distance(self.hashes[ids], value) <= radius]
+
+    def find_pairs(self, radius: int) -> np.ndarray:
+        """All index pairs (i < j) within the given Hamming radius, as an (M, 2) array."""
+        block_radius = radius // _BLOCKS
+        masks = [
+            sum(1 << bit for bit in bits)
+            for flips in range(block_radius + 1)
+            for bits in combinations(range(_BLOCK_BITS), flips)
+        ]
+        found = []
+        for block in range(_BLOCKS):
+            sorted_values = self._sorted[block]
+            order = self._order[block]
+            for mask in masks:
+                # Sort-merge join: ids whose block equals another id's block XOR mask
+                flipped = self.blocks[block] ^ mask
+                starts = np.searchsorted(sorted_values, flipped, side="left")
+                counts = np.searchsorted(sorted_values, flipped, side="right") - starts
+                total = int(counts.sum())
+                if not total:
+                    continue
+                left = np.repeat(np.arange(len(self.hashes)), counts)
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                right = order[np.repeat(starts, counts) + offsets]
+                keep = left < right
+                left, right = left[keep], right[keep]
+                close = hamming_distance(self.hashes[left], self.hashes[right]) <= radius
+                found.append(np.stack([left[close], right[close]], axis=1))
+        if not found:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(found), axis=0)
+
+
+@dataclass
+class DuplicateReport:
+    """Near-duplicate groups found in a set of images."""
+    method: str
+    radius: int
+    groups: List[List[Path]] = field(default_factory=list)  # first path in each group is kept
+
+    @property
+    def duplicates(self) -> List[Path]:
+        """Paths to exclude (every group member except the kept one)."""
+        return [path for group in self.groups for path in group[1:]]
+
+    def save(self, report_path: Path) -> None:
+        """Write report as JSON."""
+        data = {
+            "method": self.method,
+            "radius": self.radius,
+            "groups": [[str(path) for path in group] for group in self.groups],
+        }
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+class NearDuplicateFinder:
+    """Perceptual hashing and near-duplicate grouping for image collections."""
+
+    def __init__(
+        self,
+        method: str = "dhash",
+        radius: int = 6,
+        processes: Optional[int] = None,
+        chunk_size: int = 256,
+        hash_service: Optional[HashService] = None
+    ):
+        """Initialize finder with a hash method and Hamming radius (0-64)."""
+        if method not in HASH_METHODS:
+            raise ValueError(f"Unknown hash method: {method}. Available: {list(HASH_METHODS)}")
+        self.method = method
+        self.radius = radius
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.hash_service = hash_service or HashService.default()
+
+    def hash_files(self, paths: Iterable[Path]) -> Dict[Path, int]:
+        """Perceptual hashes for files; cached entries are reused, misses computed in parallel."""
+        cache = self.hash_service.cache
+        results: Dict[Path, int] = {}
+        misses: Dict[str, Tuple[Path, os.stat_result]] = {}
+
+        for path in paths:
+            key = str(path.resolve())
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+            cached = cache.get(key, self.method, stat) if cache else None
+            if cached:
+                results[path] = int(cached, 16)
+            else:
+                misses[key] = (path, stat)
+
+        if misses:
+            keys = list(misses)
+            jobs = [(keys[i:i + self.chunk_size], self.method) for i in range(0, len(keys), self.chunk_size)]
+            if len(jobs) == 1 or self.processes == 1:
+                computed = [item for job in jobs for item in _hash_job(job)]
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                    computed = [item for chunk in pool.map(_hash_job, jobs) for item in chunk]
+
+            rows = []
+            for key, value in computed:
+                if value is None:
+                    logger.warning(f"Could not decode {key}")
+                    continue
+                path, stat = misses[key]
+                results[path] = value
+                rows.append((key, self.method, stat, f"{value:016x}"))
+            if cache:
+                cache.put_many(rows)
+
+        logger.info(f"Perceptual hashes: {len(results)} images ({len(misses)} computed)")
+        return results
+
+    def find(self, paths: Iterable[Path]) -> DuplicateReport:
+        """Group near-duplicate images; the kept image is the largest file of each group."""
+        hashes = self.hash_files(paths)
+        ordered = sorted(hashes)
+        index = HammingIndex([hashes[path] for path in ordered])
+        pairs = index.find_pairs(self.radius)
+
+        # Union-find over matching pairs
+        parent = list(range(len(ordered)))
+
+        def find_root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in pairs:
+            root_a, root_b = find_root(int(a)), find_root(int(b))
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        members: Dict[int, List[Path]] = {}
+        for i, path in enumerate(ordered):
+            members.setdefault(find_root(i), []).append(path)
+
+        groups = []
+        for group in members.values():
+            if len(group) > 1:
+                group.sort(key=lambda p: (-p.stat().st_size, str(p)))
+                groups.append(group)
+
+        report = DuplicateReport(method=self.method, radius=self.radius, groups=groups)
+        logger.info(f"Found {len(groups)} near-duplicate groups ({len(report.duplicates)} redundant images) "
+                    f"among {len(ordered)} images")
+        return report
+
+    def find_in_directory(
+        self,
+        directory: Path,
+        patterns: Iterable[str] = IMAGE_PATTERNS,
+        recursive: bool = True
+    ) -> DuplicateReport:
+        """Group near-duplicates among images under a directory (hidden directories skipped)."""
+        paths = set()
+        for pattern in patterns:
+            matches = directory.rglob(pattern) if recursive else directory.glob(pattern)
+            paths.update(
+                path for path in matches
+                if path.is_file() and not any(part.startswith(".") for part in path.relative_to(directory).parts)
+            )
+        return self.find(paths)
+
+    def filter_unique(self, paths: Sequence[Path]) -> Tuple[List[Path], List[Path]]:
+        """Split paths into (kept, near-duplicates), preserving input order."""
+        excluded = set(self.find(paths).duplicates)
+        return [p for p in paths if p not in excluded], [p for p in paths if p in excluded]
@@ -0,0 +1,364 @@
+"""
+Post-generation derivatives for FLUX Image Generator.
+
+Every generated image can be turned into a set of derivatives (WebP
+thumbnails, resized copies, losslessly recompressed or metadata-stripped
+copies) on a process pool. As an output hook the processor only hands
+the already downloaded bytes to the pool; at most ``max_pending`` images
+are in flight, and images arriving while the pool is saturated are
+remembered and processed later from disk (``process_dropped``, or on
+close), so generation never waits for derivatives.
+
+Derivatives mirror the output tree under ``output/derivatives/<spec>``:
+
+    output/enhanced/ab/cd/x.jpeg -> output/derivatives/thumb/enhanced/ab/cd/x.webp
+"""
+
+import atexit
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Callable, Tuple, Union
+
+from ..utils.base import FileUtils
+from ..utils.indexer import DirectoryIndexer
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_MODES = ("strip", "keep", "embed")
+_FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+_EXIF_IMAGE_DESCRIPTION = 0x010E
+_EXIF_SOFTWARE = 0x0131
+_PNG_METADATA_KEY = "flux:metadata"
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    """One derivative produced for every image."""
+    name: str  # subdirectory under the derivatives root
+    size: Optional[int] = None  # longest edge in pixels; None keeps the original size (never upscales)
+    format: Optional[str] = None  # JPEG, PNG or WEBP; None keeps the source format
+    quality: int = 80
+    lossless: bool = False  # WebP lossless; JPEG keeps the source quantization tables
+    metadata: str = "strip"  # strip, keep or embed (generation record as EXIF/PNG text)
+    transform: Optional[Callable] = None  # module-level PIL.Image -> PIL.Image function
+
+    def output_format(self, source_format: str) -> str:
+        return (self.format or source_format or "JPEG").upper()
+
+
+def _encode(image, spec: DerivativeSpec, source_format: str, metadata_json: Optional[str], original: bool) -> bytes:
+    """Encode one derivative with the spec's format, compression and metadata policy."""
+    from PIL import Image, PngImagePlugin
+
+    output_format = spec.output_format(source_format)
+    params: Dict[str, Any] = {}
+    if output_format == "JPEG":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if spec.lossless and original and source_format == "JPEG":
+            # Reuse quantization tables and subsampling: no extra generation loss
+            params.update(quality="keep", subsampling="keep", optimize=True, progressive=True)
+        else:
+            params.update(quality=spec.quality, optimize=True, progressive=True)
+    elif output_format == "PNG":
+        params["optimize"] = True
+    elif output_format == "WEBP":
+        params.update(lossless=spec.lossless, quality=100 if spec.lossless else spec.quality, method=4)
+
+    if spec.metadata == "keep":
+        for key in ("exif", "icc_profile"):
+            if image.info.get(key):
+                params[key] = image.info[key]
+    elif spec.metadata == "embed" and metadata_json:
+        exif = Image.Exif()
+        exif[_EXIF_IMAGE_DESCRIPTION] = metadata_json
+        exif[_EXIF_SOFTWARE] = "FLUX Image Generator"
+        params["exif"] = exif.tobytes()
+        if output_format == "PNG":
+            pnginfo = PngImagePlugin.PngInfo()
+            pnginfo.add_itxt(_PNG_METADATA_KEY, metadata_json)
+            params["pnginfo"] = pnginfo
+    elif output_format == "PNG":
+        # PNG otherwise carries the ICC profile over from image.info
+        image.info.pop("icc_profile", None)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=output_format, **params)
+    return buffer.getvalue()
+
+
+def _derive_job(job: Tuple[Union[bytes, str], List[Tuple[DerivativeSpec, str]], Optional[str]]) -> List[Tuple[str, int]]:
+    """Worker: decode an image once and write all of its derivatives."""
+    from PIL import Image
+
+    source, targets, metadata_json = job
+    written = []
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+        source_format = image.format or "JPEG"
+        for spec, target in targets:
+            derived = image
+            if spec.size and max(image.size) > spec.size:
+                derived = image.copy()
+                derived.thumbnail((spec.size, spec.size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            if spec.transform:
+                derived = spec.transform(derived)
+            data = _encode(derived, spec, source_format, metadata_json, original=derived is image)
+            FileUtils.atomic_write(Path(target), data)
+            written.append((target, len(data)))
+    return written
+
+
+class DerivativeProcessor:
+    """Output hook producing derivatives of generated images on a process pool."""
+
+    _default: Optional["DerivativeProcessor"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        output_dir: Path,
+        specs: Iterable[DerivativeSpec],
+        root: Optional[Path] = None,
+        workers: int = 2,
+        max_pending: int = 16,
+        start_method: str = "forkserver"
+    ):
+        """
+        Initialize processor.
+
+        Args:
+            output_dir: Derivatives root (one subdirectory per spec)
+            specs: Derivatives to produce for every image
+            root: Output root whose structure is mirrored (default: output_dir's parent)
+            workers: Worker processes
+            max_pending: Images in flight before new ones are deferred
+            start_method: multiprocessing start method of the pool; the pool starts from output
+                hook threads while logging and writer threads hold locks, so it must not fork
+                ("spawn" where forkserver is unavailable)
+        """
+        self.output_dir = output_dir
+        self.specs = list(specs)
+        for spec in self.specs:
+            if spec.metadata not in METADATA_MODES:
+                raise ValueError(f"Unknown metadata mode: {spec.metadata}. Available: {list(METADATA_MODES)}")
+        self.root = root or output_dir.parent
+        self.workers = max(1, workers)
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        self.context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Future] = []
+        self._dropped: List[Tuple[Path, Optional[Dict[str, Any]]]] = []
+        self._closed = False
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "deferred": 0, "files_written": 0, "bytes_written": 0}
+
+    @classmethod
+    def default(cls) -> "DerivativeProcessor":
+        """Shared processor configured from settings, closed at interpreter exit."""
+        with cls._default_lock:
+            if cls._default is None or cls._default._closed:
+                from ..config.settings import settings
+                cls._default = cls(
+                    settings.paths.output_dir / "derivatives",
+                    cls.specs_from_settings(),
+                    root=settings.paths.output_dir,
+                    workers=settings.storage.derivative_workers,
+                    max_pending=settings.storage.derivative_queue_size
+                )
+                atexit.register(cls._default.close)
+            return cls._default
+
+    @staticmethod
+    def specs_from_settings() -> List[DerivativeSpec]:
+        """Thumbnail, resized copies and an optimized full-size copy, as configured."""
+        from ..config.settings import settings
+        storage = settings.storage
+        image_format = storage.derivative_format
+        specs = [DerivativeSpec("thumb", size=storage.derivative_thumbnail_size, format=image_format,
+                                metadata=storage.derivative_metadata)]
+        specs.extend(
+            DerivativeSpec(f"{size}px", size=size, format=image_format, metadata=storage.derivative_metadata)
+            for size in storage.derivative_sizes
+        )
+        if storage.derivative_recompress:
+            specs.append(DerivativeSpec("optimized", lossless=True, metadata=storage.derivative_metadata))
+        return specs
+
+    def target_path(self, spec: DerivativeSpec, source_path: Path, source_format: str) -> Path:
+        """Derivative path for a source image, mirroring its place in the output tree."""
+        try:
+            relative = source_path.resolve().relative_to(self.root.resolve())
+        except ValueError:
+            relative = Path(source_path.name)
+        extension = _FORMAT_EXTENSIONS.get(spec.output_format(source_format), source_path.suffix)
+        return self.output_dir / spec.name / relative.with_suffix(extension)
+
+    def _targets(self, source_path: Path) -> List[Tuple[DerivativeSpec, str]]:
+        source_format = "PNG" if source_path.suffix.lower() == ".png" else (
+            "WEBP" if source_path.suffix.lower() == ".webp" else "JPEG")
+        return [(spec, str(self.target_path(spec, source_path, source_format))) for spec in self.specs]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.context)
+            return self._pool
+
+    def submit(
+        self,
+        source_path: Path,
+        image_data: Optional[bytes] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        block: bool = False
+    ) -> Optional[Future]:
+        """
+        Queue derivatives for one image.
+
+        Args:
+            source_path: Source image (read from disk when image_data is None)
+            image_data: Encoded image bytes
+            metadata: Record embedded by specs with metadata="embed"
+            block: Wait for a free slot instead of deferring the image
+
+        Returns:
+            Future of the written (path, size) pairs, or None when the pool
+            is saturated and the image was deferred
+        """
+        if self._closed:
+            raise RuntimeError("DerivativeProcessor is closed")
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._dropped.append((source_path, metadata))
+                self._stats["deferred"] += 1
+            return None
+
+        metadata_json = json.dumps(metadata, ensure_ascii=False, default=str) if metadata else None
+        job = (image_data if image_data is not None else str(source_path), self._targets(source_path), metadata_json)
+        try:
+            future = self._get_pool().submit(_derive_job, job)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._pending.append(future)
+        future.add_done_callback(lambda done, name=source_path.name: self._on_done(done, name))
+        return future
+
+    def _on_done(self, future: Future, name: str) -> None:
+        self._slots.release()
+        with self._lock:
+            if future in self._pending:
+                self._pending.remove(future)
+            try:
+                written = future.result()
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error(f"Derivatives failed for {name}: {e}")
+                return
+            self._stats["completed"] += 1
+            self._stats["files_written"] += len(written)
+            self._stats["bytes_written"] += sum(size for _, size in written)
+
+    def write_record(self, record, image_data: bytes) -> None:
+        """Output hook: queue derivatives of a freshly generated image."""
+        self.submit(record.path, image_data, record.to_dict())
+
+    __call__ = write_record
+
+    def is_current(self, source_path: Path) -> bool:
+        """Check whether every derivative exists and is newer than the source."""
+        try:
+            source_mtime = source_path.stat().st_mtime_ns
+            return all(os.stat(target).st_mtime_ns >= source_mtime for _, target in self._targets(source_path))
+        except OSError:
+            return False
+
+    def process_files(self, paths: Iterable[Path], force: bool = False) -> int:
+        """
+        Produce derivatives for existing files, waiting for completion.
+
+        Args:
+            paths: Source images
+            force: Rebuild derivatives that are already up to date
+
+        Returns:
+            Number of images processed
+        """
+        processed = 0
+        for path in paths:
+            if not force and self.is_current(path):
+                continue
+            self.submit(path, block=True)
+            processed += 1
+        self.flush()
+        return processed
+
+    def process_directory(self, directory: Path, force: bool = False) -> int:
+        """Produce derivatives for all images under a directory, except derived and sheet outputs."""
+        excluded = (self.output_dir.resolve(), (self.root / "contact_sheets").resolve())
+        paths = [
+            path for path in DirectoryIndexer(directory).paths()
+            if not any(parent in excluded for parent in path.resolve().parents)
+        ]
+        return self.process_files(paths, force=force)
+
+    def process_dropped(self) -> int:
+        """Process images deferred while the pool was saturated (read back from disk)."""
+        with self._lock:
+            dropped, self._dropped = self._dropped, []
+        processed = 0
+        for path, metadata in dropped:
+            if path.exists():
+                self.submit(path, metadata=metadata, block=True)
+                processed += 1
+        self.flush()
+        return processed
+
+    def flush(self) -> None:
+        """Wait until all queued derivatives are written."""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            for future in pending:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+
+    def close(self) -> None:
+        """Finish queued and deferred work and shut the pool down."""
+        if self._closed:
+            return
+        self.flush()
+        if self._dropped:
+            logger.info(f"Building derivatives for {len(self._dropped)} deferred images")
+            self.process_dropped()
+        self._closed = True
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown()
+        stats = self.get_stats()
+        if stats["submitted"] or stats["deferred"]:
+            logger.info(f"Derivatives closed: {stats['completed']} images, {stats['files_written']} files, "
+                        f"{stats['failed']} failed, {stats['deferred']} deferred")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters and current queue depth."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["pending"] = len(self._pending)
+            stats["deferred_waiting"] = len(self._dropped)
+        return stats
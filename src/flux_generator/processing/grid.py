@@ -0,0 +1,244 @@
+"""
+Contact-sheet and comparison-grid rendering for FLUX Image Generator.
+
+Grids are rendered row by row: each worker process decodes one row of
+images at reduced size (JPEG draft mode, then thumbnail) and composes
+the row strip with NumPy, so full-resolution images are never held for
+more than one image at a time per worker. Only a bounded number of
+strips are in flight, and sheets taller than ``max_page_pixels`` are
+split into pages.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.base import BaseUtils
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Color = Tuple[int, int, int]
+_MISSING_COLOR = (220, 220, 220)
+_LABEL_COLOR = (30, 30, 30)
+
+
+def _load_cell(path: Optional[str], cell_size: Tuple[int, int], background: Color) -> np.ndarray:
+    """Decode an image at reduced size and letterbox it into a cell."""
+    from PIL import Image
+
+    width, height = cell_size
+    cell = np.empty((height, width, 3), dtype=np.uint8)
+    cell[:] = background
+    if path is None:
+        cell[:] = _MISSING_COLOR
+        return cell
+
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", cell_size)
+            img = img.convert("RGB")
+            img.thumbnail(cell_size, Image.Resampling.LANCZOS)
+            pixels = np.asarray(img)
+    except Exception:
+        cell[:] = _MISSING_COLOR
+        return cell
+
+    top = (height - pixels.shape[0]) // 2
+    left = (width - pixels.shape[1]) // 2
+    cell[top:top + pixels.shape[0], left:left + pixels.shape[1]] = pixels
+    return cell
+
+
+def _render_strip(job: Tuple[List[Optional[str]], Tuple[int, int], int, Color]) -> np.ndarray:
+    """Worker: compose one row of cells into a strip array."""
+    paths, cell_size, padding, background = job
+    width, height = cell_size
+    strip = np.empty((height, len(paths) * (width + padding), 3), dtype=np.uint8)
+    strip[:] = background
+    for column, path in enumerate(paths):
+        left = column * (width + padding)
+        strip[:, left:left + width] = _load_cell(path, cell_size, background)
+    return strip
+
+
+class GridRenderer:
+    """Labelled contact sheets from rows of image paths."""
+
+    def __init__(
+        self,
+        cell_size: Tuple[int, int] = (192, 288),
+        padding: int = 6,
+        label_height: int = 22,
+        background: Color = (255, 255, 255),
+        processes: Optional[int] = None,
+        max_page_pixels: int = 48_000_000,
+        quality: int = 90
+    ):
+        """Initialize renderer with cell geometry and page size limit."""
+        self.cell_size = cell_size
+        self.padding = padding
+        self.label_height = label_height
+        self.background = background
+        self.processes = processes
+        self.max_page_pixels = max_page_pixels
+        self.quality = quality
+
+    def render(
+        self,
+        rows: Sequence[Sequence[Optional[Path]]],
+        output_path: Path,
+        row_labels: Optional[Sequence[str]] = None,
+        column_labels: Optional[Sequence[str]] = None,
+        title: Optional[str] = None
+    ) -> List[Path]:
+        """
+        Render a grid of images to one or more sheet pages.
+
+        Args:
+            rows: Image paths per row (None for an empty cell)
+            output_path: Sheet path; extra pages get a _p2, _p3... suffix
+            row_labels: Label drawn left of each row
+            column_labels: Label drawn above each column (repeated on each page)
+            title: Title drawn at the top of each page
+
+        Returns:
+            Paths of the rendered pages
+        """
+        if not rows:
+            return []
+        from PIL import ImageFont
+
+        font = ImageFont.load_default()
+        columns = max(len(row) for row in rows)
+        label_width = 0
+        if row_labels:
+            label_width = int(max(font.getlength(str(label)) for label in row_labels)) + 2 * self.padding
+        header = (self.label_height if title else 0) + (self.label_height if column_labels else 0)
+        row_height = self.cell_size[1] + self.padding
+        width = label_width + columns * (self.cell_size[0] + self.padding) + self.padding
+        rows_per_page = max(1, (self.max_page_pixels // width - header) // row_height)
+
+        pages = []
+        for page_start in range(0, len(rows), rows_per_page):
+            page_rows = rows[page_start:page_start + rows_per_page]
+            page_path = output_path if page_start == 0 else output_path.with_name(
+                f"{output_path.stem}_p{page_start // rows_per_page + 1}{output_path.suffix}")
+            labels = row_labels[page_start:page_start + rows_per_page] if row_labels else None
+            pages.append(self._render_page(
+                page_rows, columns, page_path, labels, column_labels, title, font, label_width, header, width
+            ))
+        return pages
+
+    def _render_page(self, rows, columns, output_path, row_labels, column_labels, title, font, label_width, header, width) -> Path:
+        from PIL import Image, ImageDraw
+
+        started = time.perf_counter()
+        row_height = self.cell_size[1] + self.padding
+        height = header + len(rows) * row_height + self.padding
+        canvas = np.empty((height, width, 3), dtype=np.uint8)
+        canvas[:] = self.background
+
+        jobs = [
+            ([str(path) if path else None for path in row] + [None] * (columns - len(row)),
+             self.cell_size, self.padding, self.background)
+            for row in rows
+        ]
+        top = header + self.padding
+        left = label_width + self.padding
+        for index, strip in enumerate(self._render_strips(jobs)):
+            y = top + index * row_height
+            canvas[y:y + strip.shape[0], left:left + strip.shape[1]] = strip
+
+        sheet = Image.fromarray(canvas)
+        draw = ImageDraw.Draw(sheet)
+        y = 0
+        if title:
+            draw.text((self.padding, y + 4), title, fill=_LABEL_COLOR, font=font)
+            y += self.label_height
+        if column_labels:
+            for column, label in enumerate(column_labels[:columns]):
+                x = left + column * (self.cell_size[0] + self.padding)
+                draw.text((x, y + 4), str(label), fill=_LABEL_COLOR, font=font)
+        for index, label in enumerate(row_labels or []):
+            draw.text((self.padding, top + index * row_height + self.cell_size[1] // 2), str(label),
+                      fill=_LABEL_COLOR, font=font)
+
+        BaseUtils.ensure_directory(output_path.parent)
+        sheet.save(output_path, quality=self.quality)
+        logger.info(f"Rendered contact sheet {output_path.name}: {len(rows)}x{columns} cells "
+                    f"in {time.perf_counter() - started:.1f}s")
+        return output_path
+
+    def _render_strips(self, jobs: list):
+        """Yield rendered strips in order, keeping a bounded number in flight."""
+        if self.processes == 1 or len(jobs) < 2:
+            for job in jobs:
+                yield _render_strip(job)
+            return
+
+        workers = self.processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            window = 2 * workers
+            pending = [pool.submit(_render_strip, job) for job in jobs[:window]]
+            next_job = len(pending)
+            while pending:
+                strip = pending.pop(0).result()
+                if next_job < len(jobs):
+                    pending.append(pool.submit(_render_strip, jobs[next_job]))
+                    next_job += 1
+                yield strip
+
+    def render_style_comparison(self, results: Dict[str, List[Path]], output_path: Path) -> List[Path]:
+        """Sheet with one row per style (output of generate_style_comparison)."""
+        styles = list(results)
+        columns = max((len(paths) for paths in results.values()), default=0)
+        return self.render(
+            [results[style] for style in styles],
+            output_path,
+            row_labels=styles,
+            column_labels=[f"#{i + 1}" for i in range(columns)],
+            title="Style comparison"
+        )
+
+    def render_variations(
+        self,
+        results: Dict[str, Dict[str, Dict[str, List[Path]]]],
+        output_dir: Path,
+        prefix: str = "variations"
+    ) -> List[Path]:
+        """One style x aspect sheet per quality (output of generate_all_variations)."""
+        styles = list(results)
+        aspects = list(dict.fromkeys(aspect for style in styles for aspect in results[style]))
+        qualities = list(dict.fromkeys(
+            quality for style in styles for aspect in results[style] for quality in results[style][aspect]
+        ))
+
+        pages = []
+        for quality in qualities:
+            rows = [
+                [next(iter(results[style].get(aspect, {}).get(quality, [])), None) for aspect in aspects]
+                for style in styles
+            ]
+            pages.extend(self.render(
+                rows,
+                output_dir / f"{prefix}_{quality}.jpg",
+                row_labels=styles,
+                column_labels=aspects,
+                title=f"Quality: {quality}"
+            ))
+        return pages
+
+    def render_sequence(
+        self,
+        paths: Sequence[Optional[Path]],
+        output_path: Path,
+        labels: Optional[Sequence[str]] = None,
+        title: Optional[str] = None
+    ) -> List[Path]:
+        """Single-row sheet, e.g. the angles of a rotation sequence."""
+        return self.render([list(paths)], output_path, column_labels=labels, title=title)
@@ -0,0 +1,243 @@
+"""
+Image quality metrics for FLUX Image Generator.
+
+Cheap no-reference metrics computed before an image is sent for
+expensive downstream processing (Adetailer). Images are decoded at a
+fixed analysis size (JPEG draft mode) and scored in NumPy batches on a
+process pool:
+
+* sharpness      variance of the 4-neighbour Laplacian of luminance
+* exposure       mean brightness, clipped highlight/shadow fractions and
+                 a 16-bin luminance histogram
+* colorfulness   Hasler & Suesstrunk colourfulness metric
+* contrast       luminance standard deviation (near zero for blank images)
+
+Scores are cached in the content-hash SQLite cache, keyed by file stat.
+"""
+
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable, Sequence, Tuple, Union, BinaryIO
+
+import numpy as np
+
+from ..utils.hashing import HashService
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ANALYSIS_SIZE = (256, 256)
+HISTOGRAM_BINS = 16
+_CACHE_ALGORITHM = "quality-v1"
+_HIGHLIGHT = 250
+_SHADOW = 5
+
+
+def _load_rgb(path: Union[str, BinaryIO], size: Tuple[int, int] = ANALYSIS_SIZE) -> Optional[np.ndarray]:
+    """Decode an image (file path or binary stream) to a fixed-size float32 RGB array, using JPEG draft mode."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", size)
+            return np.asarray(img.convert("RGB").resize(size, Image.Resampling.BILINEAR), dtype=np.float32)
+    except Exception:
+        return None
+
+
+def quality_batch(pixels: np.ndarray) -> Dict[str, np.ndarray]:
+    """Quality metrics for a batch of (N, H, W, 3) RGB arrays in 0..255."""
+    red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    gray = 0.299 * red + 0.587 * green + 0.114 * blue
+    count = len(pixels)
+
+    laplacian = (gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1] + gray[:, 1:-1, :-2] + gray[:, 1:-1, 2:]
+                 - 4 * gray[:, 1:-1, 1:-1])
+
+    rg = red - green
+    yb = 0.5 * (red + green) - blue
+    colorfulness = (np.sqrt(rg.std(axis=(1, 2)) ** 2 + yb.std(axis=(1, 2)) ** 2)
+                    + 0.3 * np.sqrt(rg.mean(axis=(1, 2)) ** 2 + yb.mean(axis=(1, 2)) ** 2))
+
+    # One bincount for the whole batch: offset each image's bins
+    bins = np.minimum(gray.astype(np.int64) * HISTOGRAM_BINS // 256, HISTOGRAM_BINS - 1)
+    bins += (np.arange(count) * HISTOGRAM_BINS)[:, None, None]
+    histogram = np.bincount(bins.ravel(), minlength=count * HISTOGRAM_BINS).reshape(count, HISTOGRAM_BINS)
+
+    return {
+        "sharpness": laplacian.var(axis=(1, 2)),
+        "brightness": gray.mean(axis=(1, 2)),
+        "contrast": gray.std(axis=(1, 2)),
+        "colorfulness": colorfulness,
+        "overexposed": (gray >= _HIGHLIGHT).mean(axis=(1, 2)),
+        "underexposed": (gray <= _SHADOW).mean(axis=(1, 2)),
+        "histogram": histogram / histogram.sum(axis=1, keepdims=True),
+    }
+
+
+def _quality_job(paths: List[str]) -> List[Tuple[str, Optional[Dict]]]:
+    """Worker: score a chunk of files; unreadable files map to None."""
+    loaded = [(path, _load_rgb(path)) for path in paths]
+    valid = [(path, pixels) for path, pixels in loaded if pixels is not None]
+    results: List[Tuple[str, Optional[Dict]]] = [(path, None) for path, pixels in loaded if pixels is None]
+    if valid:
+        metrics = quality_batch(np.stack([pixels for _, pixels in valid]))
+        for i, (path, _) in enumerate(valid):
+            scores = {name: float(values[i]) for name, values in metrics.items() if name != "histogram"}
+            scores["histogram"] = [round(float(value), 4) for value in metrics["histogram"][i]]
+            results.append((path, scores))
+    return results
+
+
+@dataclass
+class QualityScores:
+    """Quality metrics of one image."""
+    sharpness: float
+    brightness: float
+    contrast: float
+    colorfulness: float
+    overexposed: float  # fraction of pixels at or above the highlight level
+    underexposed: float  # fraction of pixels at or below the shadow level
+    histogram: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass
+class QualityThresholds:
+    """Limits an image must meet to pass the quality gate."""
+    min_sharpness: float = 30.0  # Laplacian variance at the 256x256 analysis size
+    min_contrast: float = 4.0  # below: blank or near-uniform image
+    min_brightness: float = 20.0
+    max_brightness: float = 235.0
+    max_overexposed: float = 0.35
+    max_underexposed: float = 0.4
+    min_colorfulness: float = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "QualityThresholds":
+        """Thresholds configured in settings."""
+        from ..config.settings import settings
+        qa = settings.qa
+        return cls(
+            min_sharpness=qa.min_sharpness,
+            min_contrast=qa.min_contrast,
+            min_brightness=qa.min_brightness,
+            max_brightness=qa.max_brightness,
+            max_overexposed=qa.max_overexposed,
+            max_underexposed=qa.max_underexposed,
+            min_colorfulness=qa.min_colorfulness
+        )
+
+    def failures(self, scores: QualityScores) -> List[str]:
+        """Reasons the scores fail the thresholds (empty when they pass)."""
+        reasons = []
+        if scores.contrast < self.min_contrast:
+            reasons.append("blank")
+        if scores.sharpness < self.min_sharpness:
+            reasons.append("blurry")
+        if scores.brightness < self.min_brightness:
+            reasons.append("too dark")
+        if scores.brightness > self.max_brightness:
+            reasons.append("too bright")
+        if scores.overexposed > self.max_overexposed:
+            reasons.append("overexposed")
+        if scores.underexposed > self.max_underexposed:
+            reasons.append("underexposed")
+        if scores.colorfulness < self.min_colorfulness:
+            reasons.append("dull")
+        return reasons
+
+
+class QualityAnalyzer:
+    """Batched, cached quality scoring and gating for image collections."""
+
+    def __init__(
+        self,
+        thresholds: Optional[QualityThresholds] = None,
+        processes: Optional[int] = None,
+        chunk_size: int = 32,
+        hash_service: Optional[HashService] = None
+    ):
+        """Initialize analyzer with gate thresholds (default: from settings)."""
+        self.thresholds = thresholds or QualityThresholds.from_settings()
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.hash_service = hash_service or HashService.default()
+
+    def score_files(self, paths: Iterable[Path]) -> Dict[Path, QualityScores]:
+        """Quality scores for files; cached entries are reused, misses computed in parallel."""
+        cache = self.hash_service.cache
+        results: Dict[Path, QualityScores] = {}
+        misses: Dict[str, Tuple[Path, os.stat_result]] = {}
+
+        for path in paths:
+            key = str(path.resolve())
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+            cached = cache.get(key, _CACHE_ALGORITHM, stat) if cache else None
+            if cached:
+                results[path] = QualityScores(**json.loads(cached))
+            else:
+                misses[key] = (path, stat)
+
+        if misses:
+            keys = list(misses)
+            jobs = [keys[i:i + self.chunk_size] for i in range(0, len(keys), self.chunk_size)]
+            if len(jobs) == 1 or self.processes == 1:
+                computed = [item for job in jobs for item in _quality_job(job)]
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                    computed = [item for chunk in pool.map(_quality_job, jobs) for item in chunk]
+
+            rows = []
+            for key, scores in computed:
+                if scores is None:
+                    logger.warning(f"Could not decode {key}")
+                    continue
+                path, stat = misses[key]
+                results[path] = QualityScores(**scores)
+                rows.append((key, _CACHE_ALGORITHM, stat, json.dumps(scores)))
+            if cache:
+                cache.put_many(rows)
+
+        logger.info(f"Quality scores: {len(results)} images ({len(misses)} computed)")
+        return results
+
+    def score_bytes(self, image_data: bytes) -> Optional[QualityScores]:
+        """Quality scores of an encoded image in memory (not cached), or None if it cannot be decoded."""
+        pixels = _load_rgb(io.BytesIO(image_data))
+        if pixels is None:
+            return None
+        metrics = quality_batch(pixels[None])
+        scores = {name: float(values[0]) for name, values in metrics.items() if name != "histogram"}
+        return QualityScores(histogram=[round(float(value), 4) for value in metrics["histogram"][0]], **scores)
+
+    def filter(self, paths: Sequence[Path]) -> Tuple[List[Path], Dict[Path, List[str]], Dict[Path, QualityScores]]:
+        """
+        Split paths into those passing the gate and those rejected.
+
+        Unreadable images are rejected as "unreadable".
+
+        Returns:
+            (passed paths in input order, rejected path -> reasons, scores)
+        """
+        scores = self.score_files(paths)
+        passed: List[Path] = []
+        rejected: Dict[Path, List[str]] = {}
+        for path in paths:
+            reasons = self.thresholds.failures(scores[path]) if path in scores else ["unreadable"]
+            if reasons:
+                rejected[path] = reasons
+            else:
+                passed.append(path)
+        if rejected:
+            logger.info(f"Quality gate rejected {len(rejected)} of {len(paths)} images")
+        return passed, rejected, scores
@@ -0,0 +1,10 @@
+"""
+Local HTTP service for FLUX Image Generator.
+
+This module exposes the generators as a job API backed by one shared engine.
+"""
+
+from .engine import ServiceEngine, ServiceJob
+from .server import ServiceServer, serve
+
+__all__ = ["ServiceEngine", "ServiceJob", "ServiceServer", "serve"]
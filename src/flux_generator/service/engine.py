@@ -0,0 +1,278 @@
+"""
+Shared generation engine of the local HTTP service.
+
+Every client's jobs run on one thread pool through one JobExecutor, so
+all of them share one FluxAPIClient (and its pooled connections), one
+generator per kind (and its encoded-input cache) and the process rate
+limiter. A job is a list of image payloads; finished images are
+published as events that clients can follow while the job runs.
+"""
+
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Any, Iterator
+
+from ..api.client import FluxAPIClient
+from ..api.ratelimit import RateLimiter
+from ..config.settings import settings
+from ..core.spec import GenerationSpec
+from ..core.workers import JobExecutor, enhanced_payload, rotation_payload
+from ..utils.logger import get_logger, log_context
+
+logger = get_logger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+_FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class ServiceJob:
+    """A submitted job: its image payloads, per-image results and event log."""
+
+    def __init__(self, kind: str, payloads: List[Dict[str, Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payloads = payloads
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: List[Optional[str]] = [None] * len(payloads)
+        self.errors: Dict[int, str] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.futures: List[Future] = []
+        self.pending = len(payloads)
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def to_dict(self, results: bool = True) -> Dict[str, Any]:
+        """JSON-serializable status."""
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": len(self.payloads),
+            "succeeded": sum(1 for path in self.results if path),
+            "failed": len(self.errors),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if results:
+            data["results"] = [
+                {"index": index, "seed": payload.get("seed"), "path": path, "error": self.errors.get(index)}
+                for index, (payload, path) in enumerate(zip(self.payloads, self.results))
+            ]
+        return data
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Append an event and wake up clients following the job. Call with changed held."""
+        event["sequence"] = len(self.events)
+        self.events.append(event)
+        self.changed.notify_all()
+
+
+class ServiceEngine:
+    """Accepts jobs from all clients and runs them on one shared pool."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        executor: Optional[JobExecutor] = None,
+        max_images_per_job: Optional[int] = None,
+        max_finished_jobs: Optional[int] = None
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            workers: Images generated at once (default: service.workers, or api.max_concurrent_requests)
+            executor: Runs the payloads (default: one JobExecutor with one shared API client)
+            max_images_per_job: Largest accepted job (default: service.max_images_per_job)
+            max_finished_jobs: Finished jobs kept for queries (default: service.max_finished_jobs)
+        """
+        service = settings.service
+        self.workers = max(1, workers or service.workers or settings.api.max_concurrent_requests)
+        self.executor = executor or JobExecutor(api_client=FluxAPIClient())
+        self.max_images_per_job = max_images_per_job or service.max_images_per_job
+        self.max_finished_jobs = max_finished_jobs or service.max_finished_jobs
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="service")
+        self._jobs: "OrderedDict[str, ServiceJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        logger.info(f"Service engine started with {self.workers} workers")
+
+    def build_payloads(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Validate a job request and expand it into image payloads.
+
+        Enhanced: {"kind": "enhanced", "count", "start_seed", "style", "aspect",
+        "quality", "custom_prompt"}. Rotation: {"kind": "rotation", "angles",
+        "start_seed", "custom_prompt", "use_preset"}.
+
+        Raises:
+            ValueError: If the request is invalid
+        """
+        kind = request.get("kind", "enhanced")
+        start_seed = int(request.get("start_seed") or settings.generation.default_seed)
+        custom_prompt = request.get("custom_prompt")
+        if kind == "enhanced":
+            count = int(request.get("count", 1))
+            if not 1 <= count <= self.max_images_per_job:
+                raise ValueError(f"count must be between 1 and {self.max_images_per_job}")
+            defaults = GenerationSpec()
+            spec = GenerationSpec(
+                style=request.get("style", defaults.style),
+                aspect=request.get("aspect", defaults.aspect),
+                quality=request.get("quality", defaults.quality)
+            )
+            return [enhanced_payload(spec, start_seed + i, custom_prompt) for i in range(count)]
+        if kind == "rotation":
+            available = list(self.executor.generator("rotation").rotation_prompts)
+            angles = request.get("angles") or available
+            unknown = [angle for angle in angles if angle not in available]
+            if unknown:
+                raise ValueError(f"Unknown rotation angles: {unknown}. Available: {available}")
+            use_preset = bool(request.get("use_preset", True))
+            return [rotation_payload(angle, start_seed + i, custom_prompt, use_preset) for i, angle in enumerate(angles)]
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    def submit(self, request: Dict[str, Any]) -> ServiceJob:
+        """Validate and queue a job request."""
+        payloads = self.build_payloads(request)
+        job = ServiceJob(request.get("kind", "enhanced"), payloads)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        with job.changed:
+            job.publish({"type": "status", "status": QUEUED, "total": len(payloads)})
+            job.futures = [self._pool.submit(self._run_image, job, index) for index in range(len(payloads))]
+        logger.info(f"Queued {job.kind} job {job.id} with {len(payloads)} images")
+        return job
+
+    def get(self, job_id: str) -> Optional[ServiceJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[ServiceJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[ServiceJob]:
+        """Cancel a job's images that have not started; running ones finish but are not waited for."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with job.changed:
+            if job.finished:
+                return job
+            cancelled = sum(1 for future in job.futures if future.cancel())
+            job.pending -= cancelled
+            self._finish(job, CANCELLED)
+        logger.info(f"Cancelled job {job.id} ({cancelled} images not started)")
+        return job
+
+    def events(self, job_id: str, start: int = 0, timeout: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Follow a job's events from sequence number start until it finishes.
+
+        Yields None after timeout seconds without an event, so callers can
+        send keep-alives and notice disconnected clients.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        position = start
+        while True:
+            with job.changed:
+                if position >= len(job.events) and not job.finished:
+                    job.changed.wait(timeout)
+                new_events = job.events[position:]
+                finished = job.finished
+            position += len(new_events)
+            if not new_events and not finished:
+                yield None
+            yield from new_events
+            if finished and position >= len(job.events):
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        """Engine status: job counts, pool size and rate limit."""
+        jobs = self.list_jobs()
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        limiter = RateLimiter.default()
+        return {
+            "status": "ok",
+            "uptime": time.time() - self.started_at,
+            "workers": self.workers,
+            "jobs": counts,
+            "images_pending": sum(job.pending for job in jobs if not job.finished),
+            "rate_limit": {
+                "requests_per_second": limiter.requests_per_second,
+                "burst": limiter.burst,
+                "max_in_flight": limiter.max_in_flight,
+            },
+        }
+
+    def close(self) -> None:
+        """Stop accepting work, cancel queued images and wait for running ones."""
+        for job in self.list_jobs():
+            if not job.finished:
+                self.cancel(job.id)
+        self._pool.shutdown(wait=True)
+        self.executor.close()
+
+    def _run_image(self, job: ServiceJob, index: int) -> None:
+        with job.changed:
+            if job.finished:
+                return
+            if job.status == QUEUED:
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.publish({"type": "status", "status": RUNNING})
+        try:
+            with log_context(job=job.id, image=index):
+                path = self.executor.run(job.payloads[index])
+            error = None if path else "generation failed"
+        except Exception as e:
+            logger.error(f"Job {job.id} image {index} failed: {e}")
+            path, error = None, str(e)
+
+        with job.changed:
+            if path:
+                job.results[index] = str(path)
+            else:
+                job.errors[index] = error
+            job.publish({"type": "image", "index": index, "seed": job.payloads[index].get("seed"),
+                         "path": job.results[index], "error": error})
+            if job.finished:
+                return
+            job.pending -= 1
+            if job.pending:
+                return
+        # Last image: make sure queued writes are on disk before reporting the job done
+        self.executor.wait_for_writes()
+        with job.changed:
+            if not job.finished:
+                self._finish(job, DONE if any(job.results) else FAILED)
+
+    def _finish(self, job: ServiceJob, status: str) -> None:
+        """Mark a job finished. Call with job.changed held."""
+        job.status = status
+        job.finished_at = time.time()
+        job.publish({"type": "status", **job.to_dict(results=False)})
+        logger.info(f"Job {job.id} {status}: {job.to_dict(results=False)['succeeded']}/{len(job.payloads)} images")
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond max_finished_jobs. Call with _lock held."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in itertools.islice(finished, max(0, len(finished) - self.max_finished_jobs)):
+            del self._jobs[job_id]
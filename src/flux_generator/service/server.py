@@ -0,0 +1,197 @@
+"""
+Local HTTP service for FLUX Image Generator.
+
+A small JSON API over one shared ServiceEngine, so every tool submits
+work through one process instead of creating its own API client:
+
+* ``GET /health`` - engine status, job counts and rate limit
+* ``POST /jobs`` - submit a job (see ServiceEngine.build_payloads); 202 with its status
+* ``GET /jobs`` - all known jobs, newest last
+* ``GET /jobs/<id>`` - job status with per-image results
+* ``GET /jobs/<id>/events?from=N`` - newline-delimited JSON events until the job finishes
+* ``GET /jobs/<id>/images/<index>`` - the generated image file
+* ``DELETE /jobs/<id>`` - cancel images not yet started
+
+The server binds to localhost by default and has no authentication.
+"""
+
+import json
+import mimetypes
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from .engine import ServiceEngine
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_MAX_BODY = 1024 * 1024
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's engine."""
+
+    protocol_version = "HTTP/1.1"
+    server: "ServiceServer"
+
+    def do_GET(self) -> None:
+        parts, query = self._route()
+        if parts == ["health"]:
+            self._send_json(self.server.engine.stats())
+        elif parts == ["jobs"]:
+            self._send_json({"jobs": [job.to_dict(results=False) for job in self.server.engine.list_jobs()]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._job(parts[1])
+            if job:
+                self._send_json(job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            start = self._start_sequence(query)
+            if start is not None and self._job(parts[1]):
+                self._stream_events(parts[1], start)
+        elif len(parts) == 4 and parts[0] == "jobs" and parts[2] == "images":
+            job = self._job(parts[1])
+            if job:
+                self._send_image(job, parts[3])
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"No route for GET {self.path}")
+
+    def do_POST(self) -> None:
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            self._send_error(HTTPStatus.NOT_FOUND, f"No route for POST {self.path}")
+            return
+        request = self._read_json()
+        if request is None:
+            return
+        try:
+            job = self.server.engine.submit(request)
+        except (ValueError, TypeError) as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        self._send_json(job.to_dict(results=False), HTTPStatus.ACCEPTED, {"Location": f"/jobs/{job.id}"})
+
+    def do_DELETE(self) -> None:
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != "jobs":
+            self._send_error(HTTPStatus.NOT_FOUND, f"No route for DELETE {self.path}")
+            return
+        job = self.server.engine.cancel(parts[1])
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {parts[1]}")
+        else:
+            self._send_json(job.to_dict(results=False))
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _route(self) -> Tuple[list, Dict[str, list]]:
+        url = urlsplit(self.path)
+        return [part for part in url.path.split("/") if part], parse_qs(url.query)
+
+    def _start_sequence(self, query: Dict[str, list]) -> Optional[int]:
+        value = query.get("from", ["0"])[0]
+        try:
+            start = int(value)
+        except ValueError:
+            start = -1
+        if start < 0:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"from must be a non-negative integer, got {value!r}")
+            return None
+        return start
+
+    def _job(self, job_id: str):
+        job = self.server.engine.get(job_id)
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {job_id}")
+        return job
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > _MAX_BODY:
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+            return None
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+            return None
+        if not isinstance(data, dict):
+            self._send_error(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+            return None
+        return data
+
+    def _send_json(self, data: Any, status: HTTPStatus = HTTPStatus.OK, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json({"error": message}, status)
+
+    def _send_image(self, job, index: str) -> None:
+        try:
+            position = int(index)
+            if position < 0:
+                raise IndexError(position)
+            path = job.results[position]
+        except (ValueError, IndexError):
+            self._send_error(HTTPStatus.NOT_FOUND, f"No image {index} in job {job.id}")
+            return
+        if not path or not Path(path).is_file():
+            self._send_error(HTTPStatus.NOT_FOUND, f"Image {index} of job {job.id} is not available")
+            return
+        data = Path(path).read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_events(self, job_id: str, start: int) -> None:
+        """Write events as JSON lines until the job finishes; empty lines keep idle connections alive."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event in self.server.engine.events(job_id, start):
+                line = json.dumps(event, default=str) if event is not None else ""
+                self.wfile.write(line.encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"Client stopped following job {job_id}")
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the shared engine."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], engine: ServiceEngine):
+        super().__init__(address, ServiceRequestHandler)
+        self.engine = engine
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, engine: Optional[ServiceEngine] = None) -> None:
+    """Run the service until interrupted (defaults: service.host, service.port)."""
+    engine = engine or ServiceEngine()
+    server = ServiceServer((host or settings.service.host, port or settings.service.port), engine)
+    logger.info(f"FLUX service listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("FLUX service shutting down")
+    finally:
+        server.server_close()
+        engine.close()
@@ -0,0 +1,15 @@
+"""
+Output storage for FLUX Image Generator.
+
+This module contains writers and stores for generated images.
+"""
+
+from .layout import OutputLayout
+from .objects import ObjectStore
+from .catalog import Catalog
+from .tensors import TensorExport, TensorDataset
+from .shards import ShardWriter, iter_shard, read_indexed_sample
+from .writer import OutputWriter, WriteResult
+from .jobs import JobStore, Job
+
+__all__ = ["OutputLayout", "ObjectStore", "Catalog", "TensorExport", "TensorDataset", "ShardWriter", "iter_shard", "read_indexed_sample", "OutputWriter", "WriteResult", "JobStore", "Job"]
@@ -0,0 +1,428 @@
+"""
+SQLite catalog of generated images for FLUX Image Generator.
+
+Every saved output is recorded with its content hash, dimensions,
+prompt, style/aspect/quality, seed, API latency and lineage (adetailer
+outputs point to their source image), so images can be found with
+indexed queries instead of globbing directories. Existing output trees
+can be backfilled in parallel.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from ..config.prompts import PromptConfig
+from ..utils.hashing import HashService
+from ..utils.probe import ImageProbe
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    width INTEGER,
+    height INTEGER,
+    generator TEXT,
+    prompt TEXT,
+    style TEXT,
+    aspect TEXT,
+    quality TEXT,
+    aspect_ratio TEXT,
+    seed INTEGER,
+    output_format TEXT,
+    request_id TEXT,
+    latency REAL,
+    created_at REAL,
+    source_id INTEGER REFERENCES images(id) ON DELETE SET NULL,
+    source_path TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_images_style_aspect_latency ON images(style, aspect, latency);
+CREATE INDEX IF NOT EXISTS idx_images_quality ON images(quality);
+CREATE INDEX IF NOT EXISTS idx_images_generator_created ON images(generator, created_at);
+CREATE INDEX IF NOT EXISTS idx_images_seed ON images(seed);
+CREATE INDEX IF NOT EXISTS idx_images_digest ON images(digest);
+CREATE INDEX IF NOT EXISTS idx_images_source_id ON images(source_id);
+CREATE INDEX IF NOT EXISTS idx_images_source_path ON images(source_path);
+"""
+
+_COLUMNS = (
+    "path", "digest", "size", "mtime_ns", "width", "height", "generator", "prompt", "style",
+    "aspect", "quality", "aspect_ratio", "seed", "output_format", "request_id", "latency",
+    "created_at", "source_path", "metadata"
+)
+
+# Columns describing the file itself; always refreshed on upsert
+_FILE_COLUMNS = ("digest", "size", "mtime_ns", "width", "height")
+
+# Output sub-directories written by each generator
+_GENERATOR_DIRS = {
+    "enhanced": "EnhancedFluxGenerator",
+    "rotation": "CharacterRotationGenerator",
+    "adetailer_processed": "AdetailerGenerator",
+}
+
+
+def _normalize(path: Path) -> str:
+    """Absolute path string without resolving symlinks (outputs may link to objects)."""
+    return os.path.abspath(path)
+
+
+class Catalog:
+    """Indexed image catalog backed by SQLite."""
+
+    _default: Optional["Catalog"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, db_path: Path):
+        """Open (or create) the catalog database."""
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def default(cls) -> "Catalog":
+        """Shared catalog stored in the output directory."""
+        with cls._default_lock:
+            if cls._default is None:
+                from ..config.settings import settings
+                cls._default = cls(settings.paths.output_dir / "catalog.sqlite")
+            return cls._default
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def record(self, record, image_data: bytes) -> None:
+        """Output hook: catalog a generated image from its GenerationRecord."""
+        metadata = dict(record.metadata)
+        dimensions = ImageProbe.probe_bytes(image_data)
+        row = {
+            "path": _normalize(record.path),
+            "digest": record.digest,
+            "size": record.size or len(image_data),
+            "mtime_ns": None,
+            "width": dimensions[0] if dimensions else None,
+            "height": dimensions[1] if dimensions else None,
+            "generator": record.generator,
+            "prompt": record.prompt,
+            "style": metadata.pop("style", None),
+            "aspect": metadata.pop("aspect", None),
+            "quality": metadata.pop("quality", None),
+            "aspect_ratio": record.aspect_ratio,
+            "seed": record.seed,
+            "output_format": record.output_format,
+            "request_id": record.request_id,
+            "latency": record.latency,
+            "created_at": record.created_at,
+            "source_path": _normalize(record.source_path) if record.source_path else None,
+            "metadata": json.dumps(metadata, default=str) if metadata else None,
+        }
+        self.upsert_many([row])
+
+    __call__ = record
+
+    def upsert_many(self, rows: Iterable[Dict[str, Any]], overwrite: bool = True) -> int:
+        """
+        Insert or update rows keyed by path and resolve their lineage links.
+
+        With overwrite=False (backfill), descriptive columns already known
+        for a path are kept and only file facts (hash, size, dimensions)
+        are refreshed.
+        """
+        values = [tuple(row.get(column) for column in _COLUMNS) for row in rows]
+        if not values:
+            return 0
+
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        updates = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, {column})"
+            if overwrite or column in _FILE_COLUMNS else
+            f"{column} = COALESCE({column}, excluded.{column})"
+            for column in _COLUMNS[1:]
+        )
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT INTO images ({', '.join(_COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(path) DO UPDATE SET {updates}",
+                values
+            )
+            self._link_sources([(value[0],) for value in values])
+            self._conn.commit()
+        return len(values)
+
+    def _link_sources(self, paths: List[Tuple[str]]) -> None:
+        """
+        Point derived images at their source rows (either may be inserted first).
+
+        Only the rows just written and the rows naming them as source can
+        change, so both lookups go through the path and source_path indexes.
+        """
+        link = "UPDATE images SET source_id = (SELECT s.id FROM images s WHERE s.path = images.source_path) "
+        self._conn.executemany(link + "WHERE path = ? AND source_path IS NOT NULL AND source_id IS NULL", paths)
+        self._conn.executemany(link + "WHERE source_path = ? AND source_id IS NULL", paths)
+
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Catalog entry for a path, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM images WHERE path = ?", (_normalize(path),)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def query(
+        self,
+        style: Optional[str] = None,
+        aspect: Optional[str] = None,
+        quality: Optional[str] = None,
+        generator: Optional[str] = None,
+        seed: Optional[int] = None,
+        digest: Optional[str] = None,
+        min_latency: Optional[float] = None,
+        max_latency: Optional[float] = None,
+        created_after: Optional[float] = None,
+        order_by: str = "created_at",
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find images matching all given filters.
+
+        Example: query(style="cinematic", aspect="portrait", max_latency=60)
+        """
+        if order_by not in _COLUMNS and order_by != "id":
+            raise ValueError(f"Unknown order column: {order_by}")
+
+        conditions, params = [], []
+        for column, value in (
+            ("style", style), ("aspect", aspect), ("quality", quality),
+            ("generator", generator), ("seed", seed), ("digest", digest)
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        for condition, value in (
+            ("latency >= ?", min_latency), ("latency < ?", max_latency), ("created_at >= ?", created_after)
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        sql = "SELECT * FROM images"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def get_lineage(self, path: Path) -> List[Dict[str, Any]]:
+        """Chain of entries from the given image back to its original source."""
+        with self._lock:
+            rows = self._conn.execute(
+                "WITH RECURSIVE chain(id, depth) AS ("
+                " SELECT id, 0 FROM images WHERE path = ?"
+                " UNION ALL SELECT images.source_id, chain.depth + 1 FROM images JOIN chain ON images.id = chain.id"
+                " WHERE images.source_id IS NOT NULL)"
+                " SELECT images.* FROM chain JOIN images ON images.id = chain.id ORDER BY chain.depth",
+                (_normalize(path),)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def get_derivatives(self, path: Path) -> List[Dict[str, Any]]:
+        """Entries derived directly from the given image."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.* FROM images d JOIN images s ON d.source_id = s.id WHERE s.path = ?",
+                (_normalize(path),)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def find_duplicates(self) -> List[List[str]]:
+        """Groups of paths sharing identical content."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT group_concat(path, char(10)) FROM images WHERE digest IS NOT NULL "
+                "GROUP BY digest HAVING COUNT(*) > 1"
+            ).fetchall()
+        return [row[0].split("\n") for row in rows]
+
+    def remove_missing(self) -> int:
+        """Delete entries whose files no longer exist."""
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM images")]
+            missing = [(path,) for path in paths if not os.path.exists(path)]
+            self._conn.executemany("DELETE FROM images WHERE path = ?", missing)
+            self._conn.commit()
+        return len(missing)
+
+    def merge_metadata(self, updates: Dict[Path, Dict[str, Any]]) -> int:
+        """Merge keys into the metadata JSON of cataloged images; unknown paths are ignored."""
+        rows = [(json.dumps(values, default=str), _normalize(path)) for path, values in updates.items()]
+        with self._lock:
+            cursor = self._conn.executemany(
+                "UPDATE images SET metadata = json_patch(coalesce(metadata, '{}'), ?) WHERE path = ?", rows)
+            self._conn.commit()
+        return cursor.rowcount
+
+    def rename_paths(self, moved: Dict[Path, Path]) -> int:
+        """Update entries (and lineage references) for files moved on disk."""
+        pairs = [(_normalize(new), _normalize(old)) for old, new in moved.items()]
+        with self._lock:
+            self._conn.executemany("UPDATE images SET path = ? WHERE path = ?", pairs)
+            self._conn.executemany("UPDATE images SET source_path = ? WHERE source_path = ?", pairs)
+            self._conn.commit()
+        return len(pairs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counts per generator and style."""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+            by_generator = dict(self._conn.execute(
+                "SELECT generator, COUNT(*) FROM images GROUP BY generator").fetchall())
+            by_style = dict(self._conn.execute(
+                "SELECT style, COUNT(*) FROM images WHERE style IS NOT NULL GROUP BY style").fetchall())
+        return {"total": total, "by_generator": by_generator, "by_style": by_style}
+
+    def backfill(
+        self,
+        root: Path,
+        workers: Optional[int] = None,
+        hash_service: Optional[HashService] = None,
+        adetailer_suffix: str = "_adetailer"
+    ) -> Dict[str, int]:
+        """
+        Index existing output trees in parallel.
+
+        Files already cataloged with the same size and mtime are skipped.
+        Metadata is inferred from the directory layout and file names
+        ({style}_woman_{seed}, rotation_{angle}_{seed}, {stem}_adetailer).
+
+        Args:
+            root: Output directory to scan
+            workers: Worker processes for hashing and threads for probing
+            hash_service: Hash service (default: shared cached service)
+            adetailer_suffix: Suffix marking adetailer outputs for lineage
+
+        Returns:
+            Counts of scanned, indexed and skipped files
+        """
+        hash_service = hash_service or HashService.default()
+        files = self._scan(root)
+        with self._lock:
+            known = {
+                row[0]: (row[1], row[2])
+                for row in self._conn.execute("SELECT path, size, mtime_ns FROM images")
+            }
+        changed = [(path, stat) for path, stat in files
+                   if known.get(_normalize(path)) != (stat.st_size, stat.st_mtime_ns)]
+        logger.info(f"Catalog backfill: {len(files)} files found, {len(changed)} new or changed")
+
+        digests = hash_service.hash_many([path for path, _ in changed], processes=workers)
+        with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+            dimensions = list(pool.map(ImageProbe.probe_file, [path for path, _ in changed]))
+
+        names = {path.name: path for path, _ in files
+                 if path.relative_to(root).parts[0] != "adetailer_processed"}
+        rows = []
+        for (path, stat), size in zip(changed, dimensions):
+            row = self._infer_metadata(path, root, names, adetailer_suffix)
+            row.update({
+                "path": _normalize(path),
+                "digest": digests.get(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "width": size[0] if size else None,
+                "height": size[1] if size else None,
+                "created_at": stat.st_mtime,
+            })
+            if size:
+                row["aspect"], row["aspect_ratio"] = self._nearest_aspect(*size)
+            rows.append(row)
+
+        indexed = self.upsert_many(rows, overwrite=False)
+        logger.info(f"Catalog backfill indexed {indexed} images")
+        return {"scanned": len(files), "indexed": indexed, "skipped": len(files) - len(changed)}
+
+    @staticmethod
+    def _scan(root: Path) -> List[Tuple[Path, os.stat_result]]:
+        """Image files under root with their stats, skipping hidden directories."""
+        found = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("."):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(Path(entry.path))
+                        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                            found.append((Path(entry.path), entry.stat()))
+            except OSError as e:
+                logger.warning(f"Cannot scan {directory}: {e}")
+        return found
+
+    @staticmethod
+    def _infer_metadata(path: Path, root: Path, names: Dict[str, Path], adetailer_suffix: str) -> Dict[str, Any]:
+        """Best-effort metadata from the output layout and file name."""
+        relative = path.relative_to(root)
+        subdir = relative.parts[0] if len(relative.parts) > 1 else ""
+        stem = path.stem
+        row: Dict[str, Any] = {"generator": _GENERATOR_DIRS.get(subdir, subdir or None),
+                               "output_format": path.suffix.lstrip(".").lower()}
+        metadata: Dict[str, Any] = {}
+
+        if stem.endswith(adetailer_suffix):
+            source_name = stem[:-len(adetailer_suffix)] + path.suffix
+            if source_name in names:
+                row["source_path"] = _normalize(names[source_name])
+            stem = stem[:-len(adetailer_suffix)]
+
+        base, _, seed = stem.rpartition("_")
+        if seed.isdigit():
+            row["seed"] = int(seed)
+            stem = base
+        if stem.endswith("_woman") and stem[:-len("_woman")] in PromptConfig.PROMPTS:
+            row["style"] = stem[:-len("_woman")]
+        elif stem.startswith("rotation_"):
+            metadata["angle"] = stem[len("rotation_"):]
+        row["metadata"] = json.dumps(metadata) if metadata else None
+        return row
+
+    @staticmethod
+    def _nearest_aspect(width: int, height: int) -> Tuple[str, str]:
+        """Named aspect (and its ratio string) closest to the given dimensions."""
+        def distance(item):
+            w, h = map(int, item[1].split(":"))
+            return abs(w / h - width / height)
+        return min(PromptConfig.ASPECT_RATIOS.items(), key=distance)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        data = dict(row)
+        if data.get("metadata"):
+            data["metadata"] = json.loads(data["metadata"])
+        return data
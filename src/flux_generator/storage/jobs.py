@@ -0,0 +1,275 @@
+"""
+SQLite job store for FLUX Image Generator.
+
+A batch is a list of JSON job payloads stored in one table. Workers in
+any number of processes - or on any number of machines sharing the
+database file - claim the next pending job with a single atomic
+UPDATE ... RETURNING, report a result or an error, and the submitter
+reads results back in batch order.
+
+A claim can carry a lease: the worker renews it with heartbeats while
+the job runs, and once it expires (the worker died or lost the network)
+the job can be claimed again. Completions are only accepted from the
+worker currently holding the job, so a late result from an expired
+claim cannot overwrite the newer one. Jobs claimed max_attempts times
+without finishing are marked failed.
+
+Local databases run in WAL mode so claims do not block readers. WAL
+needs shared memory on one host, so a database shared by several
+machines over a network filesystem uses the rollback journal instead.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    lease_expires REAL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_jobs_batch_status ON jobs(batch, status, position);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs(status, lease_expires);
+"""
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    """A claimed job."""
+    id: int
+    batch: str
+    position: int
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class JobStore:
+    """Batches of JSON jobs shared by worker processes."""
+
+    _default: Optional["JobStore"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, db_path: Path, wal: bool = True):
+        """Open (or create) the job database; wal=False for a database shared over the network."""
+        self.db_path = db_path
+        self.wal = wal
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=60)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._conn.execute(f"PRAGMA synchronous={'NORMAL' if wal else 'FULL'}")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.executescript(_INDEXES)
+        self._conn.commit()
+
+    @classmethod
+    def default(cls) -> "JobStore":
+        """Shared job store: generation.job_queue, or output/jobs.sqlite."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls.open()
+            return cls._default
+
+    @classmethod
+    def open(cls, db_path: Optional[Path] = None) -> "JobStore":
+        """
+        Open a job store the way every worker opening the same path must.
+
+        No path means generation.job_queue if set, else the local
+        output/jobs.sqlite. Only the local default uses WAL; any other
+        path may be a queue shared with other machines.
+        """
+        from ..config.settings import settings
+        if db_path is None and settings.generation.job_queue:
+            db_path = Path(settings.generation.job_queue)
+        if db_path is None:
+            return cls(settings.paths.output_dir / "jobs.sqlite")
+        return cls(Path(db_path), wal=False)
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_expires" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def create_batch(self, payloads: Iterable[Dict[str, Any]], batch: Optional[str] = None) -> str:
+        """Store a batch of pending jobs; returns the batch id."""
+        batch = batch or uuid.uuid4().hex
+        now = time.time()
+        rows = [(batch, position, json.dumps(payload, default=str), now) for position, payload in enumerate(payloads)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO jobs (batch, position, payload, created_at) VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        logger.info(f"Created job batch {batch} with {len(rows)} jobs")
+        return batch
+
+    def claim(
+        self,
+        batch: Optional[str],
+        worker: str,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None
+    ) -> Optional[Job]:
+        """
+        Atomically take the next claimable job, or None when none is left.
+
+        Claimable are pending jobs and running jobs whose lease expired.
+
+        Args:
+            batch: Batch to claim from (None: any batch, oldest job first)
+            worker: Unique name of the claiming worker
+            lease_seconds: Lease length; None claims without expiry
+            max_attempts: Expired jobs already claimed this often are marked failed instead
+
+        Returns:
+            The claimed job, or None
+        """
+        now = time.time()
+        scope, params = ("batch = ? AND ", (batch,)) if batch is not None else ("", ())
+        lease = now + lease_seconds if lease_seconds else None
+        with self._lock:
+            if max_attempts:
+                failed = self._conn.execute(
+                    f"UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_expires = NULL "
+                    f"WHERE {scope}status = ? AND lease_expires < ? AND attempts >= ?",
+                    (FAILED, f"lease expired after {max_attempts} attempts", now, *params, RUNNING, now, max_attempts)
+                ).rowcount
+                if failed:
+                    logger.warning(f"Marked {failed} jobs failed after {max_attempts} expired claims")
+            row = self._conn.execute(
+                f"UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, lease_expires = ? "
+                f"WHERE id = (SELECT id FROM jobs WHERE {scope}"
+                f"(status = ? OR (status = ? AND lease_expires < ?)) ORDER BY id LIMIT 1) "
+                f"RETURNING id, batch, position, payload, attempts",
+                (RUNNING, worker, now, lease, *params, PENDING, RUNNING, now)
+            ).fetchone()
+            self._conn.commit()
+        if row is None:
+            return None
+        if row["attempts"] > 1:
+            logger.info(f"Reclaimed job {row['id']} (attempt {row['attempts']})")
+        return Job(row["id"], row["batch"], row["position"], json.loads(row["payload"]), row["attempts"])
+
+    def renew(self, claims: Dict[int, str], lease_seconds: float) -> List[int]:
+        """Extend the leases of running jobs {job_id: worker}; returns ids whose claim was lost."""
+        lease = time.time() + lease_seconds
+        lost = []
+        with self._lock:
+            for job_id, worker in claims.items():
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = ?",
+                    (lease, job_id, worker, RUNNING))
+                if not cursor.rowcount:
+                    lost.append(job_id)
+            self._conn.commit()
+        return lost
+
+    def complete(self, job_id: int, result: Any, worker: Optional[str] = None) -> bool:
+        """Mark a job done with a JSON-serializable result; False if worker no longer holds it."""
+        return self._finish(job_id, DONE, worker, result=json.dumps(result, default=str))
+
+    def fail(self, job_id: int, error: str, retry: bool = False, worker: Optional[str] = None) -> bool:
+        """Mark a job failed, or put it back in the queue when retry is set; False if worker no longer holds it."""
+        return self._finish(job_id, PENDING if retry else FAILED, worker, error=error)
+
+    def _finish(
+        self,
+        job_id: int,
+        status: str,
+        worker: Optional[str],
+        result: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        owner, params = (" AND worker = ? AND status = ?", (worker, RUNNING)) if worker else ("", ())
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires = NULL "
+                f"WHERE id = ?{owner}",
+                (status, result, error, time.time(), job_id, *params))
+            self._conn.commit()
+        if not cursor.rowcount:
+            logger.warning(f"Discarded result of job {job_id}: claim by {worker} expired")
+            return False
+        return True
+
+    def requeue_running(self, batch: str) -> int:
+        """Return jobs left running (e.g. by a crashed worker) to the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL WHERE batch = ? AND status = ?",
+                (PENDING, batch, RUNNING))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """Number of jobs per status, of one batch or of all."""
+        scope, params = ("WHERE batch = ? ", (batch,)) if batch is not None else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, COUNT(*) FROM jobs {scope}GROUP BY status", params).fetchall()
+        return {status: count for status, count in rows}
+
+    def batches(self) -> List[Dict[str, Any]]:
+        """All batches, oldest first, with their job counts per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT batch, status, COUNT(*) AS count, MIN(created_at) AS created_at FROM jobs "
+                "GROUP BY batch, status").fetchall()
+        batches: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            entry = batches.setdefault(row["batch"], {"batch": row["batch"], "created_at": row["created_at"]})
+            entry["created_at"] = min(entry["created_at"], row["created_at"])
+            entry[row["status"]] = row["count"]
+        return sorted(batches.values(), key=lambda entry: entry["created_at"])
+
+    def results(self, batch: str) -> List[Dict[str, Any]]:
+        """All jobs of a batch in position order, with decoded payload and result."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, payload, status, result, error, worker, attempts FROM jobs "
+                "WHERE batch = ? ORDER BY position", (batch,)).fetchall()
+        return [
+            {
+                "position": row["position"],
+                "payload": json.loads(row["payload"]),
+                "status": row["status"],
+                "result": json.loads(row["result"]) if row["result"] is not None else None,
+                "error": row["error"],
+                "worker": row["worker"],
+                "attempts": row["attempts"],
+            }
+            for row in rows
+        ]
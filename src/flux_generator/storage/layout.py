@@ -0,0 +1,156 @@
+"""
+Sharded output directory layout for FLUX Image Generator.
+
+Maps logical output names (``cinematic_woman_1000.jpeg`` in
+``enhanced/``) to physical paths so that no single directory grows to
+tens of thousands of entries:
+
+    flat   enhanced/cinematic_woman_1000.jpeg
+    hash   enhanced/3f/a2/cinematic_woman_1000.jpeg   (hash of the name)
+    seed   enhanced/0001000-0001999/cinematic_woman_1000.jpeg
+    date   enhanced/2025/06/14/cinematic_woman_1000.jpeg
+
+Hash and seed buckets are derived from the name alone, so a file can be
+located without listing directories. ``locate`` also checks the other
+schemes, which keeps lookups working while a tree is being migrated.
+"""
+
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional, Dict, Iterable, Iterator, List, Tuple
+
+from ..utils.indexer import DirectoryIndexer, IMAGE_EXTENSIONS
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Output subdirectories holding derived artifacts rather than generations
+DERIVED_OUTPUT_DIRS = ("shards", "tensors", "contact_sheets", "derivatives")
+
+LAYOUT_SCHEMES = ("flat", "hash", "seed", "date")
+_SEED_SUFFIX = re.compile(r"_(\d+)(?:_[A-Za-z]\w*)?$")
+
+
+class OutputLayout:
+    """Resolver from logical output names to sharded physical paths."""
+
+    def __init__(self, scheme: str = "flat", depth: int = 2, width: int = 2, bucket_size: int = 1000):
+        """Initialize layout; depth/width apply to hash, bucket_size to seed."""
+        if scheme not in LAYOUT_SCHEMES:
+            raise ValueError(f"Unknown layout scheme: {scheme}. Available: {list(LAYOUT_SCHEMES)}")
+        self.scheme = scheme
+        self.depth = max(1, depth)
+        self.width = max(1, width)
+        self.bucket_size = max(1, bucket_size)
+
+    @classmethod
+    def from_settings(cls) -> "OutputLayout":
+        """Layout configured in settings."""
+        from ..config.settings import settings
+        storage = settings.storage
+        return cls(storage.layout, depth=storage.layout_depth, bucket_size=storage.layout_bucket_size)
+
+    @staticmethod
+    def seed_from_name(filename: str) -> Optional[int]:
+        """Seed parsed from {base}_{seed}[_{suffix}].ext names."""
+        match = _SEED_SUFFIX.search(Path(filename).stem)
+        return int(match.group(1)) if match else None
+
+    def shard_parts(self, filename: str, seed: Optional[int] = None, when: Optional[float] = None) -> Tuple[str, ...]:
+        """Subdirectory components for a logical file name."""
+        if self.scheme == "hash":
+            digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()
+            return tuple(digest[i * self.width:(i + 1) * self.width] for i in range(self.depth))
+        if self.scheme == "seed":
+            seed = seed if seed is not None else self.seed_from_name(filename)
+            if seed is None:
+                return ("unseeded",)
+            start = seed // self.bucket_size * self.bucket_size
+            return (f"{start:07d}-{start + self.bucket_size - 1:07d}",)
+        if self.scheme == "date":
+            return tuple(time.strftime("%Y/%m/%d", time.localtime(when)).split("/"))
+        return ()
+
+    def resolve(self, directory: Path, filename: str, seed: Optional[int] = None, when: Optional[float] = None) -> Path:
+        """Physical path for a new output named filename in directory."""
+        return directory.joinpath(*self.shard_parts(filename, seed, when), filename)
+
+    def locate(self, directory: Path, filename: str) -> Optional[Path]:
+        """Find an existing output by logical name, whatever scheme it was written with."""
+        candidates = [self.resolve(directory, filename)]
+        for scheme in LAYOUT_SCHEMES:
+            if scheme not in (self.scheme, "date"):
+                other = OutputLayout(scheme, self.depth, self.width, self.bucket_size)
+                candidates.append(other.resolve(directory, filename))
+        for candidate in candidates:
+            if candidate.exists():
+                return candidate
+        # Date buckets cannot be derived from the name
+        for match in directory.glob(f"[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/{filename}"):
+            return match
+        return None
+
+    @staticmethod
+    def iter_files(directory: Path, extensions: Iterable[str] = IMAGE_EXTENSIONS) -> Iterator[Path]:
+        """All image files under directory at any shard depth (hidden entries skipped)."""
+        return DirectoryIndexer(directory, extensions=extensions).paths()
+
+    def migrate(self, directory: Path, dry_run: bool = False) -> Dict[Path, Path]:
+        """
+        Move every image under directory into this layout.
+
+        Moves are plain renames within one directory tree, so the
+        migration is cheap and can be re-run after an interruption.
+        Empty shard directories left behind are removed.
+
+        Returns:
+            Mapping of old path -> new path for moved files
+        """
+        moved: Dict[Path, Path] = {}
+        conflicts = 0
+        for path in list(self.iter_files(directory)):
+            when = path.stat().st_mtime if self.scheme == "date" else None
+            target = self.resolve(directory, path.name, when=when)
+            if target == path:
+                continue
+            if target.exists():
+                conflicts += 1
+                logger.warning(f"Not moving {path}: {target} already exists")
+                continue
+            if not dry_run:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.rename(path, target)
+            moved[path] = target
+
+        if not dry_run:
+            self._remove_empty_dirs(directory)
+        logger.info(f"Layout migration of {directory} to '{self.scheme}': {len(moved)} files "
+                    f"{'would be ' if dry_run else ''}moved, {conflicts} conflicts")
+        return moved
+
+    @staticmethod
+    def _remove_empty_dirs(directory: Path) -> None:
+        """Remove empty non-hidden subdirectories, deepest first."""
+        for root, dirs, files in os.walk(directory, topdown=False):
+            path = Path(root)
+            if path == directory or any(part.startswith(".") for part in path.relative_to(directory).parts):
+                continue
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+
+    def migrate_tree(self, root: Path, subdirs: Optional[List[str]] = None, dry_run: bool = False) -> Dict[Path, Path]:
+        """Migrate each generator subdirectory of an output root."""
+        subdirs = subdirs or sorted(
+            entry.name for entry in os.scandir(root)
+            if entry.is_dir() and not entry.name.startswith(".")
+            and entry.name not in DERIVED_OUTPUT_DIRS
+        )
+        moved: Dict[Path, Path] = {}
+        for subdir in subdirs:
+            moved.update(self.migrate(root / subdir, dry_run=dry_run))
+        return moved
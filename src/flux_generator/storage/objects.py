@@ -0,0 +1,199 @@
+"""
+Content-addressed object store for FLUX Image Generator.
+
+Image bytes are stored once under ``data/output/.objects/ab/cdef...``
+keyed by their content digest, and the usual human-readable outputs
+(``enhanced/``, ``rotation/``, ...) are hard links (or symlinks) to
+those objects. Identical images produced by different generators or
+repeated runs therefore share one copy on disk.
+
+Objects must never be modified in place: outputs are always replaced
+by renaming a new link over them, which leaves the object untouched.
+"""
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Tuple
+
+from ..utils.base import BaseUtils, FileUtils
+from ..utils.hashing import HashService
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LINK_MODES = ("hardlink", "symlink")
+
+
+class ObjectStore:
+    """Digest-keyed blob store exposing objects through links."""
+
+    def __init__(
+        self,
+        root: Path,
+        hash_service: Optional[HashService] = None,
+        link_mode: str = "hardlink",
+        fsync: bool = False
+    ):
+        """Initialize store rooted at the given directory."""
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode}. Available: {list(LINK_MODES)}")
+        self.root = root
+        self.hash_service = hash_service or HashService.default()
+        self.link_mode = link_mode
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "deduplicated": 0, "bytes_saved": 0, "copy_fallbacks": 0}
+        BaseUtils.ensure_directory(root)
+
+    @classmethod
+    def from_settings(cls) -> "ObjectStore":
+        """Store under the output directory configured in settings."""
+        from ..config.settings import settings
+        return cls(
+            root=settings.paths.output_dir / ".objects",
+            link_mode=settings.storage.link_mode,
+            fsync=settings.storage.fsync
+        )
+
+    def object_path(self, digest: str) -> Path:
+        """Path of the object with the given digest."""
+        return self.root / digest[:2] / digest[2:]
+
+    def contains(self, digest: str) -> bool:
+        """Check whether an object is already stored."""
+        return self.object_path(digest).exists()
+
+    def put_bytes(self, data: bytes, digest: Optional[str] = None) -> Tuple[str, bool]:
+        """Store data if not present; returns (digest, newly_stored)."""
+        digest = digest or self.hash_service.hash_bytes(data)
+        object_path = self.object_path(digest)
+        if object_path.exists():
+            self._count(deduplicated=1, bytes_saved=len(data))
+            return digest, False
+        FileUtils.atomic_write(object_path, data, fsync=self.fsync)
+        self._count(stored=1)
+        return digest, True
+
+    def adopt_temp_file(self, tmp_path: Path, digest: str, size: int) -> bool:
+        """Move a fully written temp file into the store; returns True if it was new."""
+        object_path = self.object_path(digest)
+        if object_path.exists():
+            tmp_path.unlink(missing_ok=True)
+            self._count(deduplicated=1, bytes_saved=size)
+            return False
+        BaseUtils.ensure_directory(object_path.parent)
+        os.replace(tmp_path, object_path)
+        self._count(stored=1)
+        return True
+
+    def link(self, digest: str, output_path: Path) -> Path:
+        """Atomically expose an object at output_path."""
+        object_path = self.object_path(digest)
+        if not object_path.exists():
+            raise FileNotFoundError(f"Object not found: {digest}")
+
+        BaseUtils.ensure_directory(output_path.parent)
+        tmp_path = FileUtils.temp_path_for(output_path)
+        tmp_path.unlink(missing_ok=True)
+        try:
+            if self.link_mode == "symlink":
+                os.symlink(os.path.relpath(object_path, output_path.parent), tmp_path)
+            else:
+                try:
+                    os.link(object_path, tmp_path)
+                except OSError as e:
+                    # Cross-device or link-count limits: fall back to a private copy
+                    logger.debug(f"Hard link failed for {output_path.name} ({e}); copying")
+                    shutil.copyfile(object_path, tmp_path)
+                    self._count(copy_fallbacks=1)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        if self.fsync:
+            FileUtils.fsync_directory(output_path.parent)
+        return output_path
+
+    def store(self, data: bytes, output_path: Path, digest: Optional[str] = None) -> str:
+        """Store data and expose it at output_path; returns the digest."""
+        digest, _ = self.put_bytes(data, digest)
+        self.link(digest, output_path)
+        self.hash_service.record(output_path, digest)
+        return digest
+
+    def ingest_file(self, file_path: Path) -> Optional[str]:
+        """Replace an existing regular file with a link to its stored object."""
+        if file_path.is_symlink() or not file_path.is_file():
+            return None
+
+        digest = self.hash_service.hash_file(file_path)
+        object_path = self.object_path(digest)
+        stat = file_path.stat()
+        if object_path.exists():
+            if os.path.samefile(object_path, file_path):
+                return digest
+            self._count(deduplicated=1, bytes_saved=stat.st_size)
+        else:
+            BaseUtils.ensure_directory(object_path.parent)
+            try:
+                os.link(file_path, object_path)
+            except OSError:
+                shutil.copyfile(file_path, object_path)
+            self._count(stored=1)
+        self.link(digest, file_path)
+        return digest
+
+    def ingest_directory(
+        self,
+        directory: Path,
+        patterns: Iterable[str] = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+    ) -> Dict[str, Any]:
+        """Convert existing outputs under a directory into links to stored objects."""
+        before = self.get_stats()
+        files = 0
+        for pattern in patterns:
+            for path in sorted(directory.rglob(pattern)):
+                if self.root in path.parents:
+                    continue
+                try:
+                    if self.ingest_file(path):
+                        files += 1
+                except OSError as e:
+                    logger.error(f"Could not ingest {path}: {e}")
+
+        after = self.get_stats()
+        result = {
+            "files": files,
+            "new_objects": after["stored"] - before["stored"],
+            "deduplicated": after["deduplicated"] - before["deduplicated"],
+            "bytes_saved": after["bytes_saved"] - before["bytes_saved"],
+        }
+        logger.info(f"Ingested {files} files into object store: {result['deduplicated']} duplicates, "
+                    f"{result['bytes_saved'] / 1024 / 1024:.1f} MB saved")
+        return result
+
+    def collect_garbage(self) -> int:
+        """Remove hard-linked objects no longer referenced by any output."""
+        if self.link_mode != "hardlink":
+            logger.warning("Garbage collection only supports the hardlink mode")
+            return 0
+
+        removed = 0
+        for object_path in self.root.glob("*/*"):
+            if object_path.is_file() and object_path.stat().st_nlink == 1:
+                object_path.unlink()
+                removed += 1
+        logger.info(f"Removed {removed} unreferenced objects")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for objects stored, deduplicated and bytes saved."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
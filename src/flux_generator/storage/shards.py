@@ -0,0 +1,292 @@
+"""
+WebDataset-style tar shard export for FLUX Image Generator.
+
+Samples (an image plus its JSON metadata, sharing one key) are streamed
+into uncompressed tar shards capped by size and sample count, so
+training jobs can read a dataset sequentially instead of opening
+millions of small files. Each finished shard gets a JSON-lines index
+next to it with the byte offset and size of every member, allowing
+random access without scanning the tar.
+
+Shards are written as hidden temporary files and renamed into place
+when complete, so readers never see a partial shard.
+"""
+
+import atexit
+import io
+import json
+import os
+import re
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Iterable, List, Tuple
+
+from ..utils.base import BaseUtils
+from ..utils.probe import ImageProbe
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TAR_BLOCK_SIZE = 512
+_KEY_UNSAFE = re.compile(r"[^A-Za-z0-9_/-]")
+_SEED_SUFFIX = re.compile(r"_(\d+)$")
+
+
+def _padded(size: int) -> int:
+    """Size rounded up to a whole number of tar blocks."""
+    return (size + TAR_BLOCK_SIZE - 1) // TAR_BLOCK_SIZE * TAR_BLOCK_SIZE
+
+
+class ShardWriter:
+    """Streaming writer of size-bounded tar shards with per-shard indexes."""
+
+    _default: Optional["ShardWriter"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        output_dir: Path,
+        prefix: str = "shard",
+        max_shard_bytes: int = 1024 * 1024 * 1024,
+        max_shard_samples: int = 10000
+    ):
+        """Initialize writer; shard numbering continues after existing shards."""
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.max_shard_bytes = max_shard_bytes
+        self.max_shard_samples = max_shard_samples
+        BaseUtils.ensure_directory(output_dir)
+
+        self._lock = threading.Lock()
+        self._tar: Optional[tarfile.TarFile] = None
+        self._tmp_path: Optional[Path] = None
+        self._index: List[Dict[str, Any]] = []
+        self._keys: set = set()
+        self._shard_number = self._next_shard_number()
+        self._shard_bytes = 0
+        self._closed = False
+        self.shards_written: List[Path] = []
+        self.samples_written = 0
+
+    @classmethod
+    def default(cls) -> "ShardWriter":
+        """Shared writer configured from settings, closed at interpreter exit."""
+        with cls._default_lock:
+            if cls._default is None or cls._default._closed:
+                from ..config.settings import settings
+                storage = settings.storage
+                cls._default = cls(
+                    output_dir=settings.paths.output_dir / "shards",
+                    max_shard_bytes=storage.shard_max_bytes,
+                    max_shard_samples=storage.shard_max_samples
+                )
+                atexit.register(cls._default.close)
+            return cls._default
+
+    def _next_shard_number(self) -> int:
+        """First shard number not used by a shard already in the directory."""
+        pattern = re.compile(rf"^{re.escape(self.prefix)}-(\d+)\.tar$")
+        numbers = [int(m.group(1)) for m in map(pattern.match, os.listdir(self.output_dir)) if m]
+        return max(numbers) + 1 if numbers else 0
+
+    def shard_path(self, number: int) -> Path:
+        """Final path of the shard with the given number."""
+        return self.output_dir / f"{self.prefix}-{number:06d}.tar"
+
+    @staticmethod
+    def make_key(path: Path, root: Optional[Path] = None) -> str:
+        """Sample key from a file path (WebDataset keys must not contain dots)."""
+        relative = path.relative_to(root) if root and root in path.parents else Path(path.name)
+        return _KEY_UNSAFE.sub("_", str(relative.with_suffix("")))
+
+    def add(self, key: str, image_data: bytes, metadata: Dict[str, Any], extension: str = "jpg") -> None:
+        """Append one sample (image + JSON metadata) to the current shard."""
+        metadata_bytes = json.dumps(metadata, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        sample_bytes = _padded(len(image_data)) + _padded(len(metadata_bytes)) + 2 * TAR_BLOCK_SIZE
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ShardWriter is closed")
+            if self._tar and (
+                len(self._index) >= self.max_shard_samples
+                or self._shard_bytes + sample_bytes > self.max_shard_bytes
+            ):
+                self._finish_shard()
+            if self._tar is None:
+                self._start_shard()
+
+            if key in self._keys:
+                logger.warning(f"Duplicate sample key in shard: {key}")
+            self._keys.add(key)
+
+            mtime = time.time()
+            members = {}
+            for ext, data in ((extension.lstrip("."), image_data), ("json", metadata_bytes)):
+                info = tarfile.TarInfo(name=f"{key}.{ext}")
+                info.size = len(data)
+                info.mtime = mtime
+                info.mode = 0o644
+                self._tar.addfile(info, io.BytesIO(data))
+                members[ext] = [self._tar.offset - _padded(len(data)), len(data)]
+            self._index.append({"key": key, "members": members})
+            self._shard_bytes = self._tar.offset
+            self.samples_written += 1
+
+    def write_record(self, record, image_data: bytes) -> None:
+        """Output hook: add a generated image with its GenerationRecord metadata."""
+        extension = record.path.suffix.lstrip(".") or "jpg"
+        metadata = record.to_dict()
+        dimensions = ImageProbe.probe_bytes(image_data)
+        if dimensions:
+            metadata["width"], metadata["height"] = dimensions
+        # Key from the logical name so it does not depend on the output layout
+        key = _KEY_UNSAFE.sub("_", f"{record.generator}/{record.path.stem}")
+        self.add(key, image_data, metadata, extension)
+
+    __call__ = write_record
+
+    def _start_shard(self) -> None:
+        final_path = self.shard_path(self._shard_number)
+        while final_path.exists():
+            self._shard_number += 1
+            final_path = self.shard_path(self._shard_number)
+        self._tmp_path = final_path.with_name(f".{final_path.name}.{os.getpid()}.tmp")
+        self._tar = tarfile.open(self._tmp_path, "w")
+        self._index = []
+        self._keys = set()
+        self._shard_bytes = 0
+
+    def _finish_shard(self) -> None:
+        """Close the current shard, write its index and rename both into place."""
+        self._tar.close()
+        final_path = self.shard_path(self._shard_number)
+        index_path = final_path.with_suffix(".idx.jsonl")
+        shard_name = final_path.name
+
+        tmp_index = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            for entry in self._index:
+                f.write(json.dumps({"shard": shard_name, **entry}) + "\n")
+        os.replace(tmp_index, index_path)
+        os.replace(self._tmp_path, final_path)
+
+        logger.info(f"Wrote shard {shard_name}: {len(self._index)} samples, "
+                    f"{final_path.stat().st_size / 1024 / 1024:.1f} MB")
+        self.shards_written.append(final_path)
+        self._tar = None
+        self._tmp_path = None
+        self._shard_number += 1
+
+    def flush(self) -> None:
+        """Finish the current shard so everything written so far is readable."""
+        with self._lock:
+            if self._tar:
+                self._finish_shard()
+
+    def close(self) -> None:
+        """Finish the current shard and stop accepting samples."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._tar:
+                if self._index:
+                    self._finish_shard()
+                else:
+                    self._tar.close()
+                    self._tmp_path.unlink(missing_ok=True)
+                    self._tar = None
+            self._closed = True
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @classmethod
+    def export_directory(
+        cls,
+        source_dir: Path,
+        output_dir: Path,
+        patterns: Iterable[str] = ("*.jpg", "*.jpeg", "*.png", "*.webp"),
+        metadata_lookup=None,
+        **writer_kwargs
+    ) -> List[Path]:
+        """
+        Pack existing outputs under source_dir into shards.
+
+        Args:
+            source_dir: Directory tree of generated images
+            output_dir: Directory for the shards and their indexes
+            patterns: File name patterns to export
+            metadata_lookup: Optional callable path -> dict of extra metadata
+            **writer_kwargs: Passed to ShardWriter (prefix, size limits)
+
+        Returns:
+            Paths of the shards written
+        """
+        paths = set()
+        for pattern in patterns:
+            paths.update(p for p in source_dir.rglob(pattern)
+                         if p.is_file() and not any(part.startswith(".") for part in p.relative_to(source_dir).parts))
+
+        with cls(output_dir, **writer_kwargs) as writer:
+            for path in sorted(paths):
+                try:
+                    image_data = path.read_bytes()
+                except OSError as e:
+                    logger.error(f"Could not read {path}: {e}")
+                    continue
+                metadata = cls._metadata_from_path(path, source_dir, image_data)
+                if metadata_lookup:
+                    metadata.update(metadata_lookup(path) or {})
+                writer.add(cls.make_key(path, source_dir), image_data, metadata, path.suffix.lstrip("."))
+
+        logger.info(f"Exported {writer.samples_written} images from {source_dir} into {len(writer.shards_written)} shards")
+        return writer.shards_written
+
+    @staticmethod
+    def _metadata_from_path(path: Path, root: Path, image_data: bytes) -> Dict[str, Any]:
+        """Best-effort metadata for an existing output ({base_name}_{seed}.ext layout)."""
+        metadata: Dict[str, Any] = {
+            "path": str(path),
+            "generator": path.relative_to(root).parts[0] if len(path.relative_to(root).parts) > 1 else None,
+            "size": len(image_data),
+        }
+        match = _SEED_SUFFIX.search(path.stem)
+        if match:
+            metadata["seed"] = int(match.group(1))
+            metadata["base_name"] = path.stem[:match.start()]
+        dimensions = ImageProbe.probe_bytes(image_data)
+        if dimensions:
+            metadata["width"], metadata["height"] = dimensions
+        return metadata
+
+
+def iter_shard(shard_path: Path) -> Iterator[Tuple[str, Dict[str, bytes]]]:
+    """Sequentially yield (key, {extension: bytes}) samples from a shard."""
+    current_key, sample = None, {}
+    with tarfile.open(shard_path, "r|") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            key, _, extension = member.name.partition(".")
+            if current_key is not None and key != current_key:
+                yield current_key, sample
+                sample = {}
+            current_key = key
+            sample[extension] = tar.extractfile(member).read()
+    if current_key is not None:
+        yield current_key, sample
+
+
+def read_indexed_sample(shard_path: Path, entry: Dict[str, Any]) -> Dict[str, bytes]:
+    """Read one sample by its index entry without scanning the shard."""
+    sample = {}
+    with open(shard_path, "rb") as f:
+        for extension, (offset, size) in entry["members"].items():
+            f.seek(offset)
+            sample[extension] = f.read(size)
+    return sample
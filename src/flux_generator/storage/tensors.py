@@ -0,0 +1,315 @@
+"""
+Fixed-resolution pixel tensor export for FLUX Image Generator.
+
+Generated images are decoded once, resized to a fixed resolution and
+stored in a preallocated memory-mapped ``uint8`` array of shape
+(N, H, W, 3), with a parallel JSON-lines metadata index (row i of the
+index describes sample i). Training loaders can then random-access
+samples without any JPEG decoding.
+
+Layout of an export directory:
+    images.u8     raw uint8 pixels, capacity x H x W x 3 (grown in chunks)
+    header.json   shape, committed sample count and capacity
+    index.jsonl   one metadata line per committed sample
+
+The header is rewritten atomically after pixels and index are flushed,
+so an interrupted append never exposes partially written samples.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+from ..utils.base import BaseUtils, FileUtils
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RESIZE_MODES = ("pad", "crop", "stretch")
+_PIXELS_FILE = "images.u8"
+_HEADER_FILE = "header.json"
+_INDEX_FILE = "index.jsonl"
+
+
+def _decode_resized(source, size: Tuple[int, int], mode: str) -> Optional[bytes]:
+    """Decode an image (path or bytes) to RGB pixels of exactly size (width, height)."""
+    import io
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            img.draft("RGB", size)
+            img = img.convert("RGB")
+            if mode == "crop":
+                img = ImageOps.fit(img, size, Image.Resampling.BICUBIC)
+            elif mode == "pad":
+                img = ImageOps.pad(img, size, Image.Resampling.BICUBIC, color=(0, 0, 0))
+            else:
+                img = img.resize(size, Image.Resampling.BICUBIC)
+            return img.tobytes()
+    except Exception:
+        return None
+
+
+def _decode_job(job: Tuple[List[str], Tuple[int, int], str]) -> List[Optional[bytes]]:
+    """Worker: decode and resize a chunk of files."""
+    paths, size, mode = job
+    return [_decode_resized(path, size, mode) for path in paths]
+
+
+class TensorExport:
+    """Appendable memory-mapped (N, H, W, 3) uint8 image array with metadata index."""
+
+    _default: Optional["TensorExport"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        directory: Path,
+        height: int = 256,
+        width: int = 256,
+        resize_mode: str = "pad",
+        growth_chunk: int = 1024
+    ):
+        """Open an existing export or create a new one with the given resolution."""
+        if resize_mode not in RESIZE_MODES:
+            raise ValueError(f"Unknown resize mode: {resize_mode}. Available: {list(RESIZE_MODES)}")
+        self.directory = directory
+        self.resize_mode = resize_mode
+        self.growth_chunk = max(1, growth_chunk)
+        self._lock = threading.Lock()
+        BaseUtils.ensure_directory(directory)
+
+        header_path = directory / _HEADER_FILE
+        if header_path.exists():
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+            if (header["height"], header["width"]) != (height, width):
+                logger.warning(f"Existing export is {header['height']}x{header['width']}; "
+                               f"ignoring requested {height}x{width}")
+            self.height, self.width = header["height"], header["width"]
+            self.count, self.capacity = header["count"], header["capacity"]
+            self.index_bytes = header.get("index_bytes", 0)
+        else:
+            self.height, self.width = height, width
+            self.count, self.capacity = 0, 0
+            self.index_bytes = 0
+
+        self._known = self._load_known()
+        self._pixels: Optional[np.memmap] = None
+
+    @classmethod
+    def default(cls) -> "TensorExport":
+        """Shared export configured from settings."""
+        with cls._default_lock:
+            if cls._default is None:
+                from ..config.settings import settings
+                storage = settings.storage
+                cls._default = cls(
+                    settings.paths.output_dir / "tensors",
+                    height=storage.tensor_height,
+                    width=storage.tensor_width,
+                    resize_mode=storage.tensor_resize_mode
+                )
+            return cls._default
+
+    @property
+    def sample_bytes(self) -> int:
+        return self.height * self.width * 3
+
+    def _load_known(self) -> Dict[str, Tuple[int, int]]:
+        """Sources already exported: path -> (size, mtime_ns), from committed index rows."""
+        known: Dict[str, Tuple[int, int]] = {}
+        index_path = self.directory / _INDEX_FILE
+        if not index_path.exists():
+            return known
+        with open(index_path, "rb") as f:
+            committed = f.read(self.index_bytes).decode("utf-8")
+            for line in committed.splitlines():
+                entry = json.loads(line)
+                known[entry["path"]] = (entry.get("size"), entry.get("mtime_ns"))
+        return known
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow the pixel file in whole chunks and remap it."""
+        if required <= self.capacity and self._pixels is not None:
+            return
+        if required > self.capacity:
+            chunks = -(-required // self.growth_chunk)
+            self.capacity = chunks * self.growth_chunk
+            pixels_path = self.directory / _PIXELS_FILE
+            with open(pixels_path, "ab") as f:
+                f.truncate(self.capacity * self.sample_bytes)
+        if self._pixels is not None:
+            self._pixels.flush()
+        self._pixels = np.memmap(
+            self.directory / _PIXELS_FILE, dtype=np.uint8, mode="r+",
+            shape=(self.capacity, self.height, self.width, 3)
+        )
+
+    def _commit(self, pixels: List[bytes], entries: List[Dict[str, Any]]) -> int:
+        """Write decoded samples after the committed rows and publish them."""
+        if not pixels:
+            return 0
+        with self._lock:
+            start = self.count
+            self._ensure_capacity(start + len(pixels))
+            for offset, data in enumerate(pixels):
+                self._pixels[start + offset] = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+            self._pixels.flush()
+
+            # Drop index bytes left by an interrupted append, then add the new rows
+            lines = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries)
+            with open(self.directory / _INDEX_FILE, "ab") as f:
+                f.truncate(self.index_bytes)
+                f.write(lines.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                self.index_bytes = f.tell()
+
+            self.count = start + len(pixels)
+            for entry in entries:
+                self._known[entry["path"]] = (entry.get("size"), entry.get("mtime_ns"))
+            self._write_header()
+        return len(pixels)
+
+    def _write_header(self) -> None:
+        header = {
+            "version": 1,
+            "dtype": "uint8",
+            "height": self.height,
+            "width": self.width,
+            "channels": 3,
+            "count": self.count,
+            "capacity": self.capacity,
+            "index_bytes": self.index_bytes,
+            "resize_mode": self.resize_mode,
+        }
+        FileUtils.atomic_write(self.directory / _HEADER_FILE, json.dumps(header, indent=2).encode("utf-8"))
+
+    def append_files(
+        self,
+        paths: Iterable[Path],
+        processes: Optional[int] = None,
+        chunk_size: int = 64,
+        metadata_lookup=None
+    ) -> int:
+        """
+        Decode, resize and append image files not yet exported (or changed since).
+
+        Args:
+            paths: Image files to export
+            processes: Decoder processes (default: CPU count)
+            chunk_size: Files per worker task; also the commit granularity
+            metadata_lookup: Optional callable path -> dict of extra metadata
+
+        Returns:
+            Number of samples appended
+        """
+        pending = []
+        for path in paths:
+            key = os.path.abspath(path)
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+            known = self._known.get(key)
+            # Samples appended by the output hook carry no mtime; match them by size
+            if known and known[0] == stat.st_size and known[1] in (None, stat.st_mtime_ns):
+                continue
+            pending.append((key, stat))
+        if not pending:
+            return 0
+
+        size = (self.width, self.height)
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        jobs = [([key for key, _ in chunk], size, self.resize_mode) for chunk in chunks]
+        appended = 0
+
+        def commit_chunk(chunk, decoded) -> int:
+            pixels, entries = [], []
+            for (key, stat), data in zip(chunk, decoded):
+                if data is None:
+                    logger.warning(f"Could not decode {key}")
+                    continue
+                entry = {"path": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                if metadata_lookup:
+                    entry.update(metadata_lookup(Path(key)) or {})
+                pixels.append(data)
+                entries.append(entry)
+            return self._commit(pixels, entries)
+
+        if processes == 1 or len(jobs) == 1:
+            for chunk, job in zip(chunks, jobs):
+                appended += commit_chunk(chunk, _decode_job(job))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                for chunk, decoded in zip(chunks, pool.map(_decode_job, jobs)):
+                    appended += commit_chunk(chunk, decoded)
+
+        logger.info(f"Tensor export: appended {appended} samples ({self.count} total) to {self.directory}")
+        return appended
+
+    def append_directory(self, directory: Path, patterns: Iterable[str] = ("*.jpg", "*.jpeg", "*.png", "*.webp"), **kwargs) -> int:
+        """Append all matching images under a directory (hidden directories skipped)."""
+        paths = set()
+        for pattern in patterns:
+            paths.update(
+                path for path in directory.rglob(pattern)
+                if path.is_file() and not any(part.startswith(".") for part in path.relative_to(directory).parts)
+            )
+        return self.append_files(sorted(paths), **kwargs)
+
+    def write_record(self, record, image_data: bytes) -> None:
+        """Output hook: append a freshly generated image with its record metadata."""
+        data = _decode_resized(image_data, (self.width, self.height), self.resize_mode)
+        if data is None:
+            logger.warning(f"Could not decode generated image {record.path.name} for tensor export")
+            return
+        entry = record.to_dict()
+        entry["path"] = os.path.abspath(record.path)
+        entry["mtime_ns"] = None
+        self._commit([data], [entry])
+
+    __call__ = write_record
+
+
+class TensorDataset:
+    """Read-only random access to a tensor export (for training loaders)."""
+
+    def __init__(self, directory: Path):
+        """Map committed samples of an export directory."""
+        header = json.loads((directory / _HEADER_FILE).read_text(encoding="utf-8"))
+        self.directory = directory
+        self.shape = (header["count"], header["height"], header["width"], 3)
+        self._index_bytes = header.get("index_bytes", 0)
+        if header["capacity"]:
+            self.pixels = np.memmap(
+                directory / _PIXELS_FILE, dtype=np.uint8, mode="r",
+                shape=(header["capacity"], header["height"], header["width"], 3)
+            )[:header["count"]]
+        else:
+            self.pixels = np.empty(self.shape, dtype=np.uint8)
+        self._index: Optional[List[Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, item):
+        return self.pixels[item]
+
+    @property
+    def index(self) -> List[Dict[str, Any]]:
+        """Metadata rows, parallel to the pixel array."""
+        if self._index is None:
+            with open(self.directory / _INDEX_FILE, "rb") as f:
+                committed = f.read(self._index_bytes).decode("utf-8")
+            self._index = [json.loads(line) for line in committed.splitlines()]
+        return self._index
+
+    def metadata(self, item: int) -> Dict[str, Any]:
+        return self.index[item]
@@ -0,0 +1,294 @@
+"""
+Asynchronous atomic output writer for FLUX Image Generator.
+
+Generated images are handed to a small pool of writer threads through a
+bounded queue, so disk latency never stalls the thread waiting on the
+API. Each file is written to a hidden temporary file, fsynced and
+atomically renamed into place, and its content hash is computed while
+the bytes are written. With an ObjectStore attached, the temp file
+becomes the content-addressed object and the output is linked to it.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, BinaryIO
+
+from ..utils.base import BaseUtils, FileUtils
+from ..utils.hashing import HashService, _new_hasher
+from ..utils.logger import get_logger
+from .objects import ObjectStore
+
+logger = get_logger(__name__)
+
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class WriteResult:
+    """Outcome of a completed write."""
+    path: Path
+    digest: str
+    size: int
+    latency: float  # seconds from submit to rename
+    write_time: float  # seconds spent writing and syncing
+
+
+@dataclass
+class _WriteItem:
+    data: bytes
+    path: Path
+    future: Future
+    submitted_at: float
+    tmp_path: Optional[Path] = None
+    handle: Optional[BinaryIO] = None
+    digest: str = ""
+    started_at: float = field(default=0.0)
+
+
+class OutputWriter:
+    """Bounded-queue writer pool with temp-file + fsync + atomic rename."""
+
+    _default: Optional["OutputWriter"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue_size: int = 64,
+        fsync: bool = True,
+        fsync_batch_size: int = 1,
+        hash_service: Optional[HashService] = None,
+        object_store: Optional[ObjectStore] = None
+    ):
+        """Start writer threads."""
+        self.fsync = fsync
+        self.fsync_batch_size = max(1, fsync_batch_size)
+        self.hash_service = hash_service
+        self.object_store = object_store
+        if object_store:
+            self.algorithm = object_store.hash_service.algorithm
+        else:
+            self.algorithm = hash_service.algorithm if hash_service else "blake2b"
+
+        self._queue: "queue.Queue[Optional[_WriteItem]]" = queue.Queue(maxsize=max(1, max_queue_size))
+        self._lock = threading.Lock()
+        self._closed = False
+        self._latencies: deque = deque(maxlen=1000)
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "bytes_written": 0,
+            "max_queue_depth": 0,
+            "fsync_rounds": 0,
+        }
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"output-writer-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def default(cls) -> "OutputWriter":
+        """Shared writer configured from settings, closed at interpreter exit."""
+        with cls._default_lock:
+            if cls._default is None or cls._default._closed:
+                from ..config.settings import settings
+                storage = settings.storage
+                cls._default = cls(
+                    workers=storage.writer_workers,
+                    max_queue_size=storage.writer_queue_size,
+                    fsync=storage.fsync,
+                    fsync_batch_size=storage.fsync_batch_size,
+                    hash_service=HashService.default(),
+                    object_store=ObjectStore.from_settings() if storage.content_addressed else None
+                )
+                atexit.register(cls._default.close)
+            return cls._default
+
+    def submit(self, data: bytes, path: Path) -> Future:
+        """Queue data for writing; blocks while the queue is full."""
+        if self._closed:
+            raise RuntimeError("OutputWriter is closed")
+
+        future: Future = Future()
+        self._queue.put(_WriteItem(data=data, path=path, future=future, submitted_at=time.monotonic()))
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+        return future
+
+    def write(self, data: bytes, path: Path) -> WriteResult:
+        """Write through the pool and wait for completion."""
+        return self.submit(data, path).result()
+
+    def flush(self) -> None:
+        """Block until every queued write has completed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending writes and stop worker threads."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+        stats = self.get_stats()
+        if stats["submitted"]:
+            logger.info(
+                f"Output writer closed: {stats['written']} written, {stats['failed']} failed, "
+                f"avg latency {stats['latency_avg_ms']:.1f} ms, p95 {stats['latency_p95_ms']:.1f} ms, "
+                f"max queue depth {stats['max_queue_depth']}"
+            )
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Write counters, queue depth and latency percentiles (milliseconds)."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            latencies = sorted(self._latencies)
+        stats["queue_depth"] = self._queue.qsize()
+        if latencies:
+            stats["latency_avg_ms"] = sum(latencies) / len(latencies) * 1000
+            stats["latency_p95_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+            stats["latency_max_ms"] = latencies[-1] * 1000
+        else:
+            stats["latency_avg_ms"] = stats["latency_p95_ms"] = stats["latency_max_ms"] = 0.0
+        return stats
+
+    def _worker(self) -> None:
+        """Take items (up to fsync_batch_size at a time) and write them."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            while len(batch) < self.fsync_batch_size:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is None:
+                    stop = True
+                    break
+                batch.append(extra)
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[_WriteItem]) -> None:
+        """Write temp files, sync them as a group, then rename into place."""
+        written: List[_WriteItem] = []
+        for item in batch:
+            try:
+                self._write_temp(item)
+                written.append(item)
+            except Exception as e:
+                self._fail(item, e)
+
+        if self.fsync and written:
+            for item in list(written):
+                try:
+                    item.handle.flush()
+                    os.fsync(item.handle.fileno())
+                except Exception as e:
+                    written.remove(item)
+                    self._fail(item, e)
+            with self._lock:
+                self._stats["fsync_rounds"] += 1
+
+        directories = set()
+        for item in written:
+            try:
+                item.handle.close()
+                if self.object_store:
+                    self.object_store.adopt_temp_file(item.tmp_path, item.digest, len(item.data))
+                    directories.add(self.object_store.object_path(item.digest).parent)
+                    self.object_store.link(item.digest, item.path)
+                else:
+                    os.replace(item.tmp_path, item.path)
+                directories.add(item.path.parent)
+            except Exception as e:
+                self._fail(item, e)
+                continue
+            self._complete(item)
+
+        if self.fsync:
+            for directory in directories:
+                FileUtils.fsync_directory(directory)
+
+    def _write_temp(self, item: _WriteItem) -> None:
+        """Write item data to its temp file, hashing while writing."""
+        item.started_at = time.monotonic()
+        BaseUtils.ensure_directory(item.path.parent)
+        item.tmp_path = FileUtils.temp_path_for(item.path)
+        hasher = _new_hasher(self.algorithm)
+        item.handle = open(item.tmp_path, "wb")
+        view = memoryview(item.data)
+        for offset in range(0, len(view), WRITE_CHUNK_SIZE):
+            chunk = view[offset:offset + WRITE_CHUNK_SIZE]
+            item.handle.write(chunk)
+            hasher.update(chunk)
+        item.digest = hasher.hexdigest()
+
+    def _complete(self, item: _WriteItem) -> None:
+        """Resolve the item's future and update statistics."""
+        finished_at = time.monotonic()
+        result = WriteResult(
+            path=item.path,
+            digest=item.digest,
+            size=len(item.data),
+            latency=finished_at - item.submitted_at,
+            write_time=finished_at - item.started_at
+        )
+        if self.hash_service:
+            try:
+                self.hash_service.record(item.path, item.digest)
+            except Exception as e:
+                logger.debug(f"Could not cache hash for {item.path}: {e}")
+
+        with self._lock:
+            self._stats["written"] += 1
+            self._stats["bytes_written"] += result.size
+            self._latencies.append(result.latency)
+        item.data = b""
+        item.future.set_result(result)
+
+    def _fail(self, item: _WriteItem, error: Exception) -> None:
+        """Clean up a failed item and propagate the error to its future."""
+        logger.error(f"Failed to write {item.path}: {error}")
+        if item.handle and not item.handle.closed:
+            item.handle.close()
+        if item.tmp_path:
+            item.tmp_path.unlink(missing_ok=True)
+        with self._lock:
+            self._stats["failed"] += 1
+        item.data = b""
+        item.future.set_exception(error)
@@ -6,6 +6,13 @@ This module contains helper functions and utilities.
 
 from .base import BaseUtils, ImageProcessor, LoggerManager, FileUtils
 from .image import ImageUtils
-from .logger import setup_logger, get_logger
+from .logger import setup_logger, get_logger, log_context
+from .logpipeline import LogPipeline
+from .probe import ImageProbe
+from .hashing import HashService
+from .progress import ProgressTracker
+from .manifest import ProcessingManifest
+from .watcher import DirectoryWatcher
+from .indexer import DirectoryIndexer, IndexEntry
 
-__all__ = ["BaseUtils", "ImageProcessor", "LoggerManager", "FileUtils", "ImageUtils", "setup_logger", "get_logger"] 
\ No newline at end of file
+__all__ = ["BaseUtils", "ImageProcessor", "LoggerManager", "FileUtils", "ImageUtils", "setup_logger", "get_logger", "log_context", "LogPipeline", "ImageProbe", "HashService", "ProgressTracker", "ProcessingManifest", "DirectoryWatcher", "DirectoryIndexer", "IndexEntry"] 
\ No newline at end of file
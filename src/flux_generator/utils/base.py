@@ -7,12 +7,17 @@ to reduce code duplication across image and logger utilities.
 
 import base64
 import hashlib
+import io
 import logging
+import os
 import sys
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Tuple
 from abc import ABC, abstractmethod
 
+from .probe import ImageProbe
+
 
 class BaseUtils(ABC):
     """Base class for utility functions."""
@@ -50,7 +55,11 @@ class ImageProcessor:
         # Determine MIME type
         mime_type = ImageProcessor._get_mime_type(image_path)
         
-        # Encode to base64
+        return ImageProcessor.encode_bytes_to_base64(image_data, mime_type)
+    
+    @staticmethod
+    def encode_bytes_to_base64(image_data: bytes, mime_type: str = "image/jpeg") -> str:
+        """Encode in-memory image bytes to base64 data URL."""
         encoded_image = base64.b64encode(image_data).decode("utf-8")
         return f"data:{mime_type};base64,{encoded_image}"
     
@@ -78,12 +87,9 @@ class ImageProcessor:
             raise ValueError(f"Failed to decode base64 image: {e}")
     
     @staticmethod
-    def save_image_data(image_data: bytes, output_path: Path) -> None:
-        """Save image data to file."""
-        BaseUtils.ensure_directory(output_path.parent)
-        
-        with open(output_path, "wb") as f:
-            f.write(image_data)
+    def save_image_data(image_data: bytes, output_path: Path, fsync: bool = False) -> None:
+        """Save image data to file atomically (no truncated files on crash)."""
+        FileUtils.atomic_write(output_path, image_data, fsync=fsync)
     
     @staticmethod
     def get_image_hash(image_path: Path) -> str:
@@ -93,40 +99,80 @@ class ImageProcessor:
         
         hash_md5 = hashlib.md5()
         with open(image_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
                 hash_md5.update(chunk)
         
         return hash_md5.hexdigest()
     
     @staticmethod
-    def get_image_info(image_path: Path) -> Dict[str, Any]:
-        """Get basic information about image file."""
+    def get_content_hash(image_path: Path) -> str:
+        """Get cached fast content hash of image file (see HashService)."""
+        from .hashing import HashService
+        return HashService.default().hash_file(image_path)
+    
+    @staticmethod
+    def get_image_info(image_path: Path, md5: bool = False) -> Dict[str, Any]:
+        """
+        Get basic information about image file.
+
+        "content_hash" is the cached HashService digest; the MD5 ("hash")
+        reads the whole file again, so it is only added when md5 is set.
+        """
         if not image_path.exists():
             raise FileNotFoundError(f"Image file not found: {image_path}")
         
         stat = image_path.stat()
+        width, height = ImageProcessor.get_image_dimensions(image_path)
         
-        # Try to get image dimensions if PIL is available
+        info = {
+            "path": str(image_path),
+            "size_bytes": stat.st_size,
+            "size_mb": round(stat.st_size / (1024 * 1024), 2),
+            "extension": image_path.suffix.lower(),
+            "content_hash": ImageProcessor.get_content_hash(image_path),
+            "width": width,
+            "height": height
+        }
+        if md5:
+            info["hash"] = ImageProcessor.get_image_hash(image_path)
+        return info
+    
+    @staticmethod
+    def get_image_dimensions(image_path: Path) -> Tuple[int, int]:
+        """Get (width, height) of image file from its header, falling back to PIL."""
+        dimensions = ImageProbe.probe_file(image_path)
+        if dimensions:
+            return dimensions
+        
+        # Unrecognized header; try PIL if available
         try:
             from PIL import Image
             with Image.open(image_path) as img:
-                width, height = img.size
+                return img.size
         except ImportError:
             # PIL not available, use default values
-            width, height = 512, 512
+            return 512, 512
         except Exception:
             # Any other error, use default values
-            width, height = 512, 512
+            return 512, 512
+    
+    @staticmethod
+    def get_image_dimensions_from_bytes(image_data: bytes) -> Tuple[int, int]:
+        """Get (width, height) of in-memory image data from its header, falling back to PIL."""
+        dimensions = ImageProbe.probe_bytes(image_data)
+        if dimensions:
+            return dimensions
         
-        return {
-            "path": str(image_path),
-            "size_bytes": stat.st_size,
-            "size_mb": round(stat.st_size / (1024 * 1024), 2),
-            "extension": image_path.suffix.lower(),
-            "hash": ImageProcessor.get_image_hash(image_path),
-            "width": width,
-            "height": height
-        }
+        try:
+            from PIL import Image
+            with Image.open(io.BytesIO(image_data)) as img:
+                return img.size
+        except ImportError:
+            # PIL not available, use default values
+            return 512, 512
+        except Exception:
+            # Any other error, use default values
+            return 512, 512
     
     @staticmethod
     def _get_mime_type(image_path: Path) -> str:
@@ -150,18 +196,28 @@ class LoggerManager:
     @staticmethod
     def setup_logger(
         name: str = "flux_generator",
-        level: Union[str, int] = "INFO",
+        level: Union[str, int, None] = None,
         log_file: Optional[Path] = None,
         format_string: Optional[str] = None
     ) -> logging.Logger:
-        """Setup logger with console and file handlers."""
+        """
+        Setup logger on the shared asynchronous pipeline (see utils.logpipeline).
+
+        Records go through one queue to the console (and to log_file, if
+        given); level defaults to FLUX_LOG_LEVEL and format_string replaces
+        the text format of all output.
+        """
+        from .logpipeline import LogPipeline
         
         # Convert string level to logging constant
+        if level is None:
+            level = os.getenv("FLUX_LOG_LEVEL", "INFO")
         if isinstance(level, str):
             level = getattr(logging, level.upper(), logging.INFO)
         
-        if format_string is None:
-            format_string = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        pipeline = LogPipeline.default()
+        if format_string is not None:
+            pipeline.set_format(format_string)
         
         # Create logger
         logger = logging.getLogger(name)
@@ -169,23 +225,11 @@ class LoggerManager:
         
         # Clear existing handlers
         logger.handlers.clear()
-        
-        # Create formatter
-        formatter = logging.Formatter(format_string)
-        
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(level)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        logger.addHandler(pipeline.handler)
         
         # File handler (optional)
         if log_file:
-            BaseUtils.ensure_directory(log_file.parent)
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            file_handler.setLevel(level)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            pipeline.add_file(log_file, name, level)
         
         return logger
     
@@ -236,6 +280,43 @@ class FileUtils:
         else:
             return f"{base_name}.{extension}"
     
+    @staticmethod
+    def temp_path_for(output_path: Path) -> Path:
+        """Hidden temporary path next to output_path, unique per process and thread."""
+        return output_path.parent / f".{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    
+    @staticmethod
+    def fsync_directory(directory: Path) -> None:
+        """Flush directory entries (renames) to disk where the platform allows it."""
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def atomic_write(output_path: Path, data: bytes, fsync: bool = False) -> None:
+        """Write data to a temporary file and atomically rename it into place."""
+        BaseUtils.ensure_directory(output_path.parent)
+        tmp_path = FileUtils.temp_path_for(output_path)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        if fsync:
+            FileUtils.fsync_directory(output_path.parent)
+    
     @staticmethod
     def ensure_extension(filename: str, extension: str) -> str:
         """Ensure filename has correct extension."""
@@ -0,0 +1,239 @@
+"""
+Content hashing service for FLUX Image Generator.
+
+Hashes files with large buffered or mmap reads and a fast digest
+(BLAKE2b by default; xxHash via FLUX_HASH_ALGORITHM when the optional
+``xxhash`` package is installed). Digests are cached persistently in
+SQLite keyed by (path, inode, size, mtime_ns), so unchanged files are
+never re-read, and whole directories can be hashed on a process pool.
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Iterable, List, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+READ_BUFFER_SIZE = 1024 * 1024  # 1 MB buffered reads
+MMAP_THRESHOLD = 8 * 1024 * 1024  # files above 8 MB are mapped instead of read
+_XXHASH_ALGORITHMS = ("xxh3_64", "xxh3_128", "xxh64")
+
+
+def _new_hasher(algorithm: str):
+    """Create a hash object for the given algorithm name."""
+    if algorithm in _XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"Algorithm {algorithm} requires the 'xxhash' package")
+        return getattr(xxhash, algorithm)()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    return hashlib.new(algorithm)
+
+
+def digest_file(path: str, algorithm: str = "blake2b") -> str:
+    """Hash a file's content (module-level so it can run in worker processes)."""
+    hasher = _new_hasher(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, READ_BUFFER_SIZE):
+                        hasher.update(view[offset:offset + READ_BUFFER_SIZE])
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(min(READ_BUFFER_SIZE, max(size, 1)))
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
+    return hasher.hexdigest()
+
+
+def _digest_job(job: Tuple[str, str]) -> Tuple[str, Optional[str]]:
+    """Worker wrapper returning (path, digest or None on error)."""
+    path, algorithm = job
+    try:
+        return path, digest_file(path, algorithm)
+    except OSError:
+        return path, None
+
+
+class HashCache:
+    """Persistent SQLite cache of file digests."""
+
+    def __init__(self, cache_path: Path):
+        """Open (or create) the cache database."""
+        self.cache_path = cache_path
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(cache_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT NOT NULL, algorithm TEXT NOT NULL,"
+            " inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " digest TEXT NOT NULL, PRIMARY KEY (path, algorithm))"
+        )
+        self._conn.commit()
+
+    def get(self, path: str, algorithm: str, stat: os.stat_result) -> Optional[str]:
+        """Get cached digest if the file is unchanged since it was hashed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inode, size, mtime_ns, digest FROM hashes WHERE path = ? AND algorithm = ?",
+                (path, algorithm)
+            ).fetchone()
+        if row and row[:3] == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            return row[3]
+        return None
+
+    def put_many(self, rows: Iterable[Tuple[str, str, os.stat_result, str]]) -> None:
+        """Store (path, algorithm, stat, digest) rows in one transaction."""
+        values = [
+            (path, algorithm, stat.st_ino, stat.st_size, stat.st_mtime_ns, digest)
+            for path, algorithm, stat, digest in rows
+        ]
+        if not values:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)", values)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class HashService:
+    """Cached content hashing for generated images."""
+
+    _default: Optional["HashService"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, algorithm: str = "blake2b", cache_path: Optional[Path] = None):
+        """Initialize service with a digest algorithm and optional cache file."""
+        _new_hasher(algorithm)  # Validate early
+        self.algorithm = algorithm
+        self.cache = HashCache(cache_path) if cache_path else None
+
+    @classmethod
+    def default(cls) -> "HashService":
+        """Shared service with a cache under the output directory."""
+        with cls._default_lock:
+            if cls._default is None:
+                from ..config.base import EnvironmentConfig
+                from ..config.settings import settings
+                cls._default = cls(
+                    algorithm=EnvironmentConfig.get_hash_algorithm(),
+                    cache_path=settings.paths.output_dir / ".cache" / "hashes.sqlite"
+                )
+            return cls._default
+
+    def hash_bytes(self, data: bytes) -> str:
+        """Hash in-memory data with the service algorithm."""
+        hasher = _new_hasher(self.algorithm)
+        hasher.update(data)
+        return hasher.hexdigest()
+
+    def hash_file(self, image_path: Path) -> str:
+        """Hash a file, using the persistent cache when the file is unchanged."""
+        if not image_path.exists():
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+
+        key = str(image_path.resolve())
+        stat = os.stat(key)
+        if self.cache:
+            cached = self.cache.get(key, self.algorithm, stat)
+            if cached:
+                return cached
+
+        digest = digest_file(key, self.algorithm)
+        self.record(image_path, digest, stat)
+        return digest
+
+    def record(self, image_path: Path, digest: str, stat: Optional[os.stat_result] = None) -> None:
+        """Store a digest computed elsewhere (e.g. while writing the file)."""
+        if self.cache:
+            key = str(image_path.resolve())
+            self.cache.put_many([(key, self.algorithm, stat or os.stat(key), digest)])
+
+    def hash_many(
+        self,
+        paths: Iterable[Path],
+        processes: Optional[int] = None,
+        min_parallel: int = 64
+    ) -> Dict[Path, str]:
+        """
+        Hash many files, computing cache misses on a process pool.
+
+        Batches smaller than ``min_parallel`` misses are hashed in-process
+        to avoid pool start-up cost. Unreadable files are omitted.
+        """
+        results: Dict[Path, str] = {}
+        misses: Dict[str, Tuple[Path, os.stat_result]] = {}
+
+        for path in paths:
+            key = str(path.resolve())
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+            cached = self.cache.get(key, self.algorithm, stat) if self.cache else None
+            if cached:
+                results[path] = cached
+            else:
+                misses[key] = (path, stat)
+
+        if misses:
+            jobs = [(key, self.algorithm) for key in misses]
+            if len(jobs) < min_parallel or processes == 1:
+                computed: List[Tuple[str, Optional[str]]] = [_digest_job(job) for job in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=processes) as pool:
+                    computed = list(pool.map(_digest_job, jobs, chunksize=max(1, len(jobs) // 256)))
+
+            rows = []
+            for key, digest in computed:
+                if digest is None:
+                    continue
+                path, stat = misses[key]
+                results[path] = digest
+                rows.append((key, self.algorithm, stat, digest))
+            if self.cache:
+                self.cache.put_many(rows)
+
+        logger.debug(f"Hashed {len(results)} files ({len(misses)} computed, {len(results) - len(misses)} cached)")
+        return results
+
+    def hash_directory(
+        self,
+        directory: Path,
+        patterns: Iterable[str] = ("*.jpg", "*.jpeg", "*.png", "*.webp"),
+        recursive: bool = True,
+        processes: Optional[int] = None
+    ) -> Dict[Path, str]:
+        """Hash all matching files under a directory."""
+        paths = set()
+        for pattern in patterns:
+            matches = directory.rglob(pattern) if recursive else directory.glob(pattern)
+            paths.update(path for path in matches if path.is_file())
+        return self.hash_many(sorted(paths), processes=processes)
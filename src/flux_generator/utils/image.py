@@ -3,7 +3,7 @@ Image utilities for FLUX Image Generator.
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from .base import ImageProcessor, FileUtils
 
@@ -22,9 +22,9 @@ class ImageUtils:
         ImageProcessor.decode_from_base64(base64_string, output_path)
     
     @staticmethod
-    def save_image_data(image_data: bytes, output_path: Path) -> None:
-        """Save image data to file."""
-        ImageProcessor.save_image_data(image_data, output_path)
+    def save_image_data(image_data: bytes, output_path: Path, fsync: bool = False) -> None:
+        """Save image data to file atomically."""
+        ImageProcessor.save_image_data(image_data, output_path, fsync=fsync)
     
     @staticmethod
     def get_image_hash(image_path: Path) -> str:
@@ -32,9 +32,19 @@ class ImageUtils:
         return ImageProcessor.get_image_hash(image_path)
     
     @staticmethod
-    def get_image_info(image_path: Path) -> dict:
-        """Get basic information about image file."""
-        return ImageProcessor.get_image_info(image_path)
+    def get_content_hash(image_path: Path) -> str:
+        """Get cached fast content hash of image file."""
+        return ImageProcessor.get_content_hash(image_path)
+    
+    @staticmethod
+    def get_image_info(image_path: Path, md5: bool = False) -> dict:
+        """Get basic information about image file (md5: also the MD5 "hash")."""
+        return ImageProcessor.get_image_info(image_path, md5=md5)
+    
+    @staticmethod
+    def get_image_dimensions(image_path: Path) -> Tuple[int, int]:
+        """Get (width, height) of image file without decoding it."""
+        return ImageProcessor.get_image_dimensions(image_path)
     
     @staticmethod
     def find_input_image(input_dir: Path, filename: str = "character.jpg") -> Optional[Path]:
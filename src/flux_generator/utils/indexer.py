@@ -0,0 +1,230 @@
+"""
+Streaming directory indexer for FLUX Image Generator.
+
+Walks directories with ``os.scandir`` and yields matching files lazily,
+in a stable order (sorted names, files of a directory before its
+subdirectories). A per-directory snapshot (directory mtime plus name ->
+inode, size, mtime_ns) is kept between scans:
+
+* a directory whose mtime is unchanged is not listed again;
+* in a changed directory only new entries, or entries whose inode
+  changed (files replaced by rename, as all outputs are written), are
+  stat()ed.
+
+Files rewritten in place keep their inode and directory mtime; pass
+``verify=True`` to stat every entry when that matters. The snapshot can
+be persisted to a JSON file so the savings carry across runs.
+"""
+
+import fnmatch
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Iterable, Iterator, List, Tuple
+
+from .base import FileUtils
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+# Directories modified this recently are relisted next time: entries added
+# within the same timestamp tick would not change the recorded mtime
+_RACY_WINDOW_NS = 2_000_000_000
+
+FileState = Tuple[int, int, int]  # inode, size, mtime_ns
+
+
+@dataclass
+class IndexEntry:
+    """A file found by the indexer."""
+    path: Path
+    size: int
+    mtime_ns: int
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+
+@dataclass
+class _DirectoryState:
+    mtime_ns: Optional[int]  # None: listing must not be reused
+    files: Dict[str, FileState]  # sorted by name
+    subdirs: List[str]  # sorted
+
+
+class DirectoryIndexer:
+    """Lazy, filtered and snapshot-cached file discovery under a root directory."""
+
+    def __init__(
+        self,
+        root: Path,
+        extensions: Iterable[str] = IMAGE_EXTENSIONS,
+        patterns: Optional[Iterable[str]] = None,
+        recursive: bool = True,
+        snapshot_path: Optional[Path] = None,
+        verify: bool = False,
+        exclude_dirs: Iterable[str] = ()
+    ):
+        """
+        Initialize indexer.
+
+        Args:
+            root: Directory to index
+            extensions: File extensions to include (case-insensitive)
+            patterns: Optional fnmatch patterns a file name must also match
+            recursive: Descend into subdirectories (hidden ones are skipped)
+            snapshot_path: JSON file to load the snapshot from and save it to
+            verify: Stat every entry instead of trusting unchanged inodes
+            exclude_dirs: Subdirectory names never descended into
+        """
+        self.root = root
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.patterns = list(patterns) if patterns else None
+        self.recursive = recursive
+        self.snapshot_path = snapshot_path
+        self.verify = verify
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.stats = {"directories_listed": 0, "directories_reused": 0, "files_statted": 0, "files_reused": 0}
+        self._dirs: Dict[str, _DirectoryState] = {}
+        if snapshot_path and snapshot_path.exists():
+            self._load()
+
+    def matches(self, name: str) -> bool:
+        """Check whether a file name passes the extension and pattern filters."""
+        if not name.lower().endswith(self.extensions):
+            return False
+        return self.patterns is None or any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def scan(
+        self,
+        min_mtime: Optional[float] = None,
+        max_mtime: Optional[float] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None
+    ) -> Iterator[IndexEntry]:
+        """
+        Yield matching files lazily, refreshing the snapshot as directories are visited.
+
+        Args:
+            min_mtime: Only files modified at or after this time (epoch seconds)
+            max_mtime: Only files modified before this time (epoch seconds)
+            min_size: Only files of at least this many bytes
+            max_size: Only files of at most this many bytes
+        """
+        for key in self.stats:
+            self.stats[key] = 0
+        min_ns = int(min_mtime * 1e9) if min_mtime is not None else None
+        max_ns = int(max_mtime * 1e9) if max_mtime is not None else None
+        visited = set()
+
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            state = self._refresh(directory)
+            if state is None:
+                continue
+            visited.add(directory)
+            for name, (_, size, mtime_ns) in state.files.items():
+                if (min_ns is not None and mtime_ns < min_ns) or (max_ns is not None and mtime_ns >= max_ns):
+                    continue
+                if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                    continue
+                yield IndexEntry(Path(directory, name), size, mtime_ns)
+            stack.extend(os.path.join(directory, name) for name in reversed(state.subdirs))
+
+        # Forget directories that disappeared (only known after a complete walk)
+        for directory in set(self._dirs) - visited:
+            del self._dirs[directory]
+        logger.debug(f"Indexed {self.root}: {self.stats}")
+
+    def paths(self, **filters) -> Iterator[Path]:
+        """Yield matching file paths; accepts the same filters as scan()."""
+        return (entry.path for entry in self.scan(**filters))
+
+    def _refresh(self, directory: str) -> Optional[_DirectoryState]:
+        """Current state of one directory, relisting and stat()ing only what changed."""
+        cached = self._dirs.get(directory)
+        try:
+            directory_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._dirs.pop(directory, None)
+            return None
+
+        if cached and cached.mtime_ns == directory_mtime and not self.verify:
+            self.stats["directories_reused"] += 1
+            self.stats["files_reused"] += len(cached.files)
+            return cached
+
+        files: Dict[str, FileState] = {}
+        subdirs: List[str] = []
+        previous = cached.files if cached else {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and name not in self.exclude_dirs:
+                            subdirs.append(name)
+                        continue
+                    if not self.matches(name):
+                        continue
+                    inode = entry.inode()
+                    known = previous.get(name)
+                    if known and known[0] == inode and not self.verify:
+                        files[name] = known
+                        self.stats["files_reused"] += 1
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files[name] = (inode, stat.st_size, stat.st_mtime_ns)
+                    self.stats["files_statted"] += 1
+        except OSError as e:
+            logger.warning(f"Cannot scan {directory}: {e}")
+            return None
+
+        self.stats["directories_listed"] += 1
+        racy = time.time_ns() - directory_mtime < _RACY_WINDOW_NS
+        state = _DirectoryState(None if racy else directory_mtime, dict(sorted(files.items())), sorted(subdirs))
+        self._dirs[directory] = state
+        return state
+
+    def save(self) -> None:
+        """Persist the snapshot to snapshot_path."""
+        if not self.snapshot_path:
+            return
+        data = {
+            "version": 1,
+            "root": str(self.root),
+            "extensions": list(self.extensions),
+            "patterns": self.patterns,
+            "recursive": self.recursive,
+            "directories": {
+                directory: [state.mtime_ns, state.files, state.subdirs]
+                for directory, state in self._dirs.items()
+            },
+        }
+        FileUtils.atomic_write(self.snapshot_path, json.dumps(data, separators=(",", ":")).encode("utf-8"), fsync=False)
+
+    def _load(self) -> None:
+        """Load a persisted snapshot if it was made with the same settings."""
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable index snapshot {self.snapshot_path}: {e}")
+            return
+        if (data.get("version") != 1 or data.get("root") != str(self.root)
+                or tuple(data.get("extensions", ())) != self.extensions
+                or data.get("patterns") != self.patterns or data.get("recursive") != self.recursive):
+            return
+        self._dirs = {
+            directory: _DirectoryState(mtime_ns, {name: tuple(state) for name, state in files.items()}, subdirs)
+            for directory, (mtime_ns, files, subdirs) in data.get("directories", {}).items()
+        }
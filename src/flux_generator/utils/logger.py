@@ -6,15 +6,16 @@ from pathlib import Path
 from typing import Optional
 
 from .base import LoggerManager
+from .logpipeline import log_context
 
 
 def setup_logger(
     name: str = "flux_generator",
-    level: str = "INFO",
+    level: Optional[str] = None,
     log_file: Optional[Path] = None,
     format_string: Optional[str] = None
 ):
-    """Setup logger with console and file handlers."""
+    """Setup logger on the shared asynchronous pipeline (console and optional file)."""
     return LoggerManager.setup_logger(name, level, log_file, format_string)
 
 
@@ -0,0 +1,249 @@
+"""
+Asynchronous logging pipeline for FLUX Image Generator.
+
+Every package logger gets the same QueueHandler: emitting a record only
+stamps it with the caller's context fields, applies the per-message-type
+rate limit and puts it on a bounded queue. One QueueListener thread does
+the formatting and console/file I/O, so hundreds of generation threads
+never wait on the terminal. When the queue is full records are dropped
+and counted rather than blocking the caller.
+
+Configured from the environment, since loggers exist before settings:
+
+* ``FLUX_LOG_FORMAT`` - ``text`` (default) or ``json`` (one object per line)
+* ``FLUX_LOG_RATE_LIMIT`` - INFO/DEBUG records per message type per 10 s window (0: unlimited)
+* ``FLUX_LOG_SAMPLE_EVERY`` - past the limit, still pass every Nth record (0: none)
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("flux_log_context", default={})
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Attach fields (job id, seed, ...) to every record logged by this thread inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the caller's log_context fields onto the record (runs in the calling thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _context.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-message-type rate limit with sampling for INFO and DEBUG records.
+
+    Warnings and errors always pass. The message type is the record's
+    ``event`` extra, or its call site (logger and line) so f-string
+    messages from one loop count together.
+    Within each window the first max_per_window records of a type pass;
+    after that only every sample_every-th one does, and the number
+    suppressed is reported on the next record that passes.
+    """
+
+    def __init__(self, max_per_window: int = 20, window: float = 10.0, sample_every: int = 0):
+        super().__init__()
+        self.max_per_window = max_per_window
+        self.window = window
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple, list] = {}  # key -> [window start, count, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.max_per_window <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = getattr(record, "event", None) or (record.name, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                state = self._windows[key] = [now, 0, 0]
+                if len(self._windows) > 10000:
+                    self._prune(now)
+            else:
+                suppressed = 0
+            state[1] += 1
+            over = state[1] - self.max_per_window
+            if over > 0 and not (self.sample_every and over % self.sample_every == 0):
+                state[2] += 1
+                return False
+            suppressed += state[2]
+            state[2] = 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, state in self._windows.items() if now - state[0] >= self.window]:
+            del self._windows[key]
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        if self.dropped:
+            record.dropped, self.dropped = self.dropped, 0
+        return record
+
+
+def _suffix(record: logging.LogRecord) -> str:
+    parts = [f"{key}={value}" for key, value in getattr(record, "context", {}).items()]
+    if getattr(record, "suppressed", 0):
+        parts.append(f"+{record.suppressed} similar suppressed")
+    if getattr(record, "dropped", 0):
+        parts.append(f"{record.dropped} records dropped")
+    return f" [{', '.join(parts)}]" if parts else ""
+
+
+class ContextFormatter(logging.Formatter):
+    """Text formatter that appends context fields and suppression counts."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return super().format(record) + _suffix(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, context and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        data.update(getattr(record, "context", {}))
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != "context" and not key.startswith("_"):
+                data[key] = value
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class LogPipeline:
+    """The shared queue, its listener thread and the output handlers."""
+
+    _default: Optional["LogPipeline"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        json_format: bool = False,
+        max_per_window: int = 20,
+        sample_every: int = 0,
+        queue_size: int = 10000,
+        format_string: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    ):
+        """Start the listener with a console handler."""
+        self.json_format = json_format
+        self.format_string = format_string
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = _DroppingQueueHandler(self._queue)
+        self.handler.addFilter(ContextFilter())
+        self.handler.addFilter(RateLimitFilter(max_per_window=max_per_window, sample_every=sample_every))
+        self.console = logging.StreamHandler(sys.stdout)
+        self.console.setFormatter(self._formatter())
+        self._files: Dict[Path, logging.Handler] = {}
+        self._listener = logging.handlers.QueueListener(self._queue, self.console, respect_handler_level=True)
+        self._listener.start()
+        self._running = True
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _restart_in_child(self) -> None:
+        """A forked child inherits the queue but not the listener thread: give it its own."""
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self.handler.queue = self._queue
+        self._listener = logging.handlers.QueueListener(
+            self._queue, *self._listener.handlers, respect_handler_level=True)
+        self._listener.start()
+        self._running = True
+
+    @classmethod
+    def default(cls) -> "LogPipeline":
+        """Process-wide pipeline configured from the environment, stopped at interpreter exit."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(
+                    json_format=os.getenv("FLUX_LOG_FORMAT", "text").lower() == "json",
+                    max_per_window=int(os.getenv("FLUX_LOG_RATE_LIMIT", "20")),
+                    sample_every=int(os.getenv("FLUX_LOG_SAMPLE_EVERY", "0"))
+                )
+                atexit.register(cls._default.stop)
+            return cls._default
+
+    def _formatter(self) -> logging.Formatter:
+        return JsonFormatter() if self.json_format else ContextFormatter(self.format_string)
+
+    def set_format(self, format_string: str) -> None:
+        """Use a different text format for all output."""
+        self.format_string = format_string
+        formatter = self._formatter()
+        self.console.setFormatter(formatter)
+        for handler in self._files.values():
+            handler.setFormatter(formatter)
+
+    def add_file(self, log_file: Path, logger_name: str, level: int) -> None:
+        """Also write records of logger_name (and its children) to log_file."""
+        with self._lock:
+            if log_file in self._files:
+                return
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.FileHandler(log_file, encoding="utf-8")
+            handler.setLevel(level)
+            handler.setFormatter(self._formatter())
+            handler.addFilter(logging.Filter(logger_name))
+            self._files[log_file] = handler
+            # The listener's handler tuple is fixed while it runs
+            if self._running:
+                self._listener.stop()
+            self._listener.handlers = (self.console, *self._files.values())
+            self._listener.start()
+            self._running = True
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread."""
+        with self._lock:
+            if self._running:
+                self._listener.stop()
+                self._running = False
+            for handler in self._files.values():
+                handler.close()
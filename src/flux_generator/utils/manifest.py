@@ -0,0 +1,131 @@
+"""
+Processing manifest for incremental image processing.
+
+The manifest records which input files were processed, with which
+settings and into which output, so repeated runs only submit new or
+changed files.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Set
+
+from .base import ImageProcessor, FileUtils
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProcessingManifest:
+    """JSON-backed record of processed input files."""
+
+    VERSION = 1
+
+    def __init__(self, manifest_path: Path, autosave_every: int = 10):
+        """Load manifest from file (a missing file starts an empty manifest)."""
+        self.manifest_path = manifest_path
+        self.autosave_every = max(1, autosave_every)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._outputs: Set[str] = set()
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def settings_key(params: Dict[str, Any]) -> str:
+        """Stable key for a set of processing parameters."""
+        encoded = json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
+    def _load(self) -> None:
+        """Load entries from disk."""
+        if not self.manifest_path.exists():
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data.get("entries", {})
+            self._outputs = {entry["output"] for entry in self._entries.values() if entry.get("output")}
+        except Exception as e:
+            logger.warning(f"Could not load manifest {self.manifest_path}: {e}")
+            self._entries = {}
+
+    def save(self) -> None:
+        """Write manifest atomically (temp file + rename)."""
+        with self._save_lock:
+            with self._lock:
+                data = {"version": self.VERSION, "entries": dict(self._entries)}
+                self._dirty = 0
+            FileUtils.atomic_write(self.manifest_path, json.dumps(data, indent=2).encode("utf-8"))
+
+    def needs_processing(self, image_path: Path, settings_key: str) -> bool:
+        """Check whether a file is new, changed or was processed with other settings."""
+        entry = self._entries.get(str(image_path.resolve()))
+        if not entry or entry.get("settings_key") != settings_key:
+            return True
+
+        output = entry.get("output")
+        if output and not Path(output).exists():
+            return True
+
+        stat = image_path.stat()
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return False
+
+        # Metadata changed; compare content before paying for another API call
+        if entry.get("hash") != ImageProcessor.get_content_hash(image_path):
+            return True
+
+        with self._lock:
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            self._dirty += 1
+        return False
+
+    def record(self, image_path: Path, settings_key: str, output_path: Optional[Path]) -> None:
+        """Record a successfully processed file."""
+        stat = image_path.stat()
+        entry = {
+            "hash": ImageProcessor.get_content_hash(image_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "settings_key": settings_key,
+            "output": str(output_path.resolve()) if output_path else None,
+            "processed_at": time.time(),
+        }
+        with self._lock:
+            self._entries[str(image_path.resolve())] = entry
+            if entry["output"]:
+                self._outputs.add(entry["output"])
+            self._dirty += 1
+            should_save = self._dirty >= self.autosave_every
+        if should_save:
+            self.save()
+
+    def rename_paths(self, moved: Dict[Path, Path]) -> int:
+        """Re-key entries (and outputs) for files moved on disk; returns the number of entries updated."""
+        renames = {str(old.resolve()): str(new.resolve()) for old, new in moved.items()}
+        updated = 0
+        with self._lock:
+            for old_key in [key for key in self._entries if key in renames]:
+                self._entries[renames[old_key]] = self._entries.pop(old_key)
+                updated += 1
+            for entry in self._entries.values():
+                if entry.get("output") in renames:
+                    entry["output"] = renames[entry["output"]]
+                    updated += 1
+            self._outputs = {entry["output"] for entry in self._entries.values() if entry.get("output")}
+        if updated:
+            self.save()
+        return updated
+
+    def is_output(self, image_path: Path) -> bool:
+        """Check whether a file is a recorded output of this manifest."""
+        with self._lock:
+            return str(image_path) in self._outputs or str(image_path.resolve()) in self._outputs
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,129 @@
+"""
+Header-only image dimension probing for FLUX Image Generator.
+
+Reads width and height straight from JPEG (SOF markers), PNG (IHDR) and
+WebP (VP8/VP8L/VP8X) headers without decoding pixels or importing PIL.
+Only the first few KB of a file are read; JPEG segments before the frame
+header (EXIF, ICC profiles) are skipped with seeks.
+"""
+
+import io
+import struct
+from pathlib import Path
+from typing import Optional, Tuple, BinaryIO
+
+# JPEG start-of-frame markers carrying dimensions (excludes DHT, JPG, DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers without a length field
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class ImageProbe:
+    """Dependency-free image header parser."""
+
+    @staticmethod
+    def probe_file(image_path: Path) -> Optional[Tuple[int, int]]:
+        """Get (width, height) from a file header, or None if unrecognized."""
+        try:
+            with open(image_path, "rb") as f:
+                return ImageProbe.probe_stream(f)
+        except OSError:
+            return None
+
+    @staticmethod
+    def probe_bytes(image_data: bytes) -> Optional[Tuple[int, int]]:
+        """Get (width, height) from in-memory image data, or None if unrecognized."""
+        return ImageProbe.probe_stream(io.BytesIO(image_data))
+
+    @staticmethod
+    def probe_stream(stream: BinaryIO) -> Optional[Tuple[int, int]]:
+        """Get (width, height) from a binary stream positioned at the image start."""
+        head = stream.read(32)
+        try:
+            if head[:2] == b"\xff\xd8":
+                return ImageProbe._probe_jpeg(stream)
+            if head[:8] == _PNG_SIGNATURE:
+                return ImageProbe._probe_png(head)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return ImageProbe._probe_webp(head)
+        except (struct.error, ValueError):
+            return None
+        return None
+
+    @staticmethod
+    def _probe_png(head: bytes) -> Optional[Tuple[int, int]]:
+        """Read dimensions from the IHDR chunk that must follow the signature."""
+        if len(head) < 24 or head[12:16] != b"IHDR":
+            return None
+        width, height = struct.unpack(">II", head[16:24])
+        return width, height
+
+    @staticmethod
+    def _probe_webp(head: bytes) -> Optional[Tuple[int, int]]:
+        """Read dimensions from the first VP8/VP8L/VP8X chunk; None if the header is cut short."""
+        chunk = head[12:16]
+        payload = head[20:32]
+
+        if chunk == b"VP8 ":
+            # Frame tag (3 bytes), start code 9d 01 2a, then 14-bit width/height
+            if len(payload) < 10 or payload[3:6] != b"\x9d\x01\x2a":
+                return None
+            width, height = struct.unpack("<HH", payload[6:10])
+            return width & 0x3FFF, height & 0x3FFF
+
+        if chunk == b"VP8L":
+            if len(payload) < 5 or payload[0] != 0x2F:
+                return None
+            bits = struct.unpack("<I", payload[1:5])[0]
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+
+        if chunk == b"VP8X":
+            # Flags + reserved (4 bytes), then 24-bit canvas width/height minus one
+            if len(payload) < 10:
+                return None
+            width = int.from_bytes(payload[4:7], "little") + 1
+            height = int.from_bytes(payload[7:10], "little") + 1
+            return width, height
+
+        return None
+
+    @staticmethod
+    def _probe_jpeg(stream: BinaryIO) -> Optional[Tuple[int, int]]:
+        """Walk JPEG segments until a start-of-frame marker."""
+        stream.seek(2)
+        while True:
+            byte = stream.read(1)
+            if not byte:
+                return None
+            if byte != b"\xff":
+                continue
+
+            # Skip fill bytes between markers
+            marker = stream.read(1)
+            while marker == b"\xff":
+                marker = stream.read(1)
+            if not marker:
+                return None
+
+            code = marker[0]
+            if code in _JPEG_STANDALONE_MARKERS or code == 0x00:
+                continue
+            if code == 0xD9:  # End of image
+                return None
+
+            length_bytes = stream.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack(">H", length_bytes)[0]
+            if length < 2:
+                return None
+
+            if code in _JPEG_SOF_MARKERS:
+                frame = stream.read(5)
+                if len(frame) < 5:
+                    return None
+                height, width = struct.unpack(">HH", frame[1:5])
+                return width, height
+
+            stream.seek(length - 2, io.SEEK_CUR)
@@ -0,0 +1,78 @@
+"""
+Progress reporting utilities for FLUX Image Generator.
+"""
+
+import threading
+import time
+from typing import Optional, Callable, Any, Dict
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProgressTracker:
+    """Thread-safe progress counter for batch operations."""
+
+    def __init__(
+        self,
+        total: int,
+        label: str = "Progress",
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        log_every: int = 1
+    ):
+        """Initialize tracker for a batch of the given size."""
+        self.total = total
+        self.label = label
+        self.callback = callback
+        self.log_every = max(1, log_every)
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def completed(self) -> int:
+        """Number of finished items (succeeded, failed or skipped)."""
+        return self.succeeded + self.failed + self.skipped
+
+    def update(self, success: bool = True, item: Any = None, skipped: bool = False) -> Dict[str, Any]:
+        """Record one finished item and report progress."""
+        with self._lock:
+            if skipped:
+                self.skipped += 1
+            elif success:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            snapshot = self.snapshot()
+
+        snapshot["item"] = item
+        if snapshot["completed"] % self.log_every == 0 or snapshot["completed"] == self.total:
+            logger.info(
+                f"{self.label}: {snapshot['completed']}/{self.total} "
+                f"(ok {snapshot['succeeded']}, failed {snapshot['failed']}, skipped {snapshot['skipped']}) "
+                f"{snapshot['rate']:.2f}/s, ETA {snapshot['eta_seconds']:.0f}s"
+            )
+        if self.callback:
+            self.callback(snapshot)
+        return snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get current progress statistics."""
+        elapsed = time.monotonic() - self.started_at
+        completed = self.completed
+        rate = completed / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - completed)
+        return {
+            "label": self.label,
+            "total": self.total,
+            "completed": completed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": elapsed,
+            "rate": rate,
+            "eta_seconds": remaining / rate if rate > 0 else 0.0,
+        }
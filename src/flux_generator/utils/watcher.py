@@ -0,0 +1,255 @@
+"""
+Directory watching utilities for FLUX Image Generator.
+
+Uses Linux inotify (through ctypes, no extra dependencies) to notice files
+as soon as they are closed or renamed into a directory (optionally a whole
+tree, following subdirectories as they are created), and falls back to
+periodic polling on other platforms or when inotify is unavailable.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, List, Iterator, Iterable, Dict, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify wrapper; one descriptor, any number of watched directories."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, directory: Path, mask: int) -> int:
+        """Watch a directory; returns its watch descriptor."""
+        watch = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), mask)
+        if watch < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        return watch
+
+    def read_events(self, timeout: float) -> Tuple[List[Tuple[int, int, str]], bool]:
+        """Wait up to timeout seconds; return ([(watch, mask, name)], overflowed)."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return [], False
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        events, overflowed, offset = [], False, 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            watch, mask, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+            else:
+                events.append((watch, mask, os.fsdecode(name)))
+        return events, overflowed
+
+    def close(self) -> None:
+        """Close the inotify descriptor."""
+        os.close(self._fd)
+
+
+class DirectoryWatcher:
+    """Watch a directory (optionally its whole tree) for new or rewritten files matching patterns."""
+
+    def __init__(
+        self,
+        directory: Path,
+        patterns: Iterable[str] = ("*.jpg",),
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+        recursive: bool = False,
+        exclude_dirs: Iterable[str] = ()
+    ):
+        """
+        Initialize watcher; call watch() to start receiving batches.
+
+        With recursive set, subdirectories (including ones created while
+        watching, as sharded output layouts do) are watched too, except
+        hidden ones and those named in exclude_dirs.
+        """
+        self.directory = directory
+        self.patterns = list(patterns)
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.recursive = recursive
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.backend = "polling"
+        self._started = False
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}  # watch descriptor -> directory relative to the root
+        self._known: Dict[str, Tuple[int, int]] = {}
+
+    def matches(self, name: str) -> bool:
+        """Check whether a file name matches any watched pattern."""
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def _descend(self, name: str) -> bool:
+        return self.recursive and not name.startswith(".") and name not in self.exclude_dirs
+
+    def _snapshot(self, relative: str = "") -> Dict[str, Tuple[int, int]]:
+        """Stat all matching files below relative: path relative to the root -> (size, mtime_ns)."""
+        snapshot = {}
+        pending = [relative]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(self.directory / current) as entries:
+                    for entry in entries:
+                        name = os.path.join(current, entry.name) if current else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if self._descend(entry.name):
+                                pending.append(name)
+                        elif entry.is_file() and self.matches(entry.name):
+                            stat = entry.stat()
+                            snapshot[name] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                continue
+        return snapshot
+
+    def _add_watches(self, relative: str = "") -> None:
+        """Watch a directory and, when recursive, every subdirectory below it."""
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | (IN_CREATE if self.recursive else 0)
+        pending = [relative]
+        while pending:
+            current = pending.pop()
+            try:
+                self._watches[self._inotify.add_watch(self.directory / current, mask)] = current
+                if not self.recursive:
+                    continue
+                with os.scandir(self.directory / current) as entries:
+                    pending.extend(
+                        os.path.join(current, entry.name) if current else entry.name
+                        for entry in entries
+                        if entry.is_dir(follow_symlinks=False) and self._descend(entry.name)
+                    )
+            except OSError as e:
+                if not current:
+                    raise
+                # Removed again already, or out of watches: polling cannot help either
+                logger.warning(f"Not watching {self.directory / current}: {e}")
+
+    def start(self) -> None:
+        """
+        Begin watching now; files changing from here on are reported by watch().
+
+        Call before scanning the existing files so nothing written during the
+        scan is missed. watch() calls it if it has not been called.
+        """
+        if self._started:
+            return
+        self._started = True
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                self._add_watches()
+                self.backend = "inotify"
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable ({e}), falling back to polling")
+                self.close()
+                self._started = True
+        if self._inotify is None:
+            self._known = self._snapshot()
+        logger.info(f"Watching {self.directory}{' recursively' if self.recursive else ''} "
+                    f"for {self.patterns} using {self.backend}")
+
+    def close(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+        self._started = False
+
+    def watch(self, stop_event: Optional[threading.Event] = None) -> Iterator[List[Path]]:
+        """
+        Yield batches of files that appeared or changed after start().
+
+        Files already present when watching starts are not reported.
+        Stops when stop_event is set.
+        """
+        stop_event = stop_event or threading.Event()
+        self.start()
+        try:
+            if self._inotify:
+                yield from self._watch_inotify(self._inotify, stop_event)
+            else:
+                yield from self._watch_polling(stop_event)
+        finally:
+            self.close()
+
+    def _watch_inotify(self, inotify: _Inotify, stop_event: threading.Event) -> Iterator[List[Path]]:
+        """Report files once they are closed after writing or renamed into place."""
+        while not stop_event.is_set():
+            events, overflowed = inotify.read_events(timeout=min(self.poll_interval, 1.0))
+            names = set()
+            for watch, mask, name in events:
+                parent = self._watches.get(watch)
+                if mask & IN_IGNORED:
+                    self._watches.pop(watch, None)
+                if parent is None or not name:
+                    continue
+                path = os.path.join(parent, name) if parent else name
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and self._descend(name):
+                        # Files may land in the new directory before its watch exists
+                        self._add_watches(path)
+                        names.update(self._snapshot(path))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self.matches(name):
+                    names.add(path)
+            if overflowed:
+                logger.warning("inotify queue overflowed; rescanning directory")
+                self._add_watches()
+                names.update(self._snapshot())
+            if names:
+                yield [self.directory / name for name in sorted(names)]
+
+    def _watch_polling(self, stop_event: threading.Event) -> Iterator[List[Path]]:
+        """Report files whose size and mtime stayed stable for one poll interval."""
+        known = self._known
+        pending: Dict[str, Tuple[int, int]] = {}
+
+        while not stop_event.wait(self.poll_interval):
+            current = self._snapshot()
+            batch = []
+            for name, stat in current.items():
+                if known.get(name) == stat:
+                    continue
+                if pending.get(name) == stat:
+                    # Unchanged since the previous poll: writing has finished
+                    batch.append(name)
+                    known[name] = stat
+                    pending.pop(name)
+                else:
+                    pending[name] = stat
+            for name in set(pending) - set(current):
+                pending.pop(name)
+            if batch:
+                yield [self.directory / name for name in sorted(batch)]
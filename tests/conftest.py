@@ -0,0 +1,16 @@
+"""
+Shared test setup.
+
+The package reads its settings on import, so the API key and a scratch
+base directory are set before any test module imports it. No test calls
+the API.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BFL_API_KEY", "test")
+os.environ.setdefault("FLUX_BASE_DIR", tempfile.mkdtemp(prefix="flux-tests-"))
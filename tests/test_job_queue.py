@@ -0,0 +1,126 @@
+"""
+Lease takeover tests for the SQLite job queue.
+
+Two QueueWorkers share one temporary queue file. Their stores never
+renew leases, as if the workers had lost the network, and a fake
+executor stands in for the API so no generation request is made.
+
+Usage:
+    python -m pytest tests
+"""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from src.flux_generator.core.workers import QueueWorker
+from src.flux_generator.storage.jobs import JobStore, DONE, FAILED
+
+LEASE = 0.3
+
+
+class PartitionedStore(JobStore):
+    """Job store whose heartbeats never reach the database."""
+
+    def renew(self, claims, lease_seconds):
+        return []
+
+
+class FakeExecutor:
+    """Returns a path per payload, optionally blocking until released."""
+
+    def __init__(self, name: str, block: bool = False, delay: float = 0.0):
+        self.name = name
+        self.delay = delay
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def run(self, payload):
+        self.started.set()
+        self.release.wait(10)
+        time.sleep(self.delay)
+        return f"{self.name}/{payload['seed']}.jpg"
+
+    def wait_for_writes(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class QueueTakeoverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.directory.name) / "queue.sqlite"
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.directory.cleanup()
+
+    def open_store(self, partitioned: bool = False) -> JobStore:
+        store = (PartitionedStore if partitioned else JobStore)(self.db_path, wal=False)
+        self.stores.append(store)
+        return store
+
+    def start(self, worker: QueueWorker) -> threading.Thread:
+        thread = threading.Thread(target=worker.run, kwargs={"idle_interval": 0.05}, daemon=True)
+        thread.start()
+        return thread
+
+    def test_expired_claim_is_reclaimed_and_late_result_discarded(self):
+        batch = self.open_store().create_batch([{"seed": 1}])
+        slow = FakeExecutor("lost", block=True)
+        first = QueueWorker(self.open_store(partitioned=True), batch, name="first",
+                            lease_seconds=LEASE, max_attempts=3, executor=slow)
+        first_thread = self.start(first)
+        self.assertTrue(slow.started.wait(5))
+
+        second = QueueWorker(self.open_store(), batch, name="second",
+                             lease_seconds=LEASE, max_attempts=3, executor=FakeExecutor("taken"))
+        self.start(second).join(10)
+        slow.release.set()
+        first_thread.join(10)
+
+        [job] = self.open_store().results(batch)
+        self.assertEqual(job["status"], DONE)
+        self.assertEqual(job["result"], "taken/1.jpg")
+        self.assertEqual(job["worker"], "second/0")
+        self.assertEqual(job["attempts"], 2)
+        self.assertEqual((first.processed, second.processed), (0, 1))
+
+    def test_stale_complete_is_rejected(self):
+        store = self.open_store()
+        batch = store.create_batch([{"seed": 1}])
+        lost = store.claim(batch, "lost", lease_seconds=0.05)
+        time.sleep(0.1)
+        taken = store.claim(batch, "taken", lease_seconds=LEASE)
+        self.assertEqual(taken.id, lost.id)
+
+        self.assertFalse(store.complete(lost.id, "late", worker="lost"))
+        self.assertTrue(store.complete(taken.id, "fresh", worker="taken"))
+        self.assertEqual(store.results(batch)[0]["result"], "fresh")
+
+    def test_job_fails_after_max_attempts_expired_claims(self):
+        batch = self.open_store().create_batch([{"seed": 1}])
+        workers = [
+            QueueWorker(self.open_store(partitioned=True), batch, name=name, lease_seconds=LEASE,
+                        max_attempts=2, executor=FakeExecutor(name, delay=LEASE * 3))
+            for name in ("first", "second")
+        ]
+        threads = [self.start(worker) for worker in workers]
+        for thread in threads:
+            thread.join(10)
+
+        [job] = self.open_store().results(batch)
+        self.assertEqual(job["status"], FAILED)
+        self.assertEqual(job["attempts"], 2)
+        self.assertIn("after 2 attempts", job["error"])
+        self.assertEqual(sum(worker.processed for worker in workers), 0)
+
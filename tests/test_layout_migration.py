@@ -0,0 +1,72 @@
+"""
+Layout migration keeps incremental Adetailer runs incremental.
+
+Inputs are re-sharded after a first run; once the manifest is updated
+with the moves, a second incremental run must not submit anything.
+
+Usage:
+    python -m pytest tests
+"""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from src.flux_generator.api.models import GenerationResponse
+from src.flux_generator.config.settings import settings
+from src.flux_generator.core.adetailer import AdetailerGenerator
+from src.flux_generator.storage.layout import OutputLayout
+from src.flux_generator.utils.manifest import ProcessingManifest
+
+
+def jpeg_bytes(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 96), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class LayoutMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = Path(self.directory.name)
+        self.inputs = root / "enhanced"
+        self.output_dir = root / "adetailer_processed"
+        self.inputs.mkdir()
+        for seed in range(3):
+            (self.inputs / f"image_{seed}.jpg").write_bytes(jpeg_bytes((seed * 60, 90, 160)))
+
+        settings.paths.input_dir.mkdir(parents=True, exist_ok=True)
+        (settings.paths.input_dir / "character.jpg").write_bytes(jpeg_bytes((200, 180, 160)))
+        self.generator = AdetailerGenerator()
+        self.requests = []
+        self.generator.api_client.generate_image = self.fake_generate
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def fake_generate(self, request):
+        self.requests.append(request)
+        return GenerationResponse.success_response(image_data=jpeg_bytes((10, 20, 30)), request_id="fake")
+
+    def process(self):
+        return self.generator.process_directory_images(
+            input_dir=self.inputs, output_dir=self.output_dir, incremental=True, recursive=True,
+            quality_gate=False, face_filter=False, max_workers=2
+        )
+
+    def test_incremental_run_after_migration_submits_nothing(self):
+        self.assertEqual(len(self.process()), 3)
+        self.assertEqual(len(self.requests), 3)
+
+        moved = OutputLayout("hash").migrate(self.inputs)
+        self.assertEqual(len(moved), 3)
+        self.assertTrue(all(new.parent != self.inputs for new in moved.values()))
+        manifest_path = self.output_dir / AdetailerGenerator.MANIFEST_FILENAME
+        self.assertEqual(ProcessingManifest(manifest_path).rename_paths(moved), 3)
+
+        self.assertEqual(self.process(), [])
+        self.assertEqual(len(self.requests), 3)
@@ -0,0 +1,72 @@
+"""
+Tests for the streaming stage pipeline.
+
+Stages are plain functions, so no generator or API client is built.
+
+Usage:
+    python -m pytest tests
+"""
+
+import itertools
+import threading
+import time
+import unittest
+
+from src.flux_generator.core.pipeline import Pipeline, PipelineItem, Stage
+
+
+def double(item: PipelineItem) -> bool:
+    item.params["value"] *= 2
+    return True
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_items_finish_rejected_or_failed(self):
+        def gate(item):
+            if item.params["value"] == 2:
+                raise RuntimeError("unreadable")
+            return item.params["value"] % 4 == 0
+
+        pipeline = Pipeline([Stage("double", double, workers=3), Stage("gate", gate, workers=2)])
+        items = sorted(pipeline.run(PipelineItem(i, {"value": i}) for i in range(6)), key=lambda item: item.index)
+
+        self.assertEqual([item.status for item in items], ["done", "failed", "done", "rejected", "done", "rejected"])
+        self.assertEqual(items[1].reasons, ["gate: unreadable"])
+        self.assertEqual(pipeline.stats["items"], 6)
+        self.assertEqual(pipeline.stats["stages"]["gate"]["failed"], 1)
+        self.assertEqual(pipeline.stats["stages"]["gate"]["dropped"], 2)
+
+    def test_first_item_leaves_before_the_batch_is_generated(self):
+        def slow(item):
+            time.sleep(0.05)
+            return True
+
+        pipeline = Pipeline([Stage("slow", slow), Stage("double", double)])
+        first = next(iter(pipeline.run(PipelineItem(i, {"value": i}) for i in range(20))))
+        self.assertEqual(first.status, "done")
+        self.assertLess(pipeline.stats["first_output_seconds"], 0.5)
+
+    def test_backpressure_bounds_the_source_and_abandoning_stops_it(self):
+        fed = itertools.count()
+        source = (PipelineItem(next(fed), {"value": 1}) for _ in itertools.repeat(None))
+        release = threading.Event()
+
+        def blocked(item):
+            release.wait(5)
+            return True
+
+        pipeline = Pipeline([Stage("double", double, queue_size=1), Stage("blocked", blocked, queue_size=1)],
+                            output_queue_size=1)
+        stream = pipeline.run(source)
+        consumer = threading.Thread(target=lambda: next(stream), daemon=True)
+        consumer.start()
+        time.sleep(0.3)
+        # Queues of one, one worker per stage: a handful of items, not an endless source
+        self.assertLess(next(fed), 10)
+
+        release.set()
+        consumer.join(5)
+        stream.close()
+        self.assertFalse(any(thread.name.startswith("pipeline-") for thread in threading.enumerate()))
+
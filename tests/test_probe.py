@@ -0,0 +1,55 @@
+"""
+Header probing must never raise on truncated files.
+
+Usage:
+    python -m pytest tests
+"""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from src.flux_generator.utils.base import ImageProcessor
+from src.flux_generator.utils.probe import ImageProbe
+
+
+def encode(pil_format: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 24), (120, 60, 30)).save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+class TruncatedHeaderTest(unittest.TestCase):
+
+    FORMATS = {
+        "jpeg": encode("JPEG"),
+        "png": encode("PNG"),
+        "webp_lossy": encode("WEBP"),
+        "webp_lossless": encode("WEBP", lossless=True),
+    }
+
+    def test_full_headers_are_read(self):
+        for name, data in self.FORMATS.items():
+            with self.subTest(name):
+                self.assertEqual(ImageProbe.probe_bytes(data), (40, 24))
+
+    def test_every_prefix_probes_to_none_or_the_true_size(self):
+        for name, data in self.FORMATS.items():
+            for length in range(len(data)):
+                with self.subTest(name, length=length):
+                    self.assertIn(ImageProbe.probe_bytes(data[:length]), (None, (40, 24)))
+
+    def test_short_webp_chunks(self):
+        for chunk in (b"VP8 ", b"VP8L", b"VP8X"):
+            with self.subTest(chunk):
+                self.assertIsNone(ImageProbe.probe_bytes(b"RIFF\x00\x00\x00\x00WEBP" + chunk))
+                self.assertIsNone(ImageProbe.probe_bytes(b"RIFF\x00\x00\x00\x00WEBP" + chunk + b"\x0a\x00\x00\x00\x2f"))
+
+    def test_truncated_file_falls_back_instead_of_raising(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "cut.webp"
+            path.write_bytes(b"RIFF\x00\x00\x00\x00WEBPVP8L")
+            self.assertEqual(ImageProcessor.get_image_dimensions(path), (512, 512))
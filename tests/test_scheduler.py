@@ -0,0 +1,80 @@
+"""
+Tests for the dependency-aware DAG scheduler.
+
+The runner is a plain function, so no generator or API client is built.
+
+Usage:
+    python -m pytest tests
+"""
+
+import threading
+import time
+import unittest
+
+from src.flux_generator.core.scheduler import DagJob, DagScheduler
+
+
+class DagSchedulerTest(unittest.TestCase):
+
+    def test_children_start_when_their_parent_finishes(self):
+        events = []
+        lock = threading.Lock()
+
+        def runner(job, parent_output):
+            with lock:
+                events.append(("start", job.name))
+            time.sleep(job.params.get("delay", 0))
+            with lock:
+                events.append(("end", job.name))
+            return f"{parent_output or 'input'}>{job.name}"
+
+        jobs = [
+            DagJob("slow", params={"delay": 0.5}),
+            DagJob("fast"),
+            DagJob("child", depends_on="fast"),
+        ]
+        results = DagScheduler(max_workers=2).run(jobs, runner)
+
+        self.assertEqual(results, {"slow": "input>slow", "fast": "input>fast", "child": "input>fast>child"})
+        self.assertLess(events.index(("start", "child")), events.index(("end", "slow")))
+
+    def test_longest_chain_starts_first(self):
+        order = []
+        jobs = [DagJob("leaf"), DagJob("root"), DagJob("middle", depends_on="root"), DagJob("tip", depends_on="middle")]
+        DagScheduler(max_workers=1).run(jobs, lambda job, parent: order.append(job.name) or job.name)
+        # tip and leaf both end a chain of one: the tie keeps list order
+        self.assertEqual(order, ["root", "middle", "leaf", "tip"])
+
+    def test_failed_parent_falls_back_to_input(self):
+        seen = {}
+
+        def runner(job, parent_output):
+            seen[job.name] = parent_output
+            if job.name == "parent":
+                raise RuntimeError("API error")
+            return job.name
+
+        results = DagScheduler().run([DagJob("parent"), DagJob("child", depends_on="parent")], runner)
+        self.assertEqual(results, {"parent": None, "child": "child"})
+        self.assertIsNone(seen["child"])
+
+    def test_failed_parent_skips_descendants_without_fallback(self):
+        ran = []
+
+        def runner(job, parent_output):
+            ran.append(job.name)
+            return None if job.name == "parent" else job.name
+
+        jobs = [DagJob("parent"), DagJob("child", depends_on="parent"), DagJob("grandchild", depends_on="child")]
+        results = DagScheduler(fallback_to_input=False).run(jobs, runner)
+        self.assertEqual(results, {"parent": None, "child": None, "grandchild": None})
+        self.assertEqual(ran, ["parent"])
+
+    def test_invalid_graphs_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "unknown job"):
+            DagScheduler.validate([DagJob("a", depends_on="missing")])
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            DagScheduler.validate([DagJob("a", depends_on="b"), DagJob("b", depends_on="a")])
+        with self.assertRaisesRegex(ValueError, "Duplicate"):
+            DagScheduler.validate([DagJob("a"), DagJob("a")])
+
@@ -0,0 +1,43 @@
+"""
+Recursive directory watching, as used for sharded output layouts.
+
+Usage:
+    python -m pytest tests
+"""
+
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from src.flux_generator.utils.watcher import DirectoryWatcher
+
+
+class RecursiveWatcherTest(unittest.TestCase):
+
+    def watch(self, use_inotify: bool) -> list:
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "ab").mkdir()
+            (root / "ab" / "old.jpg").write_bytes(b"old")
+            watcher = DirectoryWatcher(root, poll_interval=0.2, use_inotify=use_inotify,
+                                       recursive=True, exclude_dirs=("derivatives",))
+            watcher.start()
+            (root / "ab" / "existing_shard.jpg").write_bytes(b"new")
+            (root / "cd" / "ef").mkdir(parents=True)
+            (root / "cd" / "ef" / "new_shard.jpg").write_bytes(b"new")
+            (root / "derivatives").mkdir()
+            (root / "derivatives" / "thumb.jpg").write_bytes(b"derived")
+
+            stop = threading.Event()
+            timer = threading.Timer(1.0, stop.set)
+            timer.start()
+            reported = sorted(str(path.relative_to(root)) for batch in watcher.watch(stop) for path in batch)
+            timer.join()
+            return reported
+
+    def test_inotify_follows_new_subdirectories(self):
+        self.assertEqual(self.watch(use_inotify=True), ["ab/existing_shard.jpg", "cd/ef/new_shard.jpg"])
+
+    def test_polling_scans_the_tree(self):
+        self.assertEqual(self.watch(use_inotify=False), ["ab/existing_shard.jpg", "cd/ef/new_shard.jpg"])